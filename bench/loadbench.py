@@ -0,0 +1,545 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+bench.loadbench
+~~~~~~~~~~~~~~~~~
+
+This module provides a self-contained load benchmark for the WeApRous
+processes. Every scenario launches the real entry points
+(``start_backend.py``, ``start_proxy.py``, ``start_tracker.py``,
+``start_sampleapp.py``) on loopback, drives them with a closed-loop client
+(``--concurrency`` persistent HTTP/1.1 connections) for ``--duration``
+seconds, and reports requests per second, p50/p95/p99 latency, the error
+count and the RSS of every launched process.
+
+Scenarios:
+
+- ``static``: static GETs (HTML, CSS, JS) on the backend.
+- ``proxy``: the same GETs through the proxy to the backend.
+- ``register``: ``/submit-info`` registration storm on the tracker.
+- ``fanout``: ``/send-peer`` channel messages fanned out to ``--peers`` peers.
+- ``poll``: ``/check-new-messages`` polling across the peers.
+
+Results can be stored as baselines (``--save-baseline``) in
+``bench/baselines.json`` and later compared (``--compare``): the run fails
+when RPS drops or p99 grows by more than ``--threshold`` percent.
+
+The peers talk to the tracker on the fixed ``peer.TRACKER_PORT``, so the
+``fanout`` and ``poll`` scenarios need that port free.
+
+Usage Example:
+--------------
+>>> python -m bench.loadbench static --duration 10 --concurrency 16
+>>> python -m bench.loadbench all --save-baseline
+>>> python -m bench.loadbench all --compare --threshold 15
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+
+#: Repository root, working directory of the launched processes.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+#: Default file of stored baselines.
+BASELINE_FILE = os.path.join(ROOT, "bench", "baselines.json")
+#: Port of the tracker expected by ``peer.py``.
+TRACKER_PORT = 9999
+#: Static files requested by the ``static`` and ``proxy`` scenarios.
+STATIC_PATHS = ("/login.html", "/static/css/styles.css", "/static/js/chat_client.js")
+#: Seconds allowed for a launched process to accept connections.
+STARTUP_TIMEOUT = 15.0
+
+
+class Service:
+    """The :class:`Service <Service>` object, one launched entry point.
+
+    :attrs name (str): label used in the report.
+    :attrs script (str): entry point, relative to the repository root.
+    :attrs args (list): command-line arguments of the script.
+    :attrs port (int): port the process listens on.
+    """
+
+    __attrs__ = [
+        "name",
+        "script",
+        "args",
+        "port",
+    ]
+
+    def __init__(self, name, script, args, port):
+        self.name = name
+        self.script = script
+        self.args = args
+        self.port = port
+        self.process = None
+        self.log_path = None
+
+    def start(self, log_dir):
+        """Launches the process and waits until its port accepts connections."""
+        self.log_path = os.path.join(log_dir, "{}.log".format(self.name))
+        log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, self.script] + [str(a) for a in self.args],
+            cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+        )
+        log.close()
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("{} exited during startup:\n{}".format(self.name, self.log_tail()))
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("{} did not listen on port {}:\n{}".format(
+            self.name, self.port, self.log_tail()))
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def rss(self):
+        """Resident set size in KiB (Linux only), or ``None``."""
+        try:
+            with open("/proc/{}/status".format(self.process.pid)) as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except (OSError, AttributeError):
+            pass
+        return None
+
+    def log_tail(self, lines=20):
+        try:
+            with open(self.log_path, "rb") as f:
+                return b"\n".join(f.read().splitlines()[-lines:]).decode("utf-8", "replace")
+        except OSError:
+            return ""
+
+
+class HttpClient:
+    """The :class:`HttpClient <HttpClient>` object, a minimal persistent
+    HTTP/1.1 client reading ``Content-Length`` framed responses. It
+    reconnects whenever the server closes the connection."""
+
+    def __init__(self, port, timeout=10.0):
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = b""
+
+    def request(self, method, path, body=b"", headers=None):
+        """
+        Sends one request and reads its response.
+
+        :rtype int: the status code.
+        """
+        lines = ["{} {} HTTP/1.1".format(method, path), "Host: 127.0.0.1:{}".format(self.port)]
+        for name, value in (headers or {}).items():
+            lines.append("{}: {}".format(name, value))
+        if body or method in ("POST", "PUT"):
+            lines.append("Content-Length: {}".format(len(body)))
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        for attempt in (0, 1):
+            if self.sock is None:
+                self.sock = socket.create_connection(("127.0.0.1", self.port), timeout=self.timeout)
+                self.buffer = b""
+            try:
+                self.sock.sendall(data)
+                return self._read_response()
+            except (ConnectionError, EOFError):
+                self.close()
+                if attempt:
+                    raise
+        return 0
+
+    def _read_response(self):
+        while b"\r\n\r\n" not in self.buffer:
+            self._fill()
+        head, _, self.buffer = self.buffer.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        status = int(lines[0].split()[1])
+        length, close = None, False
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection" and value.strip().lower() == b"close":
+                close = True
+
+        if length is None:
+            # Body delimited by the end of the connection.
+            try:
+                while True:
+                    self._fill()
+            except EOFError:
+                pass
+            self.close()
+            return status
+        while len(self.buffer) < length:
+            self._fill()
+        self.buffer = self.buffer[length:]
+        if close:
+            self.close()
+        return status
+
+    def _fill(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise EOFError
+        self.buffer += chunk
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+
+
+class Scenario:
+    """Base of the benchmark scenarios. Subclasses declare the services to
+    launch, an optional setup phase and the request issued by each worker."""
+
+    name = None
+    description = None
+
+    def __init__(self, options):
+        self.options = options
+        self.services = []
+
+    def setup(self):
+        pass
+
+    def next_request(self, worker, seq):
+        """Returns ``(port, method, path, body, headers)`` of a request."""
+        raise NotImplementedError
+
+
+class StaticScenario(Scenario):
+    name = "static"
+    description = "static GETs on the backend"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.backend = Service("backend", "start_backend.py",
+                               ["--server-ip", "127.0.0.1", "--server-port", options.base_port],
+                               options.base_port)
+        self.services = [self.backend]
+
+    def next_request(self, worker, seq):
+        path = STATIC_PATHS[(worker + seq) % len(STATIC_PATHS)]
+        return self.backend.port, "GET", path, b"", None
+
+
+class ProxyScenario(StaticScenario):
+    name = "proxy"
+    description = "static GETs through the proxy"
+
+    def __init__(self, options):
+        super().__init__(options)
+        proxy_port = options.base_port + 1
+        self.config = os.path.join(options.log_dir, "proxy.conf")
+        with open(self.config, "w") as f:
+            f.write('host "127.0.0.1:{}" {{\n    proxy_pass http://127.0.0.1:{};\n}}\n'.format(
+                proxy_port, self.backend.port))
+        self.proxy = Service("proxy", "start_proxy.py",
+                             ["--server-ip", "127.0.0.1", "--server-port", proxy_port,
+                              "--config", self.config],
+                             proxy_port)
+        self.services = [self.backend, self.proxy]
+
+    def next_request(self, worker, seq):
+        path = STATIC_PATHS[(worker + seq) % len(STATIC_PATHS)]
+        return self.proxy.port, "GET", path, b"", None
+
+
+class RegisterScenario(Scenario):
+    name = "register"
+    description = "/submit-info registration storm on the tracker"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.tracker = Service("tracker", "start_tracker.py",
+                               ["--server-ip", "127.0.0.1", "--server-port", options.tracker_port],
+                               options.tracker_port)
+        self.services = [self.tracker]
+
+    def next_request(self, worker, seq):
+        body = json.dumps({"peer_id": "bench-{}-{}".format(worker, seq % 1000),
+                           "ip": "127.0.0.1", "port": 20000 + worker}).encode()
+        return (self.tracker.port, "POST", "/submit-info", body,
+                {"Content-Type": "application/json"})
+
+
+class FanoutScenario(RegisterScenario):
+    name = "fanout"
+    description = "/send-peer channel fan-out across the peers"
+
+    CHANNEL = "bench"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.peers = []
+        for index in range(options.peers):
+            # A peer uses its HTTP port and the next one for P2P.
+            port = options.base_port + 10 + 2 * index
+            self.peers.append(Service("peer{}".format(index), "start_sampleapp.py",
+                                      ["--server-ip", "127.0.0.1", "--server-port", port],
+                                      port))
+        self.services = [self.tracker] + self.peers
+
+    def setup(self):
+        client = HttpClient(self.tracker.port)
+        for index, peer in enumerate(self.peers):
+            status = HttpClient(peer.port).request(
+                "POST", "/register-peer",
+                json.dumps({"username": "peer{}".format(index)}).encode(),
+                {"Content-Type": "application/json"})
+            if status != 200:
+                raise RuntimeError("peer{} failed to register ({})".format(index, status))
+        client.request("POST", "/create-channel",
+                       json.dumps({"channel_name": self.CHANNEL, "owner": "peer0"}).encode())
+        for index in range(1, len(self.peers)):
+            client.request("POST", "/join-channel",
+                           json.dumps({"channel_name": self.CHANNEL,
+                                       "username": "peer{}".format(index)}).encode())
+        client.close()
+
+    def next_request(self, worker, seq):
+        sender = self.peers[worker % len(self.peers)]
+        body = json.dumps({"target_type": "channel", "target_id": self.CHANNEL,
+                           "message": "bench {}-{}".format(worker, seq),
+                           "sender_username": sender.name}).encode()
+        return sender.port, "POST", "/send-peer", body, {"Content-Type": "application/json"}
+
+
+class PollScenario(FanoutScenario):
+    name = "poll"
+    description = "/check-new-messages polling across the peers"
+
+    def next_request(self, worker, seq):
+        peer = self.peers[(worker + seq) % len(self.peers)]
+        return peer.port, "GET", "/check-new-messages", b"", None
+
+
+#: Scenario name to class, in the order ``all`` runs them.
+SCENARIOS = {cls.name: cls for cls in (StaticScenario, ProxyScenario, RegisterScenario,
+                                       FanoutScenario, PollScenario)}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def drive(scenario, concurrency, duration, warmup):
+    """
+    Runs the closed-loop workload of a started scenario.
+
+    :rtype dict: requests, errors, rps and latency percentiles in milliseconds.
+    """
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start_barrier = threading.Barrier(concurrency + 1)
+    timing = {}
+
+    def worker(index):
+        clients = {}
+        seq = 0
+        start_barrier.wait()
+        warm_until = timing["start"] + warmup
+        end = timing["end"]
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            port, method, path, body, headers = scenario.next_request(index, seq)
+            seq += 1
+            client = clients.get(port)
+            if client is None:
+                client = clients[port] = HttpClient(port)
+            try:
+                status = client.request(method, path, body, headers)
+                ok = status < 500
+            except (OSError, EOFError, ValueError, IndexError):
+                client.close()
+                ok = False
+            done = time.perf_counter()
+            if done < warm_until:
+                continue
+            if ok:
+                latencies[index].append(done - now)
+            else:
+                errors[index] += 1
+        for client in clients.values():
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    timing["start"] = time.perf_counter()
+    timing["end"] = timing["start"] + warmup + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(value for series in latencies for value in series)
+    total_errors = sum(errors)
+    result = {
+        "requests": len(samples),
+        "errors": total_errors,
+        "rps": round(len(samples) / duration, 1),
+    }
+    for label, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        value = percentile(samples, fraction)
+        result[label] = round(value * 1000, 3) if value is not None else None
+    return result
+
+
+def run_scenario(name, options):
+    """Launches, drives and stops one scenario; returns its result dict."""
+    scenario = SCENARIOS[name](options)
+    try:
+        for service in scenario.services:
+            service.start(options.log_dir)
+        scenario.setup()
+        result = drive(scenario, options.concurrency, options.duration, options.warmup)
+        result["rss_kib"] = {service.name: service.rss() for service in scenario.services}
+    finally:
+        for service in reversed(scenario.services):
+            service.stop()
+    return result
+
+
+def compare(name, result, baseline, threshold):
+    """
+    Compares a result with its baseline.
+
+    :rtype list: human-readable regressions, empty when within ``threshold`` percent.
+    """
+    regressions = []
+    if baseline.get("rps") and result["rps"] < baseline["rps"] * (1 - threshold / 100.0):
+        regressions.append("{}: rps {} < baseline {} (-{:.1f}%)".format(
+            name, result["rps"], baseline["rps"],
+            100.0 * (1 - result["rps"] / baseline["rps"])))
+    if baseline.get("p99_ms") and result.get("p99_ms") is not None \
+            and result["p99_ms"] > baseline["p99_ms"] * (1 + threshold / 100.0):
+        regressions.append("{}: p99 {}ms > baseline {}ms (+{:.1f}%)".format(
+            name, result["p99_ms"], baseline["p99_ms"],
+            100.0 * (result["p99_ms"] / baseline["p99_ms"] - 1)))
+    return regressions
+
+
+def format_result(name, result):
+    rss = ", ".join("{}={}".format(k, "{}KiB".format(v) if v is not None else "n/a")
+                    for k, v in result.get("rss_kib", {}).items())
+    return ("{:<9} rps={:<9} p50={}ms p95={}ms p99={}ms errors={} rss[{}]".format(
+        name, result["rps"], result["p50_ms"], result["p95_ms"], result["p99_ms"],
+        result["errors"], rss))
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"scenarios": {}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="loadbench", description="WeApRous load benchmark")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS) + ["all"])
+    parser.add_argument("--duration", type=float, default=5.0, help="Measured seconds per scenario.")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds before measuring.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client connections.")
+    parser.add_argument("--peers", type=int, default=3, help="Peers launched by fanout/poll.")
+    parser.add_argument("--base-port", type=int, default=18000, help="First port used by the launched processes.")
+    parser.add_argument("--tracker-port", type=int, default=TRACKER_PORT)
+    parser.add_argument("--baseline-file", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baselines.")
+    parser.add_argument("--compare", action="store_true", help="Fail on regressions against the baselines.")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed regression, in percent.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    options = parser.parse_args(argv)
+
+    names = list(SCENARIOS) if options.scenario == "all" else [options.scenario]
+    results, failures = {}, []
+    with tempfile.TemporaryDirectory(prefix="weaprous-bench-") as log_dir:
+        options.log_dir = log_dir
+        for name in names:
+            try:
+                results[name] = run_scenario(name, options)
+            except RuntimeError as e:
+                failures.append("{}: {}".format(name, e))
+                continue
+            if not options.json:
+                print(format_result(name, results[name]))
+
+    if options.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    for failure in failures:
+        print("[FAILED] {}".format(failure), file=sys.stderr)
+
+    baselines = load_baselines(options.baseline_file)
+    status = 1 if failures else 0
+    if options.compare:
+        regressions = []
+        for name, result in results.items():
+            baseline = baselines["scenarios"].get(name)
+            if baseline is None:
+                print("[compare] {}: no baseline".format(name))
+                continue
+            regressions.extend(compare(name, result, baseline, options.threshold))
+        for regression in regressions:
+            print("[REGRESSION] {}".format(regression))
+        if regressions:
+            status = 1
+        else:
+            print("[compare] within {}% of baselines".format(options.threshold))
+
+    if options.save_baseline and results:
+        baselines["scenarios"].update(results)
+        baselines["environment"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": options.concurrency,
+            "duration": options.duration,
+        }
+        with open(options.baseline_file, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("[baseline] saved {} to {}".format(", ".join(sorted(results)), options.baseline_file))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
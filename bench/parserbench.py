@@ -0,0 +1,179 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+bench.parserbench
+~~~~~~~~~~~~~~~~~
+
+Micro-benchmark of request header parsing: the single-pass parser of
+:mod:`daemon.request` against the former str-based path (decode, split in
+``extract_request_line``, split again in ``prepare_headers``, cookies parsed
+by both ``Request.prepare`` and ``HttpAdapter.get_request_cookies``), which
+is reproduced below for comparison.
+
+It reports CPU time per request (best of several ``timeit`` repeats), the
+peak memory allocated while parsing and the memory retained by the parsed
+result (``tracemalloc``).
+
+Usage Example:
+--------------
+>>> python -m bench.parserbench --number 20000
+"""
+
+import os
+import sys
+import timeit
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daemon.request import Request
+
+#: Header block of a typical browser request to a routed API path.
+SAMPLE = (
+    b"POST /send-peer?channel=group1 HTTP/1.1\r\n"
+    b"Host: 127.0.0.1:8000\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0\r\n"
+    b"Accept: application/json, text/plain, */*\r\n"
+    b"Accept-Language: en-US,en;q=0.5\r\n"
+    b"Accept-Encoding: gzip, deflate\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 74\r\n"
+    b"Origin: http://127.0.0.1:8000\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Referer: http://127.0.0.1:8000/index.html\r\n"
+    b"Cookie: auth=true; username=alice; theme=dark; sid=4f2a9c0e7b\r\n"
+    b"Sec-Fetch-Mode: cors"
+)
+
+
+class LegacyRequest():
+    """The former ``Request``: a plain object with a per-instance ``__dict__``."""
+
+    def __init__(self):
+        self.method = None
+        self.url = None
+        self.headers = None
+        self.path = None
+        self.version = None
+        self.cookies = None
+        self.body = None
+        self.routes = {}
+        self.hook = None
+
+
+def legacy_parse(data):
+    """The str-based parsing performed before the single-pass parser."""
+    req = LegacyRequest()
+    request = data.decode('utf-8', errors='ignore')
+    # extract_request_line
+    lines = request.splitlines()
+    method, path, version = lines[0].split()
+    if path == '/':
+        path = '/index.html'
+    # prepare_headers
+    headers = {}
+    for line in request.split('\r\n')[1:]:
+        if ': ' in line:
+            key, val = line.split(': ', 1)
+            headers[key.lower()] = val.strip()
+    # Request.prepare cookies
+    cookies = {}
+    cookie_string = headers.get('cookie', '')
+    if cookie_string:
+        pairs = cookie_string.split('; ')
+        if len(pairs) == 1:
+            pairs = cookie_string.split(';')
+        for pair in pairs:
+            if '=' in pair:
+                key, value = pair.split('=', 1)
+                cookies[key.strip()] = value.strip()
+    req.method, req.path, req.version, req.headers, req.cookies = method, path, version, headers, cookies
+    # HttpAdapter.get_request_cookies
+    cookies = {}
+    for pair in cookie_string.split(';'):
+        parts = pair.strip().split('=', 1)
+        value = parts[1].strip() if len(parts) > 1 else ''
+        cookies[parts[0].strip()] = value.replace('\n', '').replace('\r', '').strip()
+    req.cookies = cookies
+    return req
+
+
+def current_parse(data):
+    """The single-pass parser, cookies read once as the adapter does."""
+    req = Request()
+    req.prepare(data, {})
+    req.cookies.get('auth')
+    return req
+
+
+def current_parse_no_cookies(data):
+    """The single-pass parser on a request whose cookies are never read."""
+    req = Request()
+    req.prepare(data, {})
+    return req
+
+
+def cpu_per_call(funcs, number, repeat):
+    """
+    Returns the best time per call of each function. Repeats of the cases are
+    interleaved so that a noisy period on the host penalises all of them.
+    """
+    timers = [timeit.Timer(lambda func=func: func(SAMPLE)) for func in funcs]
+    best = [float("inf")] * len(funcs)
+    for _ in range(repeat):
+        for index, timer in enumerate(timers):
+            best[index] = min(best[index], timer.timeit(number) / number)
+    return best
+
+
+def memory_per_call(func, number):
+    """
+    Returns ``(peak, retained)`` bytes per call: the peak of memory allocated
+    while parsing, and what the parsed result keeps alive.
+    """
+    func(SAMPLE)
+    kept = []
+    tracemalloc.start()
+    peaks = 0
+    for _ in range(number):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        kept.append(func(SAMPLE))
+        current, peak = tracemalloc.get_traced_memory()
+        peaks += peak - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return peaks / number, retained / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="parserbench", description="Request parser micro-benchmark")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing repeat.")
+    parser.add_argument("--repeat", type=int, default=9, help="Timing repeats (best is kept).")
+    options = parser.parse_args(argv)
+
+    cases = (("legacy str parser", legacy_parse),
+             ("single-pass parser", current_parse),
+             ("single-pass, cookies unread", current_parse_no_cookies))
+    timings = cpu_per_call([func for _, func in cases], options.number, options.repeat)
+    baseline = timings[0]
+    for (name, func), seconds in zip(cases, timings):
+        peak, retained = memory_per_call(func, min(options.number, 2000))
+        print("{:<28} {:7.2f} us/request ({:+4.0f}%)  peak {:6.0f} B  retained {:6.0f} B".format(
+            name, seconds * 1e6, 100.0 * (seconds / baseline - 1), peak, retained))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+bench.proxybench
+~~~~~~~~~~~~~~~~~
+
+This module compares the proxy engines under many concurrent connections.
+For every engine (``thread``, ``asyncio``) it launches ``start_backend.py``
+(asyncio engine) and ``start_proxy.py --engine <engine>`` on loopback, then
+opens ``--connections`` client connections at once. Each client sends its
+request line, holds the connection open for ``--hold`` seconds before it
+ends the header block, and reads the response, so that every connection is
+open in the proxy at the same time, as with slow or idle clients.
+
+It reports the completed and failed requests, the wall time, p50/p99
+latency from the end of the header block to the last byte, and the peak RSS
+and thread count of the proxy (sampled from ``/proc``, Linux only).
+
+The client, the proxy and the backend each need about ``--connections``
+file descriptors (``ulimit -n``), and the listening backlog is raised to
+``--backlog`` (bounded by ``net.core.somaxconn``).
+
+Usage Example:
+--------------
+>>> python -m bench.proxybench --connections 10000 --hold 2
+>>> python -m bench.proxybench --engines asyncio --connections 1000 --json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from bench.loadbench import Service, percentile
+
+#: Path requested through the proxy.
+PATH = "/login.html"
+
+
+class ProcessSampler:
+    """The :class:`ProcessSampler <ProcessSampler>` object, a thread sampling
+    the peak RSS (KiB) and thread count of a process."""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = None
+        self.peak_threads = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with open("/proc/{}/status".format(self.pid)) as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            self.peak_rss = max(self.peak_rss or 0, int(line.split()[1]))
+                        elif line.startswith("Threads:"):
+                            self.peak_threads = max(self.peak_threads or 0, int(line.split()[1]))
+            except OSError:
+                return
+            self._stop.wait(self.interval)
+
+
+async def one_client(port, hold, opened, timeout):
+    """
+    Runs one slow client.
+
+    :rtype float: the latency of the response in seconds, ``None`` on failure.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        opened.append(False)
+        return None
+    opened.append(True)
+    try:
+        writer.write("GET {} HTTP/1.1\r\nHost: 127.0.0.1:{}\r\n".format(PATH, port).encode())
+        await writer.drain()
+        await asyncio.sleep(hold)
+        started = time.perf_counter()
+        writer.write(b"\r\n")
+        data = await asyncio.wait_for(reader.read(), timeout)
+        if not data.startswith(b"HTTP/1.1 200"):
+            return None
+        return time.perf_counter() - started
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        writer.close()
+
+
+async def drive(port, connections, hold, timeout):
+    opened = []
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one_client(port, hold, opened, timeout)
+                                     for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    return results, opened.count(True), elapsed
+
+
+def run_engine(engine, options):
+    """Launches the backend and the proxy, drives them and stops them."""
+    backend_port = options.base_port
+    proxy_port = options.base_port + 1
+    config = os.path.join(options.log_dir, "proxy.conf")
+    with open(config, "w") as f:
+        f.write('host "127.0.0.1:{}" {{\n    proxy_pass http://127.0.0.1:{};\n}}\n'.format(
+            proxy_port, backend_port))
+    backend = Service("backend", "start_backend.py",
+                      ["--server-ip", "127.0.0.1", "--server-port", backend_port,
+                       "--engine", "asyncio"], backend_port)
+    proxy = Service("proxy-" + engine, "start_proxy.py",
+                    ["--server-ip", "127.0.0.1", "--server-port", proxy_port,
+                     "--config", config, "--engine", engine, "--backlog", options.backlog,
+                     "--health-interval", 0], proxy_port)
+    try:
+        backend.start(options.log_dir)
+        proxy.start(options.log_dir)
+        sampler = ProcessSampler(proxy.process.pid)
+        sampler.start()
+        results, opened, elapsed = asyncio.run(
+            drive(proxy_port, options.connections, options.hold, options.timeout))
+        sampler.stop()
+    finally:
+        proxy.stop()
+        backend.stop()
+
+    samples = sorted(value for value in results if value is not None)
+    result = {
+        "connections": options.connections,
+        "opened": opened,
+        "ok": len(samples),
+        "errors": options.connections - len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "proxy_rss_kib": sampler.peak_rss,
+        "proxy_threads": sampler.peak_threads,
+    }
+    for label, fraction in (("p50_ms", 0.50), ("p99_ms", 0.99)):
+        value = percentile(samples, fraction)
+        result[label] = round(value * 1000, 1) if value is not None else None
+    return result
+
+
+def format_result(engine, result):
+    return ("{:<8} ok={}/{} errors={} elapsed={}s p50={}ms p99={}ms "
+            "proxy rss={}KiB threads={}".format(
+                engine, result["ok"], result["connections"], result["errors"],
+                result["elapsed_s"], result["p50_ms"], result["p99_ms"],
+                result["proxy_rss_kib"], result["proxy_threads"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="proxybench",
+                                     description="WeApRous proxy engine benchmark")
+    parser.add_argument("--engines", default="thread,asyncio",
+                        help="Comma-separated proxy engines to compare.")
+    parser.add_argument("--connections", type=int, default=10000,
+                        help="Client connections opened at once.")
+    parser.add_argument("--hold", type=float, default=2.0,
+                        help="Seconds each client holds its connection before ending the request.")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Seconds a client waits to connect, then for the response.")
+    parser.add_argument("--backlog", type=int, default=4096, help="Listen backlog of the proxy.")
+    parser.add_argument("--base-port", type=int, default=18100,
+                        help="Port of the backend; the proxy uses the next one.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    options = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="weaprous-proxybench-") as log_dir:
+        options.log_dir = log_dir
+        for engine in options.engines.split(","):
+            try:
+                results[engine] = run_engine(engine, options)
+            except RuntimeError as e:
+                print("[FAILED] {}: {}".format(engine, e), file=sys.stderr)
+                return 1
+            if not options.json:
+                print(format_result(engine, results[engine]))
+    if options.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
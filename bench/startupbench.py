@@ -0,0 +1,176 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+bench.startupbench
+~~~~~~~~~~~~~~~~~
+
+Startup benchmark of the WeApRous entry points (``start_backend.py``,
+``start_proxy.py``, ``start_tracker.py``, ``start_sampleapp.py``). For each
+one it measures, over ``--runs`` fresh interpreters:
+
+- ``import``: time to import the entry point module (its ``__main__`` block
+  is not run), measured inside the child process.
+- ``first``: wall time from launching the process to the first complete
+  HTTP response, i.e. what a client sees during a restart.
+
+The bare interpreter startup (``python -c pass``) is reported as the floor.
+The tree is byte-compiled first (as after a deploy), so that source
+compilation is not measured even when ``PYTHONDONTWRITEBYTECODE`` is set.
+The run fails when the median time to first response of an entry point
+exceeds ``--budget`` milliseconds.
+
+Usage Example:
+--------------
+>>> python -m bench.startupbench
+>>> python -m bench.startupbench --runs 10 --budget 100 --base-port 9300
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import compileall
+import statistics
+import subprocess
+
+#: Repository root, working directory of the launched processes.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+#: Seconds allowed for a launched process to answer its first request.
+STARTUP_TIMEOUT = 15.0
+#: Seconds between two connection attempts while a process starts.
+POLL_INTERVAL = 0.002
+
+#: Directories skipped when byte-compiling the tree.
+EXCLUDE = re.compile(r"[/\\](\.git|apps)[/\\]")
+#: Measured snippet: import time of a module, in seconds, on stdout.
+IMPORT_SNIPPET = (
+    "import sys, time; sys.path.insert(0, {root!r}); started = time.perf_counter(); "
+    "import {module}; sys.stdout.write(repr(time.perf_counter() - started))"
+)
+
+
+def entry_points(base_port, config):
+    """Returns ``(name, script, args, port, path)`` of every entry point."""
+    local = ["--server-ip", "127.0.0.1", "--server-port"]
+    return [
+        ("backend", "start_backend.py", local + [base_port], base_port, "/login.html"),
+        ("proxy", "start_proxy.py", local + [base_port + 1, "--config", config],
+         base_port + 1, "/"),
+        ("tracker", "start_tracker.py", local + [base_port + 2], base_port + 2, "/get-list"),
+        # The sample app also binds its P2P server on port + 1.
+        ("sampleapp", "start_sampleapp.py", local + [base_port + 3], base_port + 3, "/login.html"),
+    ]
+
+
+def interpreter_floor():
+    """Wall time of ``python -c pass``, in seconds."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - started
+
+
+def import_time(script):
+    """Import time of an entry point module in a fresh interpreter, in seconds."""
+    module = os.path.splitext(script)[0]
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(root=ROOT, module=module)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def first_response(port, path):
+    """
+    Sends one request and reads the status line of the answer.
+
+    :rtype bool: ``True`` once an HTTP response was received.
+    """
+    try:
+        conn = socket.create_connection(("127.0.0.1", port), timeout=1.0)
+    except OSError:
+        return False
+    try:
+        conn.sendall("GET {} HTTP/1.1\r\nHost: 127.0.0.1:{}\r\nConnection: close\r\n\r\n".format(
+            path, port).encode())
+        return conn.recv(16).startswith(b"HTTP/")
+    except OSError:
+        return False
+    finally:
+        conn.close()
+
+
+def time_to_first_response(script, args, port, path):
+    """Launches an entry point and returns the seconds until its first response."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, script] + [str(a) for a in args],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + STARTUP_TIMEOUT
+        while time.perf_counter() < deadline:
+            if first_response(port, path):
+                return time.perf_counter() - started
+            if process.poll() is not None:
+                raise RuntimeError("{} exited during startup (code {})".format(script, process.returncode))
+            time.sleep(POLL_INTERVAL)
+        raise RuntimeError("{} did not answer on port {}".format(script, port))
+    finally:
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="startupbench", description="WeApRous startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per entry point.")
+    parser.add_argument("--base-port", type=int, default=9300, help="First of 5 consecutive ports.")
+    parser.add_argument("--budget", type=float, default=100.0,
+                        help="Largest median time to first response, in ms.")
+    options = parser.parse_args(argv)
+
+    compileall.compile_dir(ROOT, quiet=2, maxlevels=2, rx=EXCLUDE)
+    with tempfile.TemporaryDirectory(prefix="startupbench-") as tmp:
+        config = os.path.join(tmp, "proxy.conf")
+        with open(config, "w") as f:
+            f.write('host "127.0.0.1:{}" {{\n    proxy_pass http://127.0.0.1:{};\n}}\n'.format(
+                options.base_port + 1, options.base_port))
+
+        floor = statistics.median(interpreter_floor() for _ in range(options.runs))
+        print("{:<10} interpreter {:6.1f} ms".format("python", floor * 1000))
+
+        over_budget = []
+        for name, script, args, port, path in entry_points(options.base_port, config):
+            imports = [import_time(script) for _ in range(options.runs)]
+            firsts = [time_to_first_response(script, args, port, path) for _ in range(options.runs)]
+            first = statistics.median(firsts)
+            print("{:<10} import {:6.1f} ms   first response {:6.1f} ms (min {:6.1f})".format(
+                name, statistics.median(imports) * 1000, first * 1000, min(firsts) * 1000))
+            if first * 1000 > options.budget:
+                over_budget.append(name)
+
+    if over_budget:
+        print("[budget] over {} ms: {}".format(options.budget, ", ".join(over_budget)))
+        return 1
+    print("[budget] every entry point answered within {} ms".format(options.budget))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
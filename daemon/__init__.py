@@ -10,11 +10,46 @@
 # while attending the course
 #
 
-from .backend import create_backend
-from .proxy import create_proxy
-from .weaprous import WeApRous
-from .response import Response
-from .request import Request
-from .backend import create_backend
-from .httpadapter import HttpAdapter
-from .dictionary import CaseInsensitiveDict
\ No newline at end of file
+"""
+daemon
+~~~~~~~~~~~~~~~~~
+
+The WeApRous daemon package. Its public names are loaded on first access
+(PEP 562 module ``__getattr__``): ``from daemon import create_proxy`` only
+imports the proxy and its dependencies, not the backend engines, the
+adapter or the profiling support, which keeps process startup short.
+
+Usage Example:
+--------------
+>>> from daemon import create_backend, WeApRous
+"""
+
+import importlib
+
+#: Public name -> submodule defining it.
+_LAZY = {
+    "create_backend": "backend",
+    "create_proxy": "proxy",
+    "WeApRous": "weaprous",
+    "Response": "response",
+    "Request": "request",
+    "HttpAdapter": "httpadapter",
+    "CaseInsensitiveDict": "dictionary",
+    "Settings": "settings",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    # Cache it: later lookups no longer reach __getattr__.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,366 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.assetcache
+~~~~~~~~~~~~~~~~~
+
+This module provides a process-wide :class:`AssetCache <AssetCache>` for static
+files served by :class:`Response <Response>`. An entry holds everything that
+does not change between two requests for the same file:
+
+- the resolved file path, its size, mtime and inode,
+- the pre-encoded header lines (``Content-Type``, ``Content-Length``,
+  ``ETag``, ``Last-Modified``, ``Cache-Control``),
+- the body itself when the file is small enough,
+- compressed variants of that body, built once per coding on first use
+  (see :mod:`daemon.compression`).
+
+Entries are validated with one ``os.stat`` per hit and dropped when the mtime,
+inode or size changed. The cache is bounded by a byte budget and evicts the
+least recently used entries first.
+
+Usage Example:
+--------------
+>>> entry = ASSET_CACHE.get("/static/css/chat.css")
+>>> entry is None or entry.header
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from .compression import compress, is_compressible
+
+#: Total bytes (headers and bodies) kept by the default cache.
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+#: Files larger than this are not kept in memory; they are sent with sendfile.
+DEFAULT_MAX_ENTRY_SIZE = 1024 * 1024
+
+
+class AssetVariant:
+    """The :class:`AssetVariant <AssetVariant>` object, a compressed copy of a
+    cached file body.
+
+    :attrs coding (str): content coding, e.g. ``"gzip"``.
+    :attrs etag (str): strong entity tag of the encoded body.
+    :attrs header (bytes): pre-encoded header lines of the variant.
+    :attrs body (bytes): encoded body.
+    """
+
+    __attrs__ = [
+        "coding",
+        "etag",
+        "header",
+        "body",
+    ]
+
+    def __init__(self, entry, coding, body):
+        self.coding = coding
+        self.etag = '"{}-{}"'.format(entry.etag.strip('"'), coding)
+        self.body = body
+        self.header = (
+            "Content-Type: {}\r\n"
+            "Content-Length: {}\r\n"
+            "Content-Encoding: {}\r\n"
+            "Vary: Accept-Encoding\r\n"
+            "ETag: {}\r\n"
+            "Last-Modified: {}\r\n"
+            "Cache-Control: no-cache\r\n"
+        ).format(entry.content_type, len(body), coding, self.etag,
+                 entry.last_modified).encode('utf-8')
+
+    @property
+    def cost(self):
+        """Bytes charged against the cache budget."""
+        return len(self.header) + len(self.body)
+
+
+class AssetEntry:
+    """The :class:`AssetEntry <AssetEntry>` object, a cached static file.
+
+    :attrs path (str): resolved path of the file on disk.
+    :attrs size (int): file size in bytes.
+    :attrs mtime (float): modification time, in seconds.
+    :attrs signature (tuple): ``(st_mtime_ns, st_ino, st_size)`` used to detect changes.
+    :attrs content_type (str): value of the ``Content-Type`` header.
+    :attrs etag (str): strong entity tag, quoted.
+    :attrs last_modified (str): HTTP date of ``mtime``.
+    :attrs header (bytes): pre-encoded header lines, each ending with CRLF.
+    :attrs body (bytes): file content, or ``None`` for files streamed from disk.
+    :attrs compressible (bool): whether compressed variants may be served.
+    :attrs variants (dict): coding to :class:`AssetVariant <AssetVariant>`, or
+                            ``None`` when compression did not pay off.
+    """
+
+    __attrs__ = [
+        "path",
+        "size",
+        "mtime",
+        "signature",
+        "content_type",
+        "etag",
+        "last_modified",
+        "header",
+        "body",
+        "compressible",
+        "variants",
+    ]
+
+    def __init__(self, path, st, content_type, body):
+        self.path = path
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.signature = (st.st_mtime_ns, st.st_ino, st.st_size)
+        self.content_type = content_type
+        self.body = body
+        if body is not None:
+            # Loaded on first use: the proxy and the tracker never cache assets.
+            import hashlib
+            digest = hashlib.sha1(body).hexdigest()
+        else:
+            digest = "{:x}-{:x}-{:x}".format(st.st_ino, st.st_mtime_ns, st.st_size)
+        self.etag = '"{}"'.format(digest)
+        self.last_modified = format_http_date(st.st_mtime)
+        self.compressible = body is not None and is_compressible(content_type)
+        self.variants = {}
+        self.header = (
+            "Content-Type: {}\r\n"
+            "Content-Length: {}\r\n"
+            "{}"
+            "ETag: {}\r\n"
+            "Last-Modified: {}\r\n"
+            "Cache-Control: no-cache\r\n"
+        ).format(content_type, self.size,
+                 "Vary: Accept-Encoding\r\n" if self.compressible else "",
+                 self.etag, self.last_modified).encode('utf-8')
+
+    @property
+    def cost(self):
+        """Bytes charged against the cache budget, variants included."""
+        cost = len(self.header) + (len(self.body) if self.body is not None else 0)
+        for variant in self.variants.values():
+            if variant is not None:
+                cost += variant.cost
+        return cost
+
+    def is_fresh(self, st):
+        """Returns ``True`` if ``st`` (an ``os.stat`` result) matches this entry."""
+        return self.signature == (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def not_modified(self, headers, etag=None):
+        """
+        Evaluates the conditional request headers against this entry.
+        ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+
+        :param headers (dict): lower-cased request headers.
+        :param etag (str): entity tag of the representation being served,
+                           defaults to the identity one.
+
+        :rtype bool: ``True`` if a ``304 Not Modified`` must be answered.
+        """
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            if '*' in tags:
+                return True
+            # Weak comparison, as required for If-None-Match.
+            return (etag or self.etag) in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since:
+            # email.utils is slow to import and only needed here.
+            from email.utils import parsedate_to_datetime
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def format_http_date(timestamp):
+    """
+    Formats a timestamp as an HTTP date (IMF-fixdate), like
+    ``email.utils.formatdate(timestamp, usegmt=True)``.
+
+    :rtype str: e.g. ``"Sun, 18 Oct 2026 08:00:00 GMT"``.
+    """
+    t = time.gmtime(timestamp)
+    return "{}, {:02d} {} {:04d} {:02d}:{:02d}:{:02d} GMT".format(
+        WEEKDAYS[t.tm_wday], t.tm_mday, MONTHS[t.tm_mon - 1], t.tm_year,
+        t.tm_hour, t.tm_min, t.tm_sec)
+
+
+class AssetCache:
+    """The :class:`AssetCache <AssetCache>` object, a thread-safe LRU cache of
+    :class:`AssetEntry <AssetEntry>` objects bounded by a byte budget.
+
+    Entries are keyed by resolved file path; a second index maps request paths
+    to resolved paths so a hit skips MIME detection and path resolution.
+
+    :attrs max_bytes (int): byte budget of all entries.
+    :attrs max_entry_size (int): largest file whose body is kept in memory.
+    """
+
+    __attrs__ = [
+        "max_bytes",
+        "max_entry_size",
+    ]
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_size=DEFAULT_MAX_ENTRY_SIZE):
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self._entries = OrderedDict()
+        self._paths = {}
+        self._aliases = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        #: Number of lookups answered from the cache.
+        self.hits = 0
+        #: Number of lookups that had to (re)load the file.
+        self.misses = 0
+
+    def configure(self, max_bytes=None, max_entry_size=None):
+        """Changes the budgets, evicting entries if the cache is now too big."""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_entry_size is not None:
+                self.max_entry_size = max_entry_size
+            self._evict()
+
+    def get(self, url_path):
+        """
+        Returns the valid entry serving ``url_path``, or ``None``.
+
+        :param url_path (str): the request path, e.g. ``/static/css/chat.css``.
+        """
+        with self._lock:
+            full_path = self._paths.get(url_path)
+            entry = self._entries.get(full_path) if full_path else None
+        if entry is None:
+            return None
+
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            st = None
+        if st is None or not entry.is_fresh(st):
+            self.invalidate(entry.path)
+            return None
+
+        with self._lock:
+            if entry.path in self._entries:
+                self._entries.move_to_end(entry.path)
+            self.hits += 1
+        return entry
+
+    def load(self, url_path, full_path, content_type):
+        """
+        Builds the entry for a file and stores it.
+
+        :param url_path (str): the request path that resolved to ``full_path``.
+        :param full_path (str): path of the file on disk.
+        :param content_type (str): value of the ``Content-Type`` header.
+
+        :rtype AssetEntry: the new entry, or ``None`` if the file is gone.
+        """
+        resolved = os.path.realpath(full_path)
+        try:
+            with open(resolved, 'rb') as f:
+                st = os.fstat(f.fileno())
+                body = f.read() if st.st_size <= self.max_entry_size else None
+        except OSError:
+            return None
+
+        entry = AssetEntry(resolved, st, content_type, body)
+        with self._lock:
+            self.misses += 1
+            if entry.cost <= self.max_bytes:
+                self._remove(resolved)
+                self._entries[resolved] = entry
+                self._bytes += entry.cost
+                self._paths[url_path] = resolved
+                self._aliases.setdefault(resolved, set()).add(url_path)
+                self._evict()
+        return entry
+
+    def variant(self, entry, coding, min_size):
+        """
+        Returns the compressed variant of an entry for a coding, building and
+        caching it on first use.
+
+        :param entry (AssetEntry): the cached file.
+        :param coding (str): negotiated coding, or ``None``.
+        :param min_size (int): smallest body worth compressing.
+
+        :rtype AssetVariant: the variant, or ``None`` to serve the identity body.
+        """
+        if coding is None or not entry.compressible or entry.size < min_size:
+            return None
+        if coding in entry.variants:
+            return entry.variants[coding]
+
+        encoded = compress(entry.body, coding)
+        variant = AssetVariant(entry, coding, encoded) if len(encoded) < entry.size else None
+
+        with self._lock:
+            if coding not in entry.variants:
+                cached = self._entries.get(entry.path) is entry
+                if cached:
+                    self._bytes -= entry.cost
+                entry.variants[coding] = variant
+                if cached:
+                    self._bytes += entry.cost
+                    self._evict()
+        return entry.variants[coding]
+
+    def invalidate(self, full_path):
+        """Drops the entry of a resolved file path, if any."""
+        with self._lock:
+            self._remove(full_path)
+
+    def clear(self):
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+            self._aliases.clear()
+            self._bytes = 0
+
+    @property
+    def size(self):
+        """Bytes currently charged against the budget."""
+        return self._bytes
+
+    def _remove(self, full_path):
+        entry = self._entries.pop(full_path, None)
+        if entry is not None:
+            self._bytes -= entry.cost
+        for url_path in self._aliases.pop(full_path, ()):
+            self._paths.pop(url_path, None)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            full_path = next(iter(self._entries))
+            self._remove(full_path)
+
+
+#: Process-wide cache used by :class:`Response <Response>`.
+ASSET_CACHE = AssetCache()
@@ -0,0 +1,299 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.asyncbackend
+~~~~~~~~~~~~~~~~~
+
+This module provides the ``asyncio`` engine of the backend daemon. Instead of
+handing every accepted socket to a worker thread, a single event loop reads
+requests from non-blocking sockets, so idle and long-polling connections only
+cost a coroutine each.
+
+Requests are prepared and dispatched with the same :class:`HttpAdapter
+<HttpAdapter>`, :class:`Request <Request>` and :class:`Response <Response>`
+objects as the threaded engine:
+
+- ``async def`` route handlers are awaited inline on the event loop when no
+  application middleware is registered; otherwise the middleware chain runs
+  in the executor and awaits them on the loop.
+- Plain route handlers, static files and login handling run in a thread pool
+  executor (``settings.pool_size`` threads) so they never block the loop.
+- Request bodies are read whole (within ``settings.max_body_size``); routes
+  registered with ``stream=True`` receive them as an ``io.BytesIO``.
+
+Usage Example:
+--------------
+>>> create_backend("127.0.0.1", 9000, routes={}, engine="asyncio")
+
+"""
+
+import io
+import time
+import asyncio
+import inspect
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .httpadapter import HttpAdapter
+from .reader import RequestError, body_framing, parse_chunk_size
+from .response import Response
+from .settings import Settings
+from .logger import get_logger
+from .metrics import REQUESTS, CONNECTIONS, TIMEOUTS, STAGE_LATENCY, INVALID
+
+logger = get_logger(__name__)
+
+
+async def read_body(reader, headers, max_body_size):
+    """
+    Reads a whole request body framed by ``Content-Length`` or chunked
+    transfer coding.
+
+    :param reader (asyncio.StreamReader): stream of the client socket.
+    :param headers (dict): lower-cased request headers.
+    :param max_body_size (int): largest accepted body.
+
+    :rtype bytes: the body.
+
+    :raises RequestError: 413 if the body is too large, 400 if malformed.
+    """
+    mode, length = body_framing(headers)
+    if mode == "length":
+        if length > max_body_size:
+            raise RequestError(413, "Payload Too Large")
+        return await reader.readexactly(length) if length else b""
+
+    parts = []
+    total = 0
+    while True:
+        size = parse_chunk_size((await reader.readuntil(b"\r\n"))[:-2])
+        if size == 0:
+            # Skip optional trailers up to the blank line.
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            return b"".join(parts)
+        total += size
+        if total > max_body_size:
+            raise RequestError(413, "Payload Too Large")
+        parts.append(await reader.readexactly(size))
+        if await reader.readexactly(2) != b"\r\n":
+            raise RequestError(400, "Bad Request", "Missing chunk terminator")
+
+
+async def send_body(loop, writer, resp):
+    """
+    Streams the pending file body of a static response with
+    ``loop.sendfile``, which uses ``os.sendfile`` when the transport allows it
+    and falls back to chunked reads otherwise.
+
+    :param loop (asyncio.AbstractEventLoop): the running loop.
+    :param writer (asyncio.StreamWriter): writer of the client socket.
+    :param resp (Response): response whose ``body_file`` is pending.
+    """
+    if resp.body_file is None or resp.body_length == 0:
+        return
+    with open(resp.body_file, 'rb') as f:
+        sent = await loop.sendfile(writer.transport, f, 0, resp.body_length)
+    if sent != resp.body_length:
+        raise ConnectionError("File {} changed while being sent".format(resp.body_file))
+
+
+async def write_response(loop, writer, buffers, resp):
+    """
+    Writes an encoded response (header block first) and the pending file
+    body of a static response, waiting until the transport buffer drains.
+    """
+    writer.writelines(buffers)
+    await writer.drain()
+    await send_body(loop, writer, resp)
+
+
+async def handle_client(reader, writer, ip, port, routes, executor, settings):
+    """
+    Serves one client connection from the event loop. Like the threaded
+    engine, the connection is kept alive between requests until the client
+    closes it, idles past ``settings.keepalive_timeout`` or reaches
+    ``settings.max_keepalive_requests``; pipelined requests are read from
+    the stream buffer in order.
+
+    Each phase is bounded like in the threaded engine: the first byte of a
+    request by ``settings.keepalive_timeout``, the rest of the header block
+    by ``settings.header_timeout``, the body by ``settings.body_timeout`` and
+    the response by ``settings.write_timeout``; expired phases are counted
+    in ``weaprous_timeouts_total``.
+
+    :param reader (asyncio.StreamReader): stream of the client socket.
+    :param writer (asyncio.StreamWriter): writer of the client socket.
+    :param ip (str): IP address of the server.
+    :param port (int): Port number the server is listening on.
+    :param routes (dict): Dictionary of route handlers.
+    :param executor (Executor): executor running the blocking dispatch.
+    :param settings (Settings): backend tunables.
+    """
+    loop = asyncio.get_running_loop()
+    addr = writer.get_extra_info('peername')
+    adapter = HttpAdapter(ip, port, None, addr, routes, settings)
+    adapter.loop = loop
+    served = 0
+    phase = "idle"
+    CONNECTIONS.inc("backend")
+
+    try:
+        while True:
+            phase = "idle"
+            try:
+                first = await asyncio.wait_for(reader.readexactly(1), settings.keepalive_timeout)
+            except asyncio.IncompleteReadError:
+                # Peer closed the connection between two requests.
+                return
+            phase = "header"
+            header_bytes = first + await asyncio.wait_for(
+                reader.readuntil(b'\r\n\r\n'), settings.header_timeout
+            )
+
+            started = time.perf_counter()
+            header_part = header_bytes[:-4]
+            req = adapter.prepare_request(header_part, None, routes)
+            if req.headers.get('expect', '').lower() == '100-continue':
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            phase = "body"
+            body_bytes = await asyncio.wait_for(
+                read_body(reader, req.headers, settings.max_body_size),
+                settings.body_timeout,
+            )
+            if adapter.streams_body(req):
+                # The body is already buffered; expose it as a file object.
+                req.body = io.BytesIO(body_bytes)
+            else:
+                req.body = body_bytes.decode('utf-8', errors='ignore')
+            served += 1
+            keep_alive = (adapter.wants_keep_alive(req)
+                          and served < settings.max_keepalive_requests)
+            adapter.response.keep_alive = keep_alive
+
+            if (req.hook and inspect.iscoroutinefunction(req.hook)
+                    and not settings.middleware and not adapter.is_denied(req)):
+                hook_started = time.perf_counter()
+                try:
+                    result = await req.hook(headers=req.headers, body=req.body, **req.params)
+                except Exception as e:
+                    result = adapter.hook_error(e)
+                response = adapter.build_hook_response(result)
+                spent = time.perf_counter() - hook_started
+                req.timings = {"hook": spent}
+                STAGE_LATENCY.observe(spent, "hook")
+            else:
+                response = await loop.run_in_executor(executor, adapter.dispatch, req)
+
+            buffers, keep_alive = adapter.finalize_response(response, keep_alive)
+            if buffers:
+                phase = "write"
+                await asyncio.wait_for(
+                    write_response(loop, writer, buffers, adapter.response),
+                    settings.write_timeout,
+                )
+            adapter.record_metrics(req, buffers[0] if buffers else None, started)
+            if not keep_alive:
+                return
+
+    except RequestError as e:
+        logger.warning("[Error] Rejected request from %s: %s", addr, e)
+        REQUESTS.inc("", INVALID, str(e.status_code))
+        writer.write(Response().build_error(e.status_code, e.reason))
+    except asyncio.LimitOverrunError:
+        logger.warning("[Error] Rejected request from %s: header block too large", addr)
+        REQUESTS.inc("", INVALID, "431")
+        writer.write(Response().build_error(431, "Request Header Fields Too Large"))
+    except asyncio.TimeoutError:
+        TIMEOUTS.inc("backend", phase)
+        if phase in ("header", "body"):
+            logger.info("[Backend] %s deadline exceeded by %s", phase, addr)
+            writer.write(Response().build_error(408, "Request Timeout"))
+        elif phase == "write":
+            # close() would wait for the unread response to flush: drop it.
+            logger.info("[Backend] write deadline exceeded by %s", addr)
+            writer.transport.abort()
+    except asyncio.IncompleteReadError:
+        logger.debug("[Backend] Truncated request from %s", addr)
+    except ConnectionError:
+        logger.debug("[Error] Connection reset by client.")
+    finally:
+        CONNECTIONS.dec("backend")
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def serve_backend(ip, port, routes, settings, server_socket=None):
+    """
+    Starts the asyncio server and serves connections until cancelled.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings): backend tunables.
+    :param server_socket (socket.socket, optional): an already listening socket.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=settings.pool_size,
+        thread_name_prefix="backend-executor",
+    )
+    client_handler = functools.partial(
+        handle_client, ip=ip, port=port, routes=routes,
+        executor=executor, settings=settings,
+    )
+
+    if server_socket is not None:
+        server = await asyncio.start_server(
+            client_handler, sock=server_socket,
+            limit=settings.max_header_size,
+        )
+    else:
+        server = await asyncio.start_server(
+            client_handler, ip, port,
+            backlog=settings.backlog,
+            reuse_address=True,
+            limit=settings.max_header_size,
+        )
+    logger.info("[Backend] Listening on port %s (asyncio engine)", port)
+    if routes != {}:
+        logger.info("[Backend] route settings %s", routes)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=False)
+
+
+def run_async_backend(ip, port, routes, settings=None, server=None):
+    """
+    Runs the asyncio backend engine in the calling thread.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings, optional): backend tunables.
+    :param server (socket.socket, optional): an already listening socket.
+    """
+    if settings is None:
+        settings = Settings(engine="asyncio")
+
+    try:
+        asyncio.run(serve_backend(ip, port, routes, settings, server))
+    except OSError as e:
+        logger.error("Socket error: %s", e)
+    except KeyboardInterrupt:
+        pass
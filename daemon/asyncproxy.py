@@ -0,0 +1,645 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.asyncproxy
+~~~~~~~~~~~~~~~~~
+
+This module provides the ``asyncio`` engine of the proxy. The threaded
+engine of :func:`run_proxy <daemon.proxy.run_proxy>` spends one thread per
+client connection, blocked first on the client and then on the backend, so
+its concurrency is bounded by the threads the process can hold. Here one
+event loop multiplexes the client and backend sockets: a waiting
+connection only costs a coroutine and its buffers.
+
+The engine applies the same routing as the threaded one: the routing table
+of ``proxy.conf`` (:func:`match_route <daemon.proxy.match_route>`, reloaded
+in place), the balancers of :func:`host_balancer
+<daemon.proxy.host_balancer>` (``dist_policy``, health checks, retry on
+another upstream), the response cache of :mod:`daemon.proxycache`, the
+response framing of :func:`parse_response <daemon.upstream.parse_response>`
+and the same deadlines and metrics. Backend connections are kept alive in
+an :class:`AsyncUpstreamPool <AsyncUpstreamPool>` with the limits of
+:class:`UpstreamPool <UpstreamPool>`.
+
+One loop runs on one core; ``workers=N`` pre-forks N proxy processes
+sharing the port (see :mod:`daemon.prefork`).
+
+Usage Example:
+--------------
+>>> create_proxy("0.0.0.0", 8080, routes, engine="asyncio", workers=4)
+
+"""
+
+import time
+import asyncio
+import functools
+from collections import deque
+
+from . import proxy
+from .proxy import IDEMPOTENT_METHODS, match_route, host_balancer, refresh_cache
+from .proxycache import PROXY_RESPONSE_CACHE
+from .reader import RECV_SIZE, RequestError, body_framing, parse_chunk_size
+from .request import parse_head
+from .response import Response
+from .settings import Settings
+from .upstream import (DEFAULT_MAX_IDLE, DEFAULT_MAX_PER_HOST, DEFAULT_IDLE_TIMEOUT,
+                       MAX_RESPONSE_HEAD, UpstreamError, parse_response, request_head,
+                       expects_continue, is_interim, CONTINUE)
+from .logger import get_logger
+from .metrics import (PROXY_REQUESTS, PROXY_LATENCY, CONNECTIONS, TIMEOUTS, UNROUTED,
+                      CACHED, UPSTREAM_CONNECTIONS, response_status, build_metrics_response)
+
+logger = get_logger(__name__)
+
+
+class ClientTimeout(Exception):
+    """Raised when the client misses a deadline.
+
+    :attrs phase (str): ``"idle"``, ``"header"``, ``"body"`` or ``"write"``.
+    """
+
+    def __init__(self, phase):
+        super().__init__("client {} deadline exceeded".format(phase))
+        self.phase = phase
+
+
+class UpstreamTimeout(Exception):
+    """Raised when a backend misses its connect or upstream deadline."""
+
+
+if hasattr(asyncio, "timeout"):
+    async def within(awaitable, timeout):
+        """Awaits ``awaitable`` for at most ``timeout`` seconds."""
+        # Python 3.11+: unlike wait_for, no task is created per wait.
+        async with asyncio.timeout(timeout):
+            return await awaitable
+else:
+    within = asyncio.wait_for
+
+
+async def client_io(awaitable, timeout, phase):
+    """Awaits a client read or write within ``timeout`` seconds."""
+    try:
+        return await within(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise ClientTimeout(phase)
+
+
+async def upstream_io(awaitable, timeout):
+    """Awaits a backend read, write or connect within ``timeout`` seconds."""
+    try:
+        return await within(awaitable, max(timeout, 0))
+    except asyncio.TimeoutError:
+        raise UpstreamTimeout("upstream deadline exceeded")
+
+
+class StreamBody:
+    """The :class:`StreamBody <StreamBody>` object, the
+    :class:`BodyStream <BodyStream>` of an ``asyncio.StreamReader``: one
+    message body read piece by piece.
+
+    :attrs mode (str): ``"length"``, ``"chunked"`` or ``"close"``.
+    :attrs length (int): declared size for ``"length"`` bodies.
+    :attrs received (int): bytes delivered so far.
+    :attrs max_size (int): largest accepted body, ``None`` for no limit.
+    """
+
+    __attrs__ = [
+        "mode",
+        "length",
+        "received",
+        "max_size",
+    ]
+
+    def __init__(self, reader, mode, length, max_size=None):
+        self._reader = reader
+        self.mode = mode
+        self.length = length
+        self.received = 0
+        self.max_size = max_size
+        self._chunk_left = 0
+        self._done = mode == "length" and not length
+
+    @property
+    def done(self):
+        """``True`` once the whole body has been read."""
+        return self._done
+
+    def _account(self, data):
+        self.received += len(data)
+        if self.max_size is not None and self.received > self.max_size:
+            raise RequestError(413, "Payload Too Large")
+        return data
+
+    async def read_chunk(self, size=RECV_SIZE):
+        """
+        Reads the next piece of the body, at most ``size`` bytes.
+
+        :rtype bytes: the piece, or ``b""`` at the end of the body.
+
+        :raises ConnectionError: if the peer closed before the end of the body.
+        """
+        if self._done:
+            return b""
+        reader = self._reader
+
+        if self.mode == "close":
+            data = await reader.read(size)
+            if not data:
+                self._done = True
+            return self._account(data)
+
+        if self.mode == "length":
+            data = await reader.read(min(size, self.length - self.received))
+            if not data:
+                raise ConnectionError("Connection closed in the middle of a body")
+            self._account(data)
+            if self.received >= self.length:
+                self._done = True
+            return data
+
+        if self._chunk_left == 0:
+            self._chunk_left = parse_chunk_size((await reader.readuntil(b"\r\n"))[:-2])
+            if self._chunk_left == 0:
+                # Last chunk: skip optional trailers up to the blank line.
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                self._done = True
+                return b""
+
+        data = await reader.read(min(size, self._chunk_left))
+        if not data:
+            raise ConnectionError("Connection closed in the middle of a chunk")
+        self._account(data)
+        self._chunk_left -= len(data)
+        if self._chunk_left == 0 and await reader.readexactly(2) != b"\r\n":
+            raise RequestError(400, "Bad Request", "Missing chunk terminator")
+        return data
+
+
+async def relay_stream(body, writer, chunked, read_wait, write_wait, capture=None):
+    """
+    Copies a message body to a stream piece by piece, as it is received,
+    waiting for the writer to drain before reading the next piece (at most
+    one piece is held in memory per direction).
+
+    :param body (StreamBody): the body to copy.
+    :param writer (asyncio.StreamWriter): the destination.
+    :param chunked (bool): whether to re-encode the pieces with chunked coding.
+    :param read_wait (callable): bounds a read of ``body``, e.g.
+                                 ``lambda aw: upstream_io(aw, timeout)``.
+    :param write_wait (callable): bounds the drain of ``writer``.
+    :param capture (callable): called with each piece, e.g. to fill a cache
+                               entry.
+    """
+    while True:
+        data = await read_wait(body.read_chunk())
+        if capture is not None and data:
+            capture(data)
+        if chunked:
+            if data:
+                writer.writelines([b"%x\r\n" % len(data), data, b"\r\n"])
+            else:
+                writer.write(b"0\r\n\r\n")
+        elif data:
+            writer.write(data)
+        if data or chunked:
+            await write_wait(writer.drain())
+        if not data:
+            return
+
+
+class AsyncUpstreamPool:
+    """The :class:`AsyncUpstreamPool <AsyncUpstreamPool>` object, the
+    keep-alive backend connections of one event loop, with the rules of
+    :class:`UpstreamPool <UpstreamPool>`. Connections are
+    ``(reader, writer)`` stream pairs.
+
+    :attrs max_idle (int): idle connections kept per upstream.
+    :attrs max_per_host (int): open connections allowed per upstream.
+    :attrs idle_timeout (float): seconds an idle connection stays reusable.
+    :attrs connect_timeout (float): seconds allowed to open a connection.
+    """
+
+    __attrs__ = [
+        "max_idle",
+        "max_per_host",
+        "idle_timeout",
+        "connect_timeout",
+    ]
+
+    def __init__(self, max_idle=DEFAULT_MAX_IDLE, max_per_host=DEFAULT_MAX_PER_HOST,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, connect_timeout=None):
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1")
+        self.max_idle = max_idle
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        #: (host, port) -> deque of ((reader, writer), released_at), oldest first
+        self._idle = {}
+        #: (host, port) -> open connections, busy or idle
+        self._open = {}
+        #: (host, port) -> futures of the requests waiting for a free slot
+        self._waiters = {}
+
+    async def acquire(self, host, port):
+        """
+        Returns a connection to ``host:port``: the most recently released
+        idle one still open, or a new one. The caller bounds the wait.
+
+        :rtype tuple: ``((reader, writer), reused)``.
+
+        :raises UpstreamTimeout: if the connect timeout passed.
+        :raises OSError: if the connection failed.
+        """
+        key = (host, port)
+        upstream = "{}:{}".format(host, port)
+        while True:
+            idle = self._idle.get(key)
+            if idle:
+                self._prune(key, idle, time.monotonic())
+            while idle:
+                conn = idle.pop()[0]
+                if not (conn[0].at_eof() or conn[1].is_closing()):
+                    UPSTREAM_CONNECTIONS.inc(upstream, "reused")
+                    return conn, True
+                self._discard(key, conn)
+            if self._open.get(key, 0) < self.max_per_host:
+                self._open[key] = self._open.get(key, 0) + 1
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            waiters = self._waiters.setdefault(key, deque())
+            waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken up but given up: pass the slot on.
+                    self._notify(key)
+                elif waiter in waiters:
+                    waiters.remove(waiter)
+                raise
+
+        try:
+            connect = asyncio.open_connection(host, port, limit=MAX_RESPONSE_HEAD)
+            if self.connect_timeout:
+                conn = await upstream_io(connect, self.connect_timeout)
+            else:
+                conn = await connect
+        except BaseException:
+            self._open[key] -= 1
+            self._notify(key)
+            raise
+        UPSTREAM_CONNECTIONS.inc(upstream, "opened")
+        return conn, False
+
+    def release(self, host, port, conn, reusable):
+        """
+        Returns a connection obtained from :meth:`acquire`: it is kept idle
+        when ``reusable`` and the pool has room, closed otherwise.
+        """
+        key = (host, port)
+        idle = self._idle.setdefault(key, deque())
+        now = time.monotonic()
+        self._prune(key, idle, now)
+        if reusable and len(idle) < self.max_idle:
+            idle.append((conn, now))
+        else:
+            self._discard(key, conn)
+        self._notify(key)
+
+    def close(self):
+        """Closes every idle connection."""
+        for key, idle in self._idle.items():
+            while idle:
+                self._discard(key, idle.popleft()[0])
+
+    def _notify(self, key):
+        waiters = self._waiters.get(key)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _prune(self, key, idle, now):
+        # Oldest first: stop at the first connection still fresh.
+        while idle and now - idle[0][1] > self.idle_timeout:
+            self._discard(key, idle.popleft()[0])
+
+    def _discard(self, key, conn):
+        self._open[key] -= 1
+        conn[1].close()
+
+
+async def forward_request(host, port, request, writer, settings, pool, exchange=None,
+                          client_ip=None):
+    """
+    Forwards an HTTP request to a backend server and relays the response to
+    the client, like :func:`forward_request <daemon.proxy.forward_request>`
+    of the threaded engine: bodies are streamed in both directions, the
+    backend connection goes back to ``pool`` once the response was read,
+    and an idempotent request without body is retried once on a new
+    connection when a reused one turns out to be closed. ``Expect:
+    100-continue`` is answered by the proxy and interim 1xx responses of the
+    backend are skipped.
+
+    :params request (tuple): the request read by :func:`handle_client`, its
+                             body a :class:`StreamBody <StreamBody>`.
+    :params writer (asyncio.StreamWriter): writer of the client connection.
+    :params settings (Settings): deadlines of the client and the backend.
+    :params pool (AsyncUpstreamPool): backend connections of the loop.
+    :params exchange (CacheExchange, optional): cache side of the request.
+    :params client_ip (str, optional): client address, sent in ``X-Forwarded-For``.
+
+    :rtype bytes: the header block sent to the client.
+
+    :raises UpstreamError: 502 or 504, as in the threaded engine.
+    :raises RequestError: if the request body is malformed or too large.
+    :raises ClientTimeout: if the client misses the body or write deadline.
+    """
+    method, target, version, headers, head, body = request
+    loop = asyncio.get_running_loop()
+    payload = request_head(head, client_ip)
+    if exchange is not None:
+        payload = exchange.prepare(payload)
+    # Only a request without body can be sent twice.
+    retry = method in IDEMPOTENT_METHODS and body.done
+    upstream_timeout = settings.upstream_timeout
+    upstream_wait = functools.partial(upstream_io, timeout=upstream_timeout)
+    write_wait = functools.partial(client_io, timeout=settings.write_timeout, phase="write")
+    stage = "connect"
+    sent = None
+
+    try:
+        while True:
+            stage = "connect"
+            upstream_end = loop.time() + upstream_timeout
+            conn, reused = await upstream_io(pool.acquire(host, port), upstream_timeout)
+            backend_reader, backend_writer = conn
+            stage = "request"
+            reusable = False
+            try:
+                response = None
+                try:
+                    backend_writer.write(payload)
+                    await upstream_io(backend_writer.drain(), upstream_end - loop.time())
+                    if not body.done:
+                        if expects_continue(version, headers):
+                            writer.write(CONTINUE)
+                            await write_wait(writer.drain())
+                        body_end = loop.time() + settings.body_timeout
+                        await relay_stream(
+                            body, backend_writer, body.mode == "chunked",
+                            lambda aw: client_io(aw, body_end - loop.time(), "body"),
+                            upstream_wait)
+                        upstream_end = loop.time() + upstream_timeout
+                    stage = "response"
+                    while response is None or is_interim(response.status_code):
+                        try:
+                            head_block = await upstream_io(
+                                backend_reader.readuntil(b"\r\n\r\n"),
+                                upstream_end - loop.time())
+                        except asyncio.IncompleteReadError as e:
+                            if e.partial:
+                                raise ValueError("Truncated upstream header block")
+                            response = None
+                            break
+                        response = parse_response(head_block[:-4], method,
+                                                  version == "HTTP/1.1")
+                except ConnectionError:
+                    if not (reused and retry):
+                        raise
+                if response is None:
+                    if not (reused and retry):
+                        raise ConnectionError("Upstream closed the connection without answering")
+                    # Stale pooled connection: once more on a new one.
+                    logger.debug("[Proxy] Retrying on a new connection to %s:%s", host, port)
+                    retry = False
+                    continue
+
+                cached = exchange.on_response(response) if exchange is not None else None
+                stage = "relay"
+                if cached is not None:
+                    # 304 Not Modified: the stale entry was revalidated.
+                    writer.write(cached)
+                    await write_wait(writer.drain())
+                    reusable = response.reusable
+                    return cached
+                sent = response.head
+                if exchange is not None:
+                    sent = sent[:-2] + b"X-Cache: MISS\r\n\r\n"
+                writer.write(sent)
+                await write_wait(writer.drain())
+                if response.framing is not None:
+                    await relay_stream(StreamBody(backend_reader, *response.framing), writer,
+                                       response.chunked, upstream_wait, write_wait,
+                                       exchange.feed if exchange is not None else None)
+                reusable = response.reusable
+                return sent
+            finally:
+                pool.release(host, port, conn, reusable)
+    except UpstreamTimeout as e:
+        TIMEOUTS.inc("proxy", "upstream")
+        logger.warning("[Proxy] Upstream %s:%s missed its deadline", host, port)
+        raise UpstreamError(504, "Gateway Timeout", str(e), sent)
+    except (RequestError, ValueError, asyncio.LimitOverrunError) as e:
+        if stage == "request":
+            raise
+        logger.warning("[Proxy] Invalid response from %s:%s: %s", host, port, e)
+        raise UpstreamError(502, "Bad Gateway", str(e), sent)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        # While a body is relayed, the client connection may have failed too.
+        logger.warning("[Proxy] Upstream %s:%s failed: %s", host, port, e)
+        raise UpstreamError(502, "Bad Gateway", str(e), sent,
+                            fault=True if stage in ("connect", "response") else None)
+
+
+async def send_error(writer, settings, status_code, reason):
+    """Writes an error response to the client and returns it."""
+    response = Response().build_error(status_code, reason)
+    writer.write(response)
+    await client_io(writer.drain(), settings.write_timeout, "write")
+    return response
+
+
+async def handle_client(reader, writer, routes, settings, pool):
+    """
+    Serves one client connection from the event loop, like
+    :func:`handle_client <daemon.proxy.handle_client>` of the threaded
+    engine: one request is read, answered from the response cache or
+    forwarded to an upstream chosen by the balancer of its virtual host,
+    and the connection is closed.
+
+    :param reader (asyncio.StreamReader): stream of the client socket.
+    :param writer (asyncio.StreamWriter): writer of the client socket.
+    :param routes (LiveRoutes): routing table of the proxy.
+    :param settings (Settings): deadlines, size limits and ``metrics_path``.
+    :param pool (AsyncUpstreamPool): backend connections of the loop.
+    """
+    loop = asyncio.get_running_loop()
+    addr = writer.get_extra_info('peername')
+    CONNECTIONS.inc("proxy")
+    try:
+        try:
+            first = await client_io(reader.readexactly(1), settings.keepalive_timeout, "idle")
+        except asyncio.IncompleteReadError:
+            return
+        head = first + await client_io(reader.readuntil(b"\r\n\r\n"),
+                                       settings.header_timeout, "header")
+        started = time.perf_counter()
+        head = head[:-4]
+        method, target, version, headers = parse_head(head)
+        body = StreamBody(reader, *body_framing(headers), settings.max_body_size)
+        request = (method, target, version, headers, head, body)
+
+        if settings.metrics_path and method == 'GET' and target == settings.metrics_path:
+            writer.write(build_metrics_response())
+            await client_io(writer.drain(), settings.write_timeout, "write")
+            return
+
+        hostname = headers.get('host', '')
+        logger.debug("[Proxy] %s at Host: %s", addr, hostname)
+        name, entry = match_route(hostname, routes)
+        vhost = name if name is not None else "<default>"
+
+        balancer = host_balancer(name, entry)
+        attempts = 2 if method in IDEMPOTENT_METHODS and body.done else 1
+        failed = ()
+        error = (502, "Bad Gateway")
+        upstream = UNROUTED
+
+        policy = PROXY_RESPONSE_CACHE.policy(vhost, entry[2] if len(entry) > 2 else None)
+        response, exchange = PROXY_RESPONSE_CACHE.lookup(policy, vhost, method, target, headers)
+        if response is not None:
+            upstream = CACHED
+            writer.write(response)
+            await client_io(writer.drain(), settings.write_timeout, "write")
+            if exchange is not None:
+                # Served stale: refresh the entry in the executor, off the loop.
+                loop.run_in_executor(None, refresh_cache, balancer, exchange, head, addr[0],
+                                     settings, proxy.UPSTREAM_POOL)
+
+        while response is None:
+            chosen, trial = balancer.acquire(addr[0], headers, target, failed)
+            if chosen is None:
+                if not failed:
+                    logger.warning("[Proxy] No healthy upstream for host %s", hostname)
+                response = await send_error(writer, settings, *error)
+                break
+            upstream = chosen.address
+            ok = None
+            try:
+                logger.debug("[Proxy] Host name %s is forwarded to %s", hostname, upstream)
+                response = await forward_request(chosen.host, chosen.port, request, writer,
+                                                 settings, pool, exchange, addr[0])
+                ok = True
+                if exchange is not None:
+                    exchange.finish()
+            except UpstreamError as e:
+                ok = False if e.fault else None
+                error = (e.status_code, e.reason)
+                attempts -= 1
+                if e.sent is not None:
+                    response = e.sent
+                elif attempts == 0:
+                    response = await send_error(writer, settings, *error)
+                failed += (chosen,)
+            finally:
+                balancer.release(chosen, ok, trial)
+        PROXY_REQUESTS.inc(vhost, upstream, response_status(response))
+        PROXY_LATENCY.observe(time.perf_counter() - started, vhost, upstream)
+
+    except RequestError as e:
+        logger.warning("[Proxy] Rejected request from %s: %s", addr, e)
+        writer.write(Response().build_error(e.status_code, e.reason))
+    except asyncio.LimitOverrunError:
+        logger.warning("[Proxy] Rejected request from %s: header block too large", addr)
+        writer.write(Response().build_error(431, "Request Header Fields Too Large"))
+    except ClientTimeout as e:
+        TIMEOUTS.inc("proxy", e.phase)
+        if e.phase in ("header", "body"):
+            logger.info("[Proxy] %s deadline exceeded by %s", e.phase, addr)
+            writer.write(Response().build_error(408, "Request Timeout"))
+        elif e.phase == "write":
+            # close() would wait for the unread response to flush: drop it.
+            writer.transport.abort()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        logger.debug("[Proxy] Connection from %s closed early", addr)
+    except Exception as e:
+        logger.error("[Proxy Handle Error] %s", e)
+    finally:
+        CONNECTIONS.dec("proxy")
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def serve_proxy(ip, port, routes, settings, server_socket=None):
+    """
+    Starts the asyncio proxy server and serves connections until cancelled.
+
+    :param ip (str): IP address to bind the proxy server.
+    :param port (int): port number to listen on.
+    :param routes (dict): dictionary mapping hostnames and location.
+    :param settings (Settings): deadlines, limits and upstream pool limits.
+    :param server_socket (socket.socket, optional): an already listening socket.
+    """
+    pool = AsyncUpstreamPool(settings.upstream_max_idle, settings.upstream_max_per_host,
+                             settings.upstream_idle_timeout, settings.upstream_connect_timeout)
+    client_handler = functools.partial(handle_client, routes=routes, settings=settings,
+                                       pool=pool)
+
+    if server_socket is not None:
+        server = await asyncio.start_server(
+            client_handler, sock=server_socket,
+            limit=settings.max_header_size,
+        )
+    else:
+        server = await asyncio.start_server(
+            client_handler, ip, port,
+            backlog=settings.backlog,
+            reuse_address=True,
+            limit=settings.max_header_size,
+        )
+    logger.info("[Proxy] Listening on IP %s port %s (asyncio engine)", ip, port)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+
+
+def run_async_proxy(ip, port, routes, settings=None, server=None):
+    """
+    Runs the asyncio proxy engine in the calling thread.
+
+    :param ip (str): IP address to bind the proxy server.
+    :param port (int): port number to listen on.
+    :param routes (dict): dictionary mapping hostnames and location.
+    :param settings (Settings, optional): proxy tunables.
+    :param server (socket.socket, optional): an already listening socket.
+    """
+    if settings is None:
+        settings = Settings(engine="asyncio")
+
+    try:
+        asyncio.run(serve_proxy(ip, port, routes, settings, server))
+    except OSError as e:
+        logger.error("Socket error: %s", e)
+    except KeyboardInterrupt:
+        pass
@@ -23,6 +23,10 @@ Requirements:
 --------------
 - socket: provide socket networking interface.
 - threading: Enables concurrent client handling via threads.
+- workerpool: fixed-size pool of worker threads behind the accept loop.
+- settings: backend tunables (pool size, queue depth, retry delay).
+- logger: leveled, queue-backed logging.
+- metrics: request counters, latency histograms and pool gauges.
 - response: response utilities.
 - httpadapter: the class for handling HTTP requests.
 - CaseInsensitiveDict: provides dictionary for managing headers or routes.
@@ -30,25 +34,39 @@ Requirements:
 
 Notes:
 ------
-- The server create daemon threads for client handling.
-- The current implementation error handling is minimal, socket errors are printed to the console.
+- The server serves clients from a fixed-size pool of daemon worker threads; when the
+  pending queue is full new connections get ``503 Service Unavailable`` + ``Retry-After``.
+- The current implementation error handling is minimal, socket errors are logged.
 - The actual request processing is delegated to the HttpAdapter class.
+- Connections are persistent (HTTP/1.1 keep-alive): a worker stays with its client until
+  the client closes, idles past ``keepalive_timeout`` or reaches ``max_keepalive_requests``.
+- With ``metrics_path="/metrics"`` the request, latency, connection and pool metrics are
+  served in the Prometheus text format on that path.
 
 Usage Example:
 --------------
 >>> create_backend("127.0.0.1", 9000, routes={})
+>>> create_backend("127.0.0.1", 9000, routes={}, pool_size=16, queue_size=64)
+>>> create_backend("127.0.0.1", 9000, routes={}, engine="asyncio")
+>>> create_backend("127.0.0.1", 9000, routes={}, workers=4)
 
 """
 
 import socket
 import threading
-import argparse
 
 from .response import *
 from .httpadapter import HttpAdapter
 from .dictionary import CaseInsensitiveDict
+from .settings import Settings
+from .workerpool import WorkerPool
+from .assetcache import ASSET_CACHE
+from .logger import get_logger, configure_logging
+from .metrics import CONNECTIONS, REJECTED, POOL
 
-def handle_client(ip, port, conn, addr, routes):
+logger = get_logger(__name__)
+
+def handle_client(ip, port, conn, addr, routes, settings=None):
     """
     Initializes an HttpAdapter instance and delegates the client handling logic to it.
 
@@ -57,59 +75,143 @@ def handle_client(ip, port, conn, addr, routes):
     :param conn (socket.socket): Client connection socket.
     :param addr (tuple): client address (IP, port).
     :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings, optional): backend tunables (keep-alive limits).
     """
-    daemon = HttpAdapter(ip, port, conn, addr, routes)
+    daemon = HttpAdapter(ip, port, conn, addr, routes, settings)
 
     # Handle client
-    daemon.handle_client(conn, addr, routes)
+    CONNECTIONS.inc("backend")
+    try:
+        daemon.handle_client(conn, addr, routes)
+    finally:
+        CONNECTIONS.dec("backend")
+
+def reject_client(conn, addr, settings):
+    """
+    Sheds a connection that could not be queued: answers ``503 Service
+    Unavailable`` with a ``Retry-After`` header and closes the socket without
+    reading the request, so the accept loop is never blocked by a busy pool.
+
+    :param conn (socket.socket): Client connection socket.
+    :param addr (tuple): client address (IP, port).
+    :param settings (Settings): backend settings providing ``retry_after``.
+    """
+    try:
+        conn.settimeout(0)
+        conn.send(Response().build_unavailable(settings.retry_after))
+    except OSError:
+        pass
+    finally:
+        conn.close()
+    REJECTED.inc()
+    logger.warning("[Backend] Worker queue full, rejected %s", addr)
+
+def create_listener(ip, port, backlog, reuse_port=False):
+    """
+    Creates the listening socket of the backend.
 
-def run_backend(ip, port, routes):
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param backlog (int): accept backlog.
+    :param reuse_port (bool): set ``SO_REUSEPORT`` so several processes can
+                              bind the same port and share its connections.
+
+    :rtype socket.socket: the bound, listening socket.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.bind((ip, port))
+        server.listen(backlog)
+    except OSError:
+        server.close()
+        raise
+    return server
+
+def run_backend(ip, port, routes, settings=None, server=None):
     """
     Starts the backend server, binds to the specified IP and port, and listens for incoming
-    connections. Each connection is handled in a separate thread. The backend accepts incoming
-    connections and spawns a thread for each client.
+    connections. Accepted connections are queued to a fixed-size :class:`WorkerPool
+    <WorkerPool>` and served by its worker threads. When the queue is full the connection
+    is rejected with ``503 Service Unavailable`` instead of spawning another thread.
 
 
     :param ip (str): IP address to bind the server.
     :param port (int): Port number to listen on.
     :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings, optional): backend tunables (pool and queue size).
+    :param server (socket.socket, optional): an already listening socket, e.g.
+                                             inherited from a pre-fork supervisor.
     """
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if settings is None:
+        settings = Settings()
+
+    pool = WorkerPool(
+        lambda conn, addr: handle_client(ip, port, conn, addr, routes, settings),
+        size=settings.pool_size,
+        queue_size=settings.queue_size,
+        name="backend-worker",
+    )
+    POOL.set_function(lambda: pool.size, "size")
+    POOL.set_function(lambda: pool.busy, "busy")
+    POOL.set_function(lambda: pool.pending, "pending")
+    POOL.set_function(lambda: pool.queue_size, "capacity")
 
     try:
-        server.bind((ip, port))
-        server.listen(50)
-        print(("[Backend] Listening on port {}".format(port)))
+        if server is None:
+            server = create_listener(ip, port, settings.backlog)
+        logger.info("[Backend] Listening on port %s", port)
         if routes != {}:
-            print(("[Backend] route settings {}".format(routes)))
+            logger.info("[Backend] route settings %s", routes)
+        logger.info("[Backend] %s workers, queue depth %s", settings.pool_size, settings.queue_size)
 
+        pool.start()
         while True:
             conn, addr = server.accept()
-            #
-            #  TODO: implement the step of the client incomping connection
-            #        using multi-thread programming with the
-            #        provided handle_client routine
-            #
-            # tạm
-            # --- BẮT ĐẦU PHẦN SỬA ---
-            # Tạo một luồng mới để xử lý client này
-            client_thread = threading.Thread(
-                target=handle_client, 
-                args=(ip, port, conn, addr, routes)
-            )
-            # Khởi chạy luồng và tiếp tục vòng lặp để chấp nhận client khác
-            client_thread.start()
-            # --- KẾT THÚC PHẦN SỬA ---
+            if not pool.submit(conn, addr):
+                reject_client(conn, addr, settings)
     except socket.error as e:
-      print(("Socket error: {}".format(e)))
+      logger.error("Socket error: %s", e)
 
-def create_backend(ip, port, routes={}):
+def run_engine(ip, port, routes, settings, server=None):
+    """
+    Runs the serving engine selected by ``settings.engine`` in the calling
+    process.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings): backend tunables.
+    :param server (socket.socket, optional): an already listening socket.
+    """
+    if settings.engine == "asyncio":
+        # Imported lazily: the threaded engine does not need asyncio.
+        from .asyncbackend import run_async_backend
+        run_async_backend(ip, port, routes, settings, server)
+    else:
+        run_backend(ip, port, routes, settings, server)
+
+def create_backend(ip, port, routes={}, **options):
     """
     Entry point for creating and running the backend server.
 
     :param ip (str): IP address to bind the server.
     :param port (int): Port number to listen on.
     :param routes (dict, optional): Dictionary of route handlers. Defaults to empty dict.
+    :param options: backend tunables forwarded to :class:`Settings <Settings>`,
+                    e.g. ``pool_size=32, queue_size=128, retry_after=1``.
+                    ``engine="asyncio"`` serves every connection from one
+                    event loop instead of the worker pool. ``workers=N``
+                    pre-forks N processes sharing the port.
     """
-
-    run_backend(ip, port, routes)
\ No newline at end of file
+    settings = Settings(**options)
+    configure_logging(settings.log_level, settings.log_debug_sample)
+    ASSET_CACHE.configure(settings.asset_cache_bytes, settings.asset_cache_entry_size)
+
+    if settings.workers > 1:
+        from .prefork import run_prefork
+        run_prefork(ip, port, routes, settings)
+    else:
+        run_engine(ip, port, routes, settings)
@@ -0,0 +1,420 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.balancer
+~~~~~~~~~~~~~~~~~
+
+This module provides the load balancing of the proxy: a virtual host with
+several ``proxy_pass`` lines spreads its requests over them according to
+its ``dist_policy``:
+
+- ``round-robin`` (default): each upstream in turn, weights ignored.
+- ``weighted-round-robin``: smooth weighted round-robin (as in nginx), an
+  upstream with ``weight=3`` gets three requests out of ``3 + others``,
+  interleaved rather than in bursts.
+- ``least-conn``: the upstream with the fewest requests in flight relative
+  to its weight; ties are broken in turn.
+- ``consistent-hash [key]``: a hash ring with virtual nodes, so that a key
+  always reaches the same upstream and adding or removing one moves only
+  its share of keys. The key is ``$remote_addr`` (client IP, the default),
+  ``$host``, ``$uri`` or ``$http_<name>`` (a request header, e.g.
+  ``$http_x_user_id``).
+
+Every upstream counts the requests in flight through it, exported as
+``weaprous_upstream_in_flight``. Upstreams ejected by health checking (see
+:mod:`daemon.health`) are skipped: the policy picks among the others, and
+a consistent hash moves the keys of an ejected upstream to the next one on
+the ring. All balancers are thread-safe.
+
+Configuration Example (``config/proxy.conf``):
+----------------------------------------------
+host "app2.local" {
+    proxy_pass http://127.0.0.1:9002 weight=3;
+    proxy_pass http://127.0.0.1:9003;
+    dist_policy consistent-hash $http_x_user_id;
+}
+
+Usage Example:
+--------------
+>>> balancer = build_balancer(["127.0.0.1:9002 weight=3", "127.0.0.1:9003"], "least-conn")
+>>> upstream, trial = balancer.acquire(client_ip, headers, target)
+>>> try:
+>>>     ok = forward(upstream.host, upstream.port)
+>>> finally:
+>>>     balancer.release(upstream, ok, trial)
+"""
+
+import time
+import bisect
+import threading
+
+from .logger import get_logger
+from .metrics import UPSTREAM_IN_FLIGHT
+from .health import HEALTH
+
+logger = get_logger(__name__)
+
+#: Policy of a virtual host without ``dist_policy``.
+DEFAULT_POLICY = "round-robin"
+#: Points of an upstream of weight 1 on the consistent hash ring.
+VIRTUAL_NODES = 160
+#: Hash key of ``consistent-hash`` when none is given.
+DEFAULT_HASH_KEY = "$remote_addr"
+
+
+class Upstream:
+    """The :class:`Upstream <Upstream>` object, one ``proxy_pass`` target of
+    a virtual host.
+
+    :attrs address (str): ``host:port``, the label of its metrics.
+    :attrs host (str): IP address or name of the backend.
+    :attrs port (int): port of the backend.
+    :attrs weight (int): relative share of the requests, at least 1.
+    :attrs in_flight (int): requests currently forwarded to it.
+    :attrs health (UpstreamHealth): circuit breaker shared by every virtual
+                                    host listing the same ``host:port``.
+    """
+
+    __attrs__ = [
+        "address",
+        "host",
+        "port",
+        "weight",
+        "in_flight",
+        "health",
+    ]
+
+    def __init__(self, host, port, weight=1):
+        self.host = host
+        self.port = port
+        self.address = "{}:{}".format(host, port)
+        self.weight = weight
+        self.in_flight = 0
+        self.health = HEALTH.get(self.address)
+        #: Running weight of the smooth weighted round-robin.
+        self.current = 0
+
+    def __repr__(self):
+        return "<Upstream {} weight={}>".format(self.address, self.weight)
+
+
+def parse_upstream(spec):
+    """
+    Parses one ``proxy_pass`` target.
+
+    :param spec (str): ``host:port`` optionally followed by parameters,
+                       e.g. ``"127.0.0.1:9002 weight=3"``.
+
+    :rtype Upstream: the upstream.
+
+    :raises ValueError: on a missing port or an invalid weight.
+    """
+    parts = spec.split()
+    host, _, port = parts[0].rpartition(":")
+    if not host:
+        raise ValueError("proxy_pass {!r} has no port".format(spec))
+    weight = 1
+    for param in parts[1:]:
+        name, _, value = param.partition("=")
+        if name == "weight":
+            weight = int(value)
+            if weight < 1:
+                raise ValueError("weight must be at least 1 in {!r}".format(spec))
+        else:
+            logger.warning("[Balancer] Ignoring parameter %r of %s", param, parts[0])
+    return Upstream(host, int(port), weight)
+
+
+class Balancer:
+    """The :class:`Balancer <Balancer>` object, the base of the policies.
+
+    Subclasses implement :meth:`choose`, called with the lock held; it
+    must only return an upstream for which ``usable(upstream)`` is true.
+
+    :attrs upstreams (list): the :class:`Upstream <Upstream>` targets.
+    """
+
+    __attrs__ = [
+        "upstreams",
+    ]
+
+    #: Name of the policy in ``dist_policy``.
+    name = None
+    #: Words accepted after the name in ``dist_policy``.
+    arguments = 0
+
+    def __init__(self, upstreams):
+        if not upstreams:
+            raise ValueError("a balancer needs at least one upstream")
+        self.upstreams = list(upstreams)
+        self._lock = threading.Lock()
+
+    def choose(self, client_ip, headers, target, usable):
+        """
+        Returns the :class:`Upstream <Upstream>` of the next request, or
+        ``None`` if no upstream is usable.
+        """
+        raise NotImplementedError
+
+    def pick(self, client_ip=None, headers=None, target=None):
+        """
+        Picks the upstream of a request without counting it in flight.
+
+        :rtype Upstream: the chosen upstream, ``None`` if all are ejected.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return self.choose(client_ip, headers or {}, target or "",
+                               lambda upstream: upstream.health.available(now))
+
+    def acquire(self, client_ip=None, headers=None, target=None, exclude=()):
+        """
+        Picks the upstream of a request and counts it in flight until
+        :meth:`release`.
+
+        :param client_ip (str): address of the client.
+        :param headers (dict): lower-cased request headers.
+        :param target (str): request target (path and query).
+        :param exclude (tuple): upstreams not to pick, e.g. one that just
+                                failed the same request.
+
+        :rtype tuple: ``(upstream, trial)``, the chosen :class:`Upstream
+                      <Upstream>` and its half-open ``trial`` to pass to
+                      :meth:`release`; ``(None, None)`` if none is available.
+        """
+        now = time.monotonic()
+        excluded = list(exclude)
+
+        def usable(upstream):
+            return upstream not in excluded and upstream.health.available(now)
+
+        while True:
+            with self._lock:
+                upstream = self.choose(client_ip, headers or {}, target or "", usable)
+                if upstream is None:
+                    return None, None
+                # Health is shared with the balancers of other hosts: the
+                # half-open trial may have been claimed since the check.
+                trial = upstream.health.claim(now)
+                if trial is not None:
+                    upstream.in_flight += 1
+                    break
+            excluded.append(upstream)
+        UPSTREAM_IN_FLIGHT.inc(upstream.address)
+        return upstream, trial
+
+    def release(self, upstream, ok=None, trial=False):
+        """
+        Ends a request started with :meth:`acquire`.
+
+        :param ok (bool): outcome for health checking, ``None`` if the
+                          upstream was not to blame either way.
+        :param trial (int): the ``trial`` returned by :meth:`acquire`.
+        """
+        with self._lock:
+            upstream.in_flight -= 1
+        upstream.health.report(ok, trial)
+        UPSTREAM_IN_FLIGHT.dec(upstream.address)
+
+
+class RoundRobin(Balancer):
+    """Each upstream in turn."""
+
+    name = "round-robin"
+
+    def __init__(self, upstreams):
+        super().__init__(upstreams)
+        self._next = 0
+
+    def choose(self, client_ip, headers, target, usable):
+        upstreams = self.upstreams
+        count = len(upstreams)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            if usable(upstreams[index]):
+                self._next = (index + 1) % count
+                return upstreams[index]
+        return None
+
+
+class WeightedRoundRobin(Balancer):
+    """Smooth weighted round-robin: every pick adds each weight to its
+    upstream's running value, takes the highest and subtracts the total from
+    it. Weights 5, 1, 1 give ``a a b a c a a`` rather than ``a a a a a b c``.
+    """
+
+    name = "weighted-round-robin"
+
+    def choose(self, client_ip, headers, target, usable):
+        best = None
+        total = 0
+        for upstream in self.upstreams:
+            if not usable(upstream):
+                continue
+            upstream.current += upstream.weight
+            total += upstream.weight
+            if best is None or upstream.current > best.current:
+                best = upstream
+        if best is not None:
+            best.current -= total
+        return best
+
+
+class LeastConnections(Balancer):
+    """The upstream with the fewest requests in flight per unit of weight;
+    ties are broken in turn so that an idle cluster is still spread."""
+
+    name = "least-conn"
+
+    def __init__(self, upstreams):
+        super().__init__(upstreams)
+        self._next = 0
+
+    def choose(self, client_ip, headers, target, usable):
+        upstreams = self.upstreams
+        count = len(upstreams)
+        start = self._next
+        best = None
+        for offset in range(count):
+            upstream = upstreams[(start + offset) % count]
+            if not usable(upstream):
+                continue
+            # in_flight / weight, compared without division.
+            if best is None or upstream.in_flight * best.weight < best.in_flight * upstream.weight:
+                best = upstream
+        self._next = (start + 1) % count
+        return best
+
+
+def hash_point(value):
+    """Position of a string on the hash ring."""
+    # Loaded on first use: only consistent-hash hosts need it.
+    import hashlib
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHash(Balancer):
+    """A hash ring with ``VIRTUAL_NODES * weight`` points per upstream; a
+    request goes to the first point at or after the hash of its key whose
+    upstream is usable.
+
+    :attrs key (str): ``$remote_addr``, ``$host``, ``$uri`` or
+                      ``$http_<name>``.
+    """
+
+    name = "consistent-hash"
+    arguments = 1
+
+    def __init__(self, upstreams, key=DEFAULT_HASH_KEY):
+        super().__init__(upstreams)
+        if key not in ("$remote_addr", "$host", "$uri") and not key.startswith("$http_"):
+            raise ValueError("unsupported hash key {!r}".format(key))
+        self.key = key
+        ring = []
+        for upstream in self.upstreams:
+            for replica in range(VIRTUAL_NODES * upstream.weight):
+                ring.append((hash_point("{}#{}".format(upstream.address, replica)), upstream))
+        ring.sort(key=lambda point: point[0])
+        self._points = [point for point, _ in ring]
+        self._owners = [upstream for _, upstream in ring]
+
+    def request_key(self, client_ip, headers, target):
+        """Returns the value of :attr:`key` for one request."""
+        key = self.key
+        if key == "$remote_addr":
+            return client_ip or ""
+        if key == "$host":
+            return headers.get("host", "")
+        if key == "$uri":
+            return target.split("?", 1)[0]
+        return headers.get(key[len("$http_"):].replace("_", "-"), "")
+
+    def choose(self, client_ip, headers, target, usable):
+        owners = self._owners
+        count = len(owners)
+        index = bisect.bisect_left(self._points, hash_point(self.request_key(client_ip, headers, target)))
+        for offset in range(count):
+            upstream = owners[(index + offset) % count]
+            if usable(upstream):
+                return upstream
+        return None
+
+
+#: ``dist_policy`` values and their aliases.
+POLICIES = {
+    "round-robin": RoundRobin,
+    "weighted-round-robin": WeightedRoundRobin,
+    "weighted": WeightedRoundRobin,
+    "least-conn": LeastConnections,
+    "least-connections": LeastConnections,
+    "consistent-hash": ConsistentHash,
+    "hash": ConsistentHash,
+}
+
+
+def build_balancer(proxy_map, policy=None):
+    """
+    Builds the balancer of one virtual host.
+
+    :param proxy_map (list): ``proxy_pass`` targets (see :func:`parse_upstream`);
+                             a single ``str`` is accepted.
+    :param policy (str): ``dist_policy`` value, e.g. ``"least-conn"`` or
+                         ``"consistent-hash $http_x_user_id"``; ``None`` for
+                         round-robin.
+
+    :rtype Balancer: the balancer.
+
+    :raises ValueError: on an unknown policy or an invalid target.
+    """
+    if isinstance(proxy_map, str):
+        proxy_map = [proxy_map]
+    upstreams = [parse_upstream(spec) for spec in proxy_map]
+    name, *args = (policy or DEFAULT_POLICY).split()
+    cls = POLICIES.get(name.lower())
+    if cls is None:
+        raise ValueError("unknown dist_policy {!r}".format(name))
+    if len(args) > cls.arguments:
+        raise ValueError("dist_policy {} takes {} argument(s), got {!r}".format(
+            name, cls.arguments, " ".join(args)))
+    return cls(upstreams, *args)
+
+
+class BalancerTable:
+    """The :class:`BalancerTable <BalancerTable>` object, the balancers of
+    the virtual hosts of a routes dict, built on first use.
+
+    A balancer is rebuilt when the ``(proxy_map, policy[, options])`` entry
+    of its host is replaced, so that its state (turn, weights, in-flight counts) lives as
+    long as the configuration it was built from.
+    """
+
+    def __init__(self):
+        self._balancers = {}
+        self._lock = threading.Lock()
+
+    def get(self, hostname, entry):
+        """
+        Returns the balancer of a virtual host.
+
+        :param hostname (str): key of the balancer.
+        :param entry (tuple): ``(proxy_map, policy[, options])`` of the host.
+        """
+        cached = self._balancers.get(hostname)
+        if cached is not None and cached[0] is entry:
+            return cached[1]
+        with self._lock:
+            cached = self._balancers.get(hostname)
+            if cached is None or cached[0] is not entry:
+                cached = (entry, build_balancer(entry[0], entry[1]))
+                self._balancers[hostname] = cached
+            return cached[1]
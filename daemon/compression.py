@@ -0,0 +1,181 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.compression
+~~~~~~~~~~~~~~~~~
+
+This module provides ``Accept-Encoding`` negotiation and response compression
+with the standard library only (``gzip`` and ``zlib``).
+
+- :func:`negotiate` picks ``gzip`` or ``deflate`` from the request header,
+  honouring q-values.
+- :func:`compress` encodes a body with the chosen coding.
+- :func:`compress_response` rewrites a complete encoded HTTP response
+  (as built by route handlers) with a compressed body, a corrected
+  ``Content-Length``, ``Content-Encoding`` and ``Vary: Accept-Encoding``.
+
+Static files are compressed once per coding and the variants are stored in
+the asset cache (see :mod:`daemon.assetcache`).
+
+Usage Example:
+--------------
+>>> negotiate("gzip, deflate;q=0.5")
+'gzip'
+"""
+
+import gzip
+import zlib
+
+#: Codings supported by the server, in order of preference.
+SUPPORTED_CODINGS = ("gzip", "deflate")
+#: Bodies smaller than this are sent uncompressed.
+DEFAULT_MIN_SIZE = 1024
+#: zlib compression level used for every coding.
+COMPRESS_LEVEL = 6
+
+#: Media types worth compressing besides ``text/*``.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type):
+    """
+    Returns ``True`` for textual media types that compress well.
+
+    :param content_type (str): value of the ``Content-Type`` header.
+    """
+    if not content_type:
+        return False
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+
+
+def negotiate(accept_encoding):
+    """
+    Selects the response coding from an ``Accept-Encoding`` header.
+
+    :param accept_encoding (str): the request header, or ``None``.
+
+    :rtype str: ``"gzip"``, ``"deflate"`` or ``None`` for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_CODINGS:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data, coding):
+    """
+    Compresses ``data`` with the given coding.
+
+    :param data (bytes): the identity body.
+    :param coding (str): ``"gzip"`` or ``"deflate"`` (zlib format, as HTTP defines it).
+
+    :rtype bytes: the encoded body.
+    """
+    if coding == "gzip":
+        return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+    if coding == "deflate":
+        return zlib.compress(data, COMPRESS_LEVEL)
+    raise ValueError("Unsupported coding: {}".format(coding))
+
+
+def add_vary(header_lines):
+    """
+    Adds ``Accept-Encoding`` to the ``Vary`` header of a list of raw header
+    lines (bytes, without CRLF), creating the header if needed.
+    """
+    for index, line in enumerate(header_lines):
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                header_lines[index] = line + b", Accept-Encoding"
+            return header_lines
+    header_lines.append(b"Vary: Accept-Encoding")
+    return header_lines
+
+
+def compress_response(response, coding, min_size=DEFAULT_MIN_SIZE):
+    """
+    Compresses a complete encoded HTTP response when it is worth it.
+
+    The response is left untouched if it has no recognisable header block,
+    is already encoded, is bodyless (204/304), has a non-compressible
+    ``Content-Type`` or a body under ``min_size``. ``Vary: Accept-Encoding``
+    is added to every compressible response, even when the client did not
+    accept any coding, so shared caches keep the variants apart.
+
+    :param response (bytes): the complete response (header block and body).
+    :param coding (str): negotiated coding, or ``None`` for identity.
+    :param min_size (int): smallest body worth compressing.
+
+    :rtype bytes: the (possibly) compressed response.
+    """
+    if not response or not response.startswith(b"HTTP/"):
+        return response
+    head, sep, body = response.partition(b"\r\n\r\n")
+    if not sep or len(body) < min_size:
+        return response
+
+    lines = head.split(b"\r\n")
+    status = lines[0].split(b" ", 2)
+    if len(status) < 2 or status[1] in (b"204", b"304"):
+        return response
+
+    header_lines = lines[1:]
+    content_type = None
+    for line in header_lines:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name in (b"content-encoding", b"transfer-encoding"):
+            return response
+        if name == b"content-type":
+            content_type = value.strip().decode('latin-1')
+    if not is_compressible(content_type):
+        return response
+
+    header_lines = add_vary(header_lines)
+    if coding is None:
+        return b"\r\n".join([lines[0]] + header_lines) + sep + body
+
+    encoded = compress(body, coding)
+    if len(encoded) >= len(body):
+        return b"\r\n".join([lines[0]] + header_lines) + sep + body
+
+    header_lines = [line for line in header_lines
+                    if line.partition(b":")[0].strip().lower() != b"content-length"]
+    header_lines.append(b"Content-Encoding: " + coding.encode())
+    header_lines.append(b"Content-Length: " + str(len(encoded)).encode())
+    return b"\r\n".join([lines[0]] + header_lines) + sep + encoded
@@ -0,0 +1,104 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.deadline
+~~~~~~~~~~~~~~~~~
+
+This module provides a :class:`Deadline <Deadline>` object that bounds the
+total time spent in one phase of a connection (waiting for a request, reading
+its header block, reading its body, writing the response).
+
+A plain ``socket.settimeout`` only bounds each ``recv`` call: a client that
+trickles one byte every few seconds never trips it and pins a worker thread
+forever. The deadline is absolute instead; before every blocking call the
+socket timeout is set to the time left, so the phase ends at the deadline
+however the bytes arrive.
+
+Phases are the ``phase`` label of the ``weaprous_timeouts_total`` counter:
+
+- ``idle``: no byte of the next request yet (new or kept-alive connection).
+- ``header``: the header block is incomplete.
+- ``body``: the request body is incomplete.
+- ``write``: the client does not read the response.
+- ``upstream``: a proxied backend does not answer.
+
+Usage Example:
+--------------
+>>> deadline = Deadline(conn)
+>>> deadline.start("header", 10)
+>>> deadline.apply()          # before each recv/send
+>>> conn.recv(4096)
+"""
+
+import socket
+import time
+
+from .metrics import TIMEOUTS
+
+
+class Deadline:
+    """The :class:`Deadline <Deadline>` object, the absolute deadline of the
+    current phase of one connection.
+
+    :attrs conn (socket.socket): the guarded socket.
+    :attrs phase (str): current phase, e.g. ``"header"``.
+    :attrs expires (float): ``time.monotonic()`` at which the phase times out,
+                            ``None`` when it is unbounded.
+    """
+
+    __attrs__ = [
+        "conn",
+        "phase",
+        "expires",
+    ]
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.phase = "idle"
+        self.expires = None
+
+    def start(self, phase, timeout):
+        """
+        Starts a new phase.
+
+        :param phase (str): name of the phase, used as metrics label.
+        :param timeout (float): seconds allowed for the whole phase, ``None``
+                                or ``0`` for no limit.
+        """
+        self.phase = phase
+        self.expires = time.monotonic() + timeout if timeout else None
+
+    def remaining(self):
+        """Seconds left in the current phase, ``None`` when unbounded."""
+        if self.expires is None:
+            return None
+        return self.expires - time.monotonic()
+
+    def apply(self):
+        """
+        Sets the socket timeout to the time left, before a blocking call.
+
+        :raises socket.timeout: if the deadline has already passed.
+        """
+        left = self.remaining()
+        if left is not None and left <= 0:
+            raise socket.timeout("{} deadline exceeded".format(self.phase))
+        self.conn.settimeout(left)
+
+    def expired(self, server):
+        """
+        Counts a connection closed because the current phase timed out.
+
+        :param server (str): ``"backend"``, ``"proxy"`` or ``"peer"``.
+        """
+        TIMEOUTS.inc(server, self.phase)
@@ -48,5 +48,12 @@ class CaseInsensitiveDict(MutableMapping):
     def __iter__(self):
         return iter(self.store)
 
+    def items(self):
+        # Duyệt thẳng dict bên trong, không qua __getitem__ cho từng khoá
+        return self.store.items()
+
+    def values(self):
+        return self.store.values()
+
     def __len__(self):
         return len(self.store)
\ No newline at end of file
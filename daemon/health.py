@@ -0,0 +1,290 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.health
+~~~~~~~~~~~~~~~~~
+
+This module tracks the health of the proxy upstreams, so that a dead
+backend stops receiving requests instead of costing each of them a connect
+timeout. Every upstream ``host:port`` has one :class:`UpstreamHealth
+<UpstreamHealth>`, shared by the virtual hosts that list it, moving between
+three states (a circuit breaker):
+
+- ``up``: selected by the balancers. ``max_fails`` consecutive failures
+  (connect errors, upstream timeouts, malformed responses, failed probes)
+  eject it.
+- ``down``: skipped by the balancers for ``fail_timeout`` seconds, doubled
+  on each new ejection (up to ``MAX_BACKOFF`` times), or until an active
+  probe succeeds.
+- ``half-open``: admitted again one request at a time; ``RISE`` successes
+  in a row make it ``up``, a failure ejects it again.
+
+Failures are detected passively, from the requests forwarded by the proxy,
+and actively by :class:`HealthTable <HealthTable>`, which probes every known
+upstream each ``health_interval`` seconds with a TCP connect, or a ``GET``
+of ``health_path`` whose status must be below 500.
+
+Usage Example:
+--------------
+>>> HEALTH.configure(max_fails=3, fail_timeout=10)
+>>> HEALTH.start(interval=5, timeout=1, path="/healthz")
+>>> HEALTH.get("127.0.0.1:9001").available(time.monotonic())
+"""
+
+import time
+import socket
+import threading
+
+from .logger import get_logger
+from .metrics import UPSTREAM_HEALTH, UPSTREAM_EJECTIONS
+
+logger = get_logger(__name__)
+
+UP = "up"
+DOWN = "down"
+HALF_OPEN = "half-open"
+
+#: Value of ``weaprous_upstream_health`` per state.
+STATE_VALUES = {UP: 1, HALF_OPEN: 0.5, DOWN: 0}
+#: Successes in a row that close the circuit of a half-open upstream.
+RISE = 2
+#: Largest multiplier of ``fail_timeout`` for repeated ejections.
+MAX_BACKOFF = 8
+
+
+class UpstreamHealth:
+    """The :class:`UpstreamHealth <UpstreamHealth>` object, the circuit
+    breaker of one upstream.
+
+    :attrs address (str): ``host:port`` of the upstream.
+    :attrs state (str): ``"up"``, ``"down"`` or ``"half-open"``.
+    :attrs fails (int): consecutive failures.
+    :attrs successes (int): consecutive successes while half-open.
+    :attrs ejections (int): consecutive ejections, for the backoff.
+    :attrs retry_at (float): ``time.monotonic()`` at which a ``down``
+                             upstream becomes half-open.
+    :attrs trials (int): half-open requests in flight.
+    """
+
+    __attrs__ = [
+        "address",
+        "state",
+        "fails",
+        "successes",
+        "ejections",
+        "retry_at",
+        "trials",
+    ]
+
+    def __init__(self, address, table):
+        self.address = address
+        self.state = UP
+        self.fails = 0
+        self.successes = 0
+        self.ejections = 0
+        self.retry_at = 0.0
+        self.trials = 0
+        #: Bumped on every state change, so that a trial claimed in an
+        #: earlier half-open period does not release the current one.
+        self._epoch = 0
+        self._table = table
+        self._lock = threading.Lock()
+        UPSTREAM_HEALTH.set(STATE_VALUES[UP], address)
+
+    def available(self, now):
+        """Returns ``True`` if a balancer may send a request now."""
+        state = self.state
+        if state == UP:
+            return True
+        if state == DOWN:
+            return now >= self.retry_at
+        return not self.trials
+
+    def claim(self, now):
+        """
+        Claims a request to the upstream, a trial unless it is up. The check
+        of :meth:`available` and the claim are atomic, so that concurrent
+        requests cannot all take the single half-open trial.
+
+        :rtype int: ``None`` if the upstream is down or its trial is taken;
+                    otherwise the ``trial`` to pass to :meth:`report` when
+                    the request ends, ``False`` when it is not a trial.
+        """
+        if self.state == UP:
+            return False
+        with self._lock:
+            if self.state == DOWN:
+                if now < self.retry_at:
+                    return None
+                self._set(HALF_OPEN)
+            elif self.state == UP:
+                return False
+            if self.trials:
+                return None
+            self.trials += 1
+            return self._epoch
+
+    def report(self, ok, trial=False):
+        """
+        Records the outcome of a request or a probe.
+
+        :param ok (bool): ``True`` on success, ``False`` on failure, ``None``
+                          when the upstream was not to blame (e.g. the client
+                          went away).
+        :param trial (int): what :meth:`claim` returned for the request;
+                            ``False`` for probes and requests claimed while
+                            the upstream was up, which neither release the
+                            trial nor count towards ``RISE``.
+        """
+        if ok and self.state == UP and not self.fails:
+            return
+        with self._lock:
+            trial = bool(trial) and trial == self._epoch
+            if trial and self.trials:
+                self.trials -= 1
+            if ok is None:
+                return
+            if ok:
+                self.fails = 0
+                if self.state == DOWN:
+                    # An active probe succeeded: re-admit without waiting.
+                    self._set(HALF_OPEN)
+                elif self.state == HALF_OPEN and trial:
+                    self.successes += 1
+                    if self.successes >= RISE:
+                        self.ejections = 0
+                        self._set(UP)
+                        logger.info("[Health] Upstream %s is healthy again", self.address)
+                return
+            self.fails += 1
+            if self.state == HALF_OPEN or (self.state == UP and self.fails >= self._table.max_fails):
+                self._eject()
+
+    def _eject(self):
+        self.ejections += 1
+        backoff = min(2 ** (self.ejections - 1), MAX_BACKOFF)
+        self.retry_at = time.monotonic() + self._table.fail_timeout * backoff
+        self._set(DOWN)
+        UPSTREAM_EJECTIONS.inc(self.address)
+        logger.warning("[Health] Upstream %s ejected for %.1fs after %s failures",
+                       self.address, self._table.fail_timeout * backoff, self.fails)
+
+    def _set(self, state):
+        self.state = state
+        self._epoch += 1
+        self.successes = 0
+        self.trials = 0
+        UPSTREAM_HEALTH.set(STATE_VALUES[state], self.address)
+
+
+def probe(host, port, timeout, path=None):
+    """
+    Probes one upstream.
+
+    :param timeout (float): seconds allowed for the whole probe.
+    :param path (str): path requested with ``GET``, ``None`` to only connect.
+
+    :rtype bool: ``True`` if the upstream is healthy.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            if path is None:
+                return True
+            sock.sendall("GET {} HTTP/1.1\r\nHost: {}:{}\r\nConnection: close\r\n\r\n".format(
+                path, host, port).encode())
+            status = b""
+            while b"\r\n" not in status and len(status) < 1024:
+                sock.settimeout(max(deadline - time.monotonic(), 0.001))
+                chunk = sock.recv(1024)
+                if not chunk:
+                    break
+                status += chunk
+            parts = status.split(b" ", 2)
+            return len(parts) > 1 and parts[1].isdigit() and int(parts[1]) < 500
+    except OSError:
+        return False
+
+
+class HealthTable:
+    """The :class:`HealthTable <HealthTable>` object, the circuit breakers
+    of every upstream known to the proxy, and the thread probing them.
+
+    :attrs max_fails (int): consecutive failures that eject an upstream.
+    :attrs fail_timeout (float): seconds of the first ejection.
+    """
+
+    __attrs__ = [
+        "max_fails",
+        "fail_timeout",
+    ]
+
+    def __init__(self, max_fails=3, fail_timeout=10.0):
+        self.max_fails = max_fails
+        self.fail_timeout = fail_timeout
+        self._upstreams = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def configure(self, max_fails=None, fail_timeout=None):
+        """Changes the ejection thresholds."""
+        if max_fails is not None:
+            self.max_fails = max_fails
+        if fail_timeout is not None:
+            self.fail_timeout = fail_timeout
+
+    def get(self, address):
+        """Returns the :class:`UpstreamHealth <UpstreamHealth>` of ``host:port``."""
+        health = self._upstreams.get(address)
+        if health is None:
+            with self._lock:
+                health = self._upstreams.get(address)
+                if health is None:
+                    health = self._upstreams[address] = UpstreamHealth(address, self)
+        return health
+
+    def start(self, interval, timeout, path=None):
+        """
+        Starts probing every known upstream each ``interval`` seconds, in a
+        daemon thread. Does nothing if ``interval`` is ``0``.
+        """
+        if not interval or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval, timeout, path),
+                                        name="health-checker", daemon=True)
+        self._thread.start()
+        logger.info("[Health] Probing upstreams every %ss (%s)", interval,
+                    "GET {}".format(path) if path else "TCP connect")
+
+    def stop(self):
+        """Stops the probing thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self, timeout, path=None):
+        """Probes every known upstream once."""
+        for health in list(self._upstreams.values()):
+            host, _, port = health.address.rpartition(":")
+            health.report(probe(host, int(port), timeout, path), trial=False)
+
+    def _run(self, interval, timeout, path):
+        while not self._stop.wait(interval):
+            self.check(timeout, path)
+
+
+#: Circuit breakers of the proxy upstreams.
+HEALTH = HealthTable()
@@ -1,10 +1,35 @@
 from .request import Request
-from .response import Response
+from .response import Response, make_response, send_buffers
 from .dictionary import CaseInsensitiveDict
-import json
+from .settings import Settings
+from .reader import RequestReader, RequestError
+from .deadline import Deadline
+from .middleware import Pipeline, NEXT
+from .compression import negotiate, compress_response
+from .logger import get_logger, redact_headers, redact_cookies
+from .metrics import (REQUESTS, LATENCY, UNROUTED, INVALID,
+                      response_status, build_metrics_response)
+import hmac
+import time
+import types
 import socket
+import logging
+import ipaddress
 from urllib.parse import parse_qs
 
+logger = get_logger(__name__)
+
+#: WebApp paths that require the ``auth=true`` cookie.
+PROTECTED_PATHS = ['/', '/index.html']
+
+
+def is_loopback(host):
+    """Returns ``True`` for a loopback client address (admin endpoint)."""
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
 class HttpAdapter:
     """
     A mutable :class:`HTTP adapter <HTTP adapter>` for managing client connections
@@ -13,9 +38,10 @@ class HttpAdapter:
 
     __attrs__ = [
         "ip", "port", "conn", "connaddr", "routes", "request", "response",
+        "settings", "loop",
     ]
 
-    def __init__(self, ip, port, conn, connaddr, routes):
+    def __init__(self, ip, port, conn, connaddr, routes, settings=None):
         """
         Initialize a new HttpAdapter instance.
         """
@@ -33,152 +59,467 @@ class HttpAdapter:
         self.request = Request()
         #: Response
         self.response = Response()
+        #: Settings (keep-alive timeout and request cap)
+        self.settings = settings if settings is not None else Settings()
+        #: Event loop of the asyncio engine, ``None`` on the threaded one
+        self.loop = None
 
     def get_request_cookies(self, req):
         """
-        Extracts cookies from the request headers, ensuring key and value are stripped.
+        Returns the cookies of a request, parsed once from its ``Cookie``
+        header (see :func:`parse_cookies <daemon.request.parse_cookies>`).
         """
-        cookies = {}
-        # Support lower-cased header keys created by Request.prepare()
-        if req.headers is None:
-            return cookies
-        cookie_header = req.headers.get('cookie') or req.headers.get('Cookie')
-        if cookie_header:
-            for pair in cookie_header.split(';'):
-                try:
-                    parts = pair.strip().split('=', 1)
-                    key = parts[0].strip()
-                    
-                    # Áp dụng strip() cho giá trị sau khi tách
-                    value = parts[1].strip() if len(parts) > 1 else ''
-                    
-                    # Thử một cách làm sạch bổ sung cho giá trị
-                    cookies[key] = value.replace('\n', '').replace('\r', '').strip() # <- SỬA TẠI ĐÂY
-                except Exception:
-                    continue 
-        return cookies
+        return req.cookies
 
     def handle_client(self, conn, addr, routes):
+        """
+        Serves one client connection. The connection is persistent (HTTP/1.1
+        keep-alive): requests are read and answered in order until the client
+        asks to close, stays idle longer than ``settings.keepalive_timeout``
+        or reaches ``settings.max_keepalive_requests``. Pipelined requests
+        already sitting in the receive buffer are served without waiting.
+
+        Requests are framed by a :class:`RequestReader <RequestReader>`:
+        bodies are read according to ``Content-Length`` or chunked transfer
+        coding, within ``settings.max_header_size`` and
+        ``settings.max_body_size``. Handlers registered with ``stream=True``
+        receive a :class:`BodyStream <BodyStream>` instead of a string.
+
+        Every phase runs under a :class:`Deadline <Deadline>`: the first
+        byte of a request within ``settings.keepalive_timeout``, the rest of
+        the header block within ``settings.header_timeout``, the body within
+        ``settings.body_timeout`` and the response within
+        ``settings.write_timeout``. A client that misses one is disconnected
+        (with ``408`` if it was sending a request) and counted in
+        ``weaprous_timeouts_total``.
+
+        :param conn (socket.socket): client connection socket.
+        :param addr (tuple): client address (IP, port).
+        :param routes (dict): dictionary of route handlers.
+        """
         self.conn = conn 
         self.connaddr = addr
-        req = self.request
-        resp = self.response
-        response = None
+        settings = self.settings
+        deadline = Deadline(conn)
+        reader = RequestReader(conn, settings.max_header_size, settings.max_body_size,
+                               deadline=deadline)
+        served = 0
 
         try:
-            msg_bytes = conn.recv(4096)
-            if not msg_bytes:
-                conn.close()
-                return
-            msg = msg_bytes.decode('utf-8', errors='ignore')
+            while True:
+                header_part = reader.read_head(settings.keepalive_timeout, settings.header_timeout)
+                if header_part is None:
+                    break
+                started = time.perf_counter()
+
+                req = self.prepare_request(header_part, None, routes)
+                served += 1
+                keep_alive = (self.wants_keep_alive(req)
+                              and served < settings.max_keepalive_requests)
+                self.response.keep_alive = keep_alive
+
+                deadline.start("body", settings.body_timeout)
+                body = self.read_body(conn, reader, req)
+                response = self.dispatch(req)
+                if not body.done:
+                    # A streaming handler left part of the body unread.
+                    keep_alive = False
+                buffers, keep_alive = self.finalize_response(response, keep_alive)
 
+                # --- GỬI PHẢN HỒI ---
+                if buffers:
+                    deadline.start("write", settings.write_timeout)
+                    send_buffers(conn, buffers, deadline)
+                    # Static files: body streamed from disk after the header.
+                    self.response.send_body(conn, deadline)
+                self.record_metrics(req, buffers[0] if buffers else None, started)
+                if not keep_alive:
+                    break
+        except RequestError as e:
+            logger.warning("[Error] Rejected request from %s: %s", addr, e)
+            REQUESTS.inc("", INVALID, str(e.status_code))
+            try:
+                conn.sendall(Response().build_error(e.status_code, e.reason))
+            except OSError:
+                pass
+        except socket.timeout:
+            self.request_timeout(conn, addr, deadline)
         except ConnectionResetError:
-            print("[Error] Connection reset by client.")
-            return
+            logger.debug("[Error] Connection reset by client.")
+        except OSError as e:
+            logger.warning("[Error] Connection error: %s", e)
+        finally:
+            conn.close()
+
+    def request_timeout(self, conn, addr, deadline):
+        """
+        Ends a connection whose current phase missed its deadline. A client
+        caught in the middle of a request gets a ``408 Request Timeout``
+        (best effort, without blocking); an idle one is closed silently.
+
+        :param deadline (Deadline): the expired deadline.
+        """
+        deadline.expired("backend")
+        if deadline.phase in ("header", "body"):
+            logger.info("[Backend] %s deadline exceeded by %s", deadline.phase, addr)
+            try:
+                conn.settimeout(0)
+                conn.send(Response().build_error(408, "Request Timeout"))
+            except OSError:
+                pass
+        elif deadline.phase == "write":
+            logger.info("[Backend] write deadline exceeded by %s", addr)
+
+    def read_body(self, conn, reader, req):
+        """
+        Attaches the body of the request to ``req.body``: a decoded string by
+        default, or the :class:`BodyStream <BodyStream>` itself when the
+        routed handler was registered with ``stream=True``. Answers
+        ``Expect: 100-continue`` before the body is read.
+
+        :rtype BodyStream: the stream the body is read from.
+        """
+        body = reader.body_stream(req.headers)
+        if not body.done and req.headers.get('expect', '').lower() == '100-continue':
+            conn.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        if self.streams_body(req):
+            req.body = body
+        else:
+            req.body = body.read().decode('utf-8', errors='ignore')
+        return body
+
+    def streams_body(self, req):
+        """Returns ``True`` if the routed handler asked for a streamed body."""
+        return bool(getattr(req.hook, '_stream_body', False))
+
+    def wants_keep_alive(self, req):
+        """
+        Returns ``True`` if the client accepts a persistent connection:
+        HTTP/1.1 unless ``Connection: close``, HTTP/1.0 only with an explicit
+        ``Connection: keep-alive``.
+        """
+        connection = (req.headers or {}).get('connection', '').lower()
+        if req.version == 'HTTP/1.1':
+            return 'close' not in connection
+        return 'keep-alive' in connection
 
-        header_part, _, body_part = msg.partition('\r\n\r\n')
-        
-        # 1. Chuẩn bị Request
+    def finalize_response(self, response, keep_alive):
+        """
+        Prepares a response for sending with a ``Connection`` header that
+        agrees with the negotiated persistence.
+
+        A :class:`Response <Response>` returned by a route handler is
+        serialized with the right headers directly. An encoded response has
+        its ``Connection`` header rewritten: route handlers that build raw
+        responses usually hard-code ``Connection: close``, and a response
+        without a ``Content-Length`` cannot be delimited on a persistent
+        connection and forces the connection to close.
+
+        :param response (Response or bytes): the dispatched response.
+        :param keep_alive (bool): whether the connection should stay open.
+
+        :rtype tuple: ``(buffers, keep_alive)`` after adjustment; ``buffers``
+                      is the list of bytes to send, header block first.
+        """
+        if isinstance(response, Response):
+            response.keep_alive = keep_alive
+            return response.serialize(self.settings.keepalive_timeout), keep_alive
+
+        if not response or not response.startswith(b"HTTP/"):
+            return ([response] if response else []), False
+
+        head, sep, body = response.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        status_line, header_lines = lines[0], lines[1:]
+        names = [line.split(b":", 1)[0].strip().lower() for line in header_lines]
+
+        status = status_line.split(b" ", 2)
+        bodyless = len(status) > 1 and status[1] in (b"204", b"304")
+        if b"content-length" not in names and not bodyless:
+            keep_alive = False
+
+        header_lines = [line for line, name in zip(header_lines, names)
+                        if name not in (b"connection", b"keep-alive")]
+        if keep_alive:
+            header_lines.append(b"Connection: keep-alive")
+            header_lines.append("Keep-Alive: timeout={}".format(
+                int(self.settings.keepalive_timeout)).encode())
+        else:
+            header_lines.append(b"Connection: close")
+
+        head = b"\r\n".join([status_line] + header_lines)
+        return [head + b"\r\n\r\n", body], keep_alive
+
+    def prepare_request(self, header_part, body_part, routes):
+        """
+        Prepares the adapter's :class:`Request <Request>` from the raw header
+        block and body of an incoming message.
+
+        A fresh request/response pair is created for every message, since a
+        persistent connection serves several requests with one adapter.
+        ``body_part`` may be ``None`` when the body is attached afterwards.
+
+        :param header_part (bytes): the raw header block.
+
+        :rtype Request: the prepared request; cookies are parsed on first access.
+        """
+        self.request = Request()
+        self.response = Response()
+        self.response.compress_min_size = self.compress_min_size
+        req = self.request
         req.prepare(header_part, routes)
         req.body = body_part
-        req.cookies = self.get_request_cookies(req)
+        return req
 
-        current_path = req.path
-        
-        # --- LOGIC XÁC THỰC (ĐÃ SỬA LỖI TRUY XUẤT) ---
+    def is_authenticated(self, req):
+        """Returns ``True`` when the request carries the ``auth=true`` cookie."""
         auth_cookie_value = req.cookies.get('auth', '').strip()
         is_authenticated = auth_cookie_value == 'true' 
-        print(f"[DEBUG AUTH] Checking auth. Cookie value found: '{auth_cookie_value}'. Is authenticated: {is_authenticated}")
+        logger.debug("[AUTH] Checking auth cookie. Is authenticated: %s", is_authenticated)
+        return is_authenticated
+
+    def is_denied(self, req):
+        """Returns ``True`` when a protected WebApp path is requested without auth."""
+        return req.path in PROTECTED_PATHS and not self.is_authenticated(req)
 
+    def call_hook(self, req):
+        """
+        Invokes the routed handler of the request. Path parameters captured
+        by the router are passed as extra keyword arguments. An ``async def``
+        handler reached through the middleware chain is run on the asyncio
+        engine's loop, or to completion in the calling thread otherwise.
+
+        :rtype: the handler result (see :func:`make_response
+                <daemon.response.make_response>`), or a 500 response if the
+                handler raised.
+        """
+        try:
+            result = req.hook(headers=req.headers, body=req.body, **req.params)
+            if isinstance(result, types.CoroutineType):
+                import asyncio
+                if self.loop is not None:
+                    return asyncio.run_coroutine_threadsafe(result, self.loop).result()
+                return asyncio.run(result)
+            return result
+        except Exception as e:
+            return self.hook_error(e)
+
+    def hook_error(self, error):
+        """
+        Builds the ``(body, status_code)`` result answered when a route
+        handler raises.
+        """
+        # Xử lý lỗi nếu API Chat gặp lỗi
+        logger.error("[API ERROR] Hook execution failed: %s", error)
+        return {"status": "error", "message": f"Server error: {error}"}, 500
+
+    def build_hook_response(self, result):
+        """
+        Converts the result of a route handler into a response, compressed
+        when the current request accepts it.
+
+        :param result: a dict, list, bytes, str or :class:`Response <Response>`,
+                       optionally in a ``(body, status_code[, headers])``
+                       tuple; or the legacy ``(raw_response_string, status_code)``
+                       pair.
+
+        :rtype Response or bytes: the response object, or the encoded raw
+                                  response of a legacy handler.
+        """
+        try:
+            response = make_response(result, self.response)
+        except (TypeError, ValueError) as e:
+            response = make_response(self.hook_error(e), self.response)
+        if not isinstance(response, Response):
+            # Phục vụ phản hồi API thô (đã được định dạng sẵn)
+            return self.compress(response)
+        min_size = self.compress_min_size
+        if min_size is not None and self.request.headers:
+            response.compress_body(negotiate(self.request.headers.get('accept-encoding')), min_size)
+        return response
+
+    @property
+    def compress_min_size(self):
+        """Compression threshold, or ``None`` when compression is disabled."""
+        if not self.settings.compression:
+            return None
+        return self.settings.compress_min_size
+
+    def compress(self, response):
+        """
+        Applies ``Accept-Encoding`` negotiation of the current request to an
+        encoded response.
+        """
+        min_size = self.compress_min_size
+        if min_size is None or not self.request.headers:
+            return response
+        coding = negotiate(self.request.headers.get('accept-encoding'))
+        return compress_response(response, coding, min_size)
+
+    def record_metrics(self, req, response, started):
+        """
+        Counts a served request and its latency, labelled with the matched
+        route pattern rather than the raw path.
+
+        :param req (Request): the served request.
+        :param response (bytes): the encoded response, or its header block.
+        :param started (float): ``time.perf_counter()`` when the header block was read.
+        """
+        route = req.route or UNROUTED
+        method = req.method or ""
+        REQUESTS.inc(method, route, response_status(response))
+        LATENCY.observe(time.perf_counter() - started, method, route)
+
+    def dispatch(self, req):
+        """
+        Produces the response for a prepared request by running it through
+        the middleware chain: application middleware registered on
+        :class:`WeApRous <WeApRous>` (``settings.middleware``), then the
+        built-in stages of :data:`STAGES` (metrics endpoint, profiling admin,
+        access control, routed API hooks and 405, login handling, static
+        files). The time spent in each stage is left in ``req.timings``.
+
+        With ``settings.admin_path``, while the route profiler is armed,
+        matching requests are dispatched under ``cProfile`` (see
+        :mod:`daemon.profiler`, only loaded then).
+
+        :param req (Request): the prepared request.
+
+        :rtype Response or bytes: the handler response, or the encoded HTTP response.
+        """
+        pipeline = self.settings.middleware or EMPTY_PIPELINE
+        if self.settings.admin_path:
+            # Imported lazily: profiling stays out of the startup path.
+            from .profiler import PROFILER
+            if PROFILER.remaining and PROFILER.wants(req):
+                return PROFILER.run(pipeline.run, self, req, STAGES)
+        return pipeline.run(self, req, STAGES)
+
+    def coerce_response(self, result):
+        """
+        Converts what an application middleware returned into a response.
+        A :class:`Response <Response>` or an encoded response (as produced
+        by the built-in stages) is kept; anything else is treated like the
+        result of a route handler.
+        """
+        if result is None or isinstance(result, Response):
+            return result
+        if isinstance(result, (bytes, bytearray)) and result.startswith(b"HTTP/"):
+            return result
+        return self.build_hook_response(result)
+
+    def serve_metrics(self, req):
+        """Stage: opt-in metrics endpoint, answered before any route."""
+        metrics_path = self.settings.metrics_path
+        if metrics_path and req.path == metrics_path and req.method == 'GET':
+            req.route = metrics_path
+            return build_metrics_response()
+        return NEXT
+
+    def serve_admin(self, req):
+        """
+        Stage: opt-in profiling admin endpoint under ``settings.admin_path``,
+        answered to loopback clients that send ``settings.admin_token`` in
+        ``X-Admin-Token``. Requests relayed by a proxy (``X-Forwarded-For``
+        or ``Forwarded``) are refused, the proxy connecting from loopback.
+        """
+        admin_path = self.settings.admin_path
+        if not admin_path or not req.path.startswith(admin_path + "/"):
+            return NEXT
+        req.route = admin_path
+        client = self.connaddr[0] if self.connaddr else None
+        headers = req.headers or {}
+        token = headers.get('x-admin-token', '')
+        if (not is_loopback(client) or 'x-forwarded-for' in headers or 'forwarded' in headers
+                or not hmac.compare_digest(token.encode(), self.settings.admin_token.encode())):
+            logger.warning("[ACCESS DENIED] Admin request from %s", client)
+            return self.build_hook_response(({"status": "error", "message": "Forbidden"}, 403))
+        from .profiler import handle_admin
+        result = handle_admin(req.method, req.path[len(admin_path):], req.query,
+                              self.settings.profile_dir)
+        return self.build_hook_response(result)
+
+    def check_access(self, req):
+        """
+        Stage: protected WebApp paths (``/``, ``/index.html``) answer 401
+        without the ``auth=true`` cookie, whether they are routed to a hook
+        or served as static files.
+        """
+        # --- LOGIC XÁC THỰC ---
+        current_path = req.path
+        if current_path in PROTECTED_PATHS and not self.is_authenticated(req):
+            if req.hook or (not req.allowed and req.method == 'GET'):
+                # Nếu chưa xác thực và đường dẫn được bảo vệ -> trả 401
+                logger.info("[ACCESS DENIED] Access to %s denied. Auth cookie missing/invalid. Returning 401.", current_path)
+                return self.response.build_unauthorized()
+        return NEXT
+
+    def run_hook(self, req):
+        """
+        Stage: routed API hooks, and 405 for routed paths hit with another
+        method.
+        """
         # --- TASK 2: XỬ LÝ API ROUTE (req.hook) ---
         if req.hook:
-            # Bảo vệ các route WebApp hook (/, /index.html)
-            protected_paths = ['/', '/index.html']
-            if current_path in protected_paths and not is_authenticated:
-                # Nếu chưa xác thực và đường dẫn được bảo vệ -> trả 401
-                print(f"[ACCESS DENIED] Protected path {current_path} invoked without auth. Returning 401.")
-                response = resp.build_unauthorized()
-            else:
-                # Logic xử lý API Chat (sử dụng logic route của WeApRous)
-                try:
-                    # req.hook trả về tuple (raw_response_string, status_code)
-                    raw_response_string, status_code = req.hook(headers=req.headers, body=req.body)
-                except Exception as e:
-                    # Xử lý lỗi nếu API Chat gặp lỗi
-                    print(f"[API ERROR] Hook execution failed: {e}")
-                    raw_response_string = json.dumps({"status": "error", "message": f"Server error: {e}"})
-                    status_code = 500
-
-                # Phục vụ phản hồi API thô (đã được định dạng sẵn)
-                response = raw_response_string.encode('utf-8')
-            
-        # --- TASK 1: XỬ LÝ ĐĂNG NHẬP & ACCESS CONTROL ---
-        else:
-            # 1A. Xử lý POST /login (Xác thực và Set-Cookie)
-            if req.method == 'POST' and current_path == '/login':
-                # Parse body (application/x-www-form-urlencoded)
-                params = parse_qs(req.body)
-                
-                username = params.get('username', [None])[0]
-                password = params.get('password', [None])[0]
-
-                if username == 'admin' and password == 'password':
-                    # LOGGING: Login thành công
-                    print("[AUTH SUCCESS] User 'admin' logged in and cookie 'auth=true' set.")
-                    
-                    # 1. Thiết lập Cookie (Path=/)
-                    resp.set_cookie('auth', 'true', path='/') 
-                    
-                    # 2. Phục vụ index.html (trang Chat UI)
-                    req.path = '/index.html' 
-                    response = resp.build_response(req)
-                    
-                else:
-                    # LOGGING: Login thất bại
-                    print("[AUTH FAIL] Invalid credentials submitted. Returning 401.")
-                    # Đăng nhập thất bại -> 401
-                    response = resp.build_unauthorized()
-
-            # 1B. Xử lý GET / và /index.html (Kiểm soát truy cập)
-            elif req.method == 'GET':
-                
-                is_protected_path = (current_path == '/' or current_path == '/index.html')
-
-                # Buộc chuyển hướng đến /login nếu chưa xác thực
-                if is_protected_path and not is_authenticated:
-                    
-                    # LOGGING: Truy cập bị từ chối
-                    print(f"[ACCESS DENIED] Access to {current_path} denied. Cookie 'auth=true' missing/invalid. Returning 401.")
-                    response = resp.build_unauthorized() 
-
-                elif is_protected_path and is_authenticated:
-                    # LOGGING: Truy cập thành công
-                    print(f"[ACCESS GRANTED] Access to {current_path} successful. Serving Chat UI.")
-                    # DEBUG LOG: Nếu là request tới /index.html, in headers và cookies để kiểm tra
-                    if current_path == '/index.html':
-                        try:
-                            print(f"[DEBUG] Incoming headers for {current_path}: {req.headers}")
-                            print(f"[DEBUG] Parsed cookies: {req.cookies}")
-                        except Exception as _:
-                            print("[DEBUG] Could not print headers/cookies for request")
-                    
-                    # Nếu đã xác thực -> phục vụ index.html (Chat UI)
-                    if current_path == '/':
-                        req.path = '/index.html'
-                    response = resp.build_response(req) 
-                    
-                else:
-                    # Phục vụ các file tĩnh khác (login.html, css, js, images)
-                    response = resp.build_response(req) 
-
-        # --- GỬI PHẢN HỒI ---
-        
-        # Gửi response và đóng kết nối
-        if response:
-            conn.sendall(response)
-            
-        conn.close()
-    
+            # Logic xử lý API Chat (sử dụng logic route của WeApRous)
+            return self.build_hook_response(self.call_hook(req))
+        # Path is routed, but not for this method
+        if req.allowed:
+            return self.response.build_method_not_allowed(req.allowed)
+        return NEXT
+
+    def handle_login(self, req):
+        """Stage: ``POST /login`` checks credentials and sets the auth cookie."""
+        if req.method != 'POST' or req.path != '/login':
+            return NEXT
+
+        resp = self.response
+        # Parse body (application/x-www-form-urlencoded)
+        params = parse_qs(req.body)
+
+        username = params.get('username', [None])[0]
+        password = params.get('password', [None])[0]
+
+        if username == 'admin' and password == 'password':
+            # LOGGING: Login thành công
+            logger.info("[AUTH SUCCESS] User 'admin' logged in and auth cookie set.")
+
+            # 1. Thiết lập Cookie (Path=/)
+            resp.set_cookie('auth', 'true', path='/')
+
+            # 2. Phục vụ index.html (trang Chat UI)
+            req.path = '/index.html'
+            return resp.build_response(req)
+
+        # LOGGING: Login thất bại
+        logger.info("[AUTH FAIL] Invalid credentials submitted. Returning 401.")
+        # Đăng nhập thất bại -> 401
+        return resp.build_unauthorized()
+
+    def serve_static(self, req):
+        """
+        Stage: ``GET`` of static files; ``/`` serves the Chat UI
+        (``/index.html``). Other methods fall through with no response.
+        """
+        if req.method != 'GET':
+            return NEXT
+
+        current_path = req.path
+        if current_path in PROTECTED_PATHS:
+            # LOGGING: Truy cập thành công (check_access đã kiểm tra cookie)
+            logger.debug("[ACCESS GRANTED] Access to %s successful. Serving Chat UI.", current_path)
+            # DEBUG LOG: headers và cookies, đã che giá trị nhạy cảm
+            if current_path == '/index.html' and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[DEBUG] Incoming headers for %s: %s", current_path, redact_headers(req.headers))
+                logger.debug("[DEBUG] Parsed cookies: %s", redact_cookies(req.cookies))
+
+            # Nếu đã xác thực -> phục vụ index.html (Chat UI)
+            if current_path == '/':
+                req.path = '/index.html'
+        # Phục vụ các file tĩnh (index.html, login.html, css, js, images)
+        return self.response.build_response(req)
+
     # --- CÁC HÀM KHÁC (GIỮ NGUYÊN HOẶC MÔ PHỎNG) ---
 
     def build_response(self, req, resp):
@@ -209,4 +550,18 @@ class HttpAdapter:
         """
         Add headers to the request.
         """
-        pass
\ No newline at end of file
+        pass
+
+
+#: Built-in stages run after the application middleware, in order.
+STAGES = [
+    ("metrics", HttpAdapter.serve_metrics),
+    ("admin", HttpAdapter.serve_admin),
+    ("access", HttpAdapter.check_access),
+    ("hook", HttpAdapter.run_hook),
+    ("login", HttpAdapter.handle_login),
+    ("static", HttpAdapter.serve_static),
+]
+
+#: Pipeline used when the application registered no middleware.
+EMPTY_PIPELINE = Pipeline()
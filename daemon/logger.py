@@ -0,0 +1,182 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.logger
+~~~~~~~~~~~~~~~~~
+
+This module provides the logging setup of the daemon, built on the standard
+:mod:`logging` package.
+
+- Every module logs through its own logger, ``weaprous.<module>``, obtained
+  with :func:`get_logger`.
+- :func:`configure_logging` attaches a ``QueueHandler`` to the ``weaprous``
+  logger: request threads only enqueue records, a ``QueueListener`` thread
+  formats and writes them, so a slow terminal never stalls a request.
+- Debug records can be sampled (1 in N kept) to keep tracing affordable
+  under load; records above ``DEBUG`` are never dropped.
+- Per-request tracing is logged at ``DEBUG`` with lazy ``%`` arguments, so at
+  the default ``INFO`` level it costs one level check.
+- :func:`redact_headers` and :func:`redact_cookies` mask credentials before
+  they are logged.
+
+The listener thread does not survive ``fork``; forked workers (see
+:mod:`daemon.prefork`) restart it automatically.
+
+Usage Example:
+--------------
+>>> configure_logging("DEBUG", debug_sample=10)
+>>> logger = get_logger(__name__)
+>>> logger.debug("[Request] %s path %s", method, path)
+"""
+
+import os
+import sys
+import queue
+import atexit
+import logging
+import itertools
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+#: Name of the parent logger of every daemon module.
+ROOT_LOGGER = "weaprous"
+#: Default level of the daemon loggers.
+DEFAULT_LEVEL = "INFO"
+#: Format of the records written by the background listener.
+LOG_FORMAT = "%(asctime)s %(levelname)-5s %(name)s: %(message)s"
+#: Headers whose values are never logged.
+SENSITIVE_HEADERS = ("cookie", "set-cookie", "authorization", "proxy-authorization")
+#: Replacement of redacted values.
+REDACTED = "<redacted>"
+
+_lock = threading.Lock()
+_state = {"listener": None, "handler": None, "stream": None}
+
+
+def get_logger(name):
+    """
+    Returns the logger of a daemon module.
+
+    :param name (str): module name, usually ``__name__`` (``daemon.proxy`` is
+                       logged as ``weaprous.proxy``).
+    """
+    short = name.rsplit('.', 1)[-1]
+    return logging.getLogger("{}.{}".format(ROOT_LOGGER, short))
+
+
+class DebugSampler(logging.Filter):
+    """The :class:`DebugSampler <DebugSampler>` object, a filter keeping one
+    ``DEBUG`` record out of ``rate``; other levels always pass.
+
+    :attrs rate (int): keep 1 debug record in ``rate``.
+    """
+
+    __attrs__ = [
+        "rate",
+    ]
+
+    def __init__(self, rate=1):
+        super().__init__()
+        self.rate = max(int(rate), 1)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        # next() on itertools.count is atomic under the GIL.
+        return next(self._counter) % self.rate == 0
+
+
+def configure_logging(level=DEFAULT_LEVEL, debug_sample=1, stream=None):
+    """
+    Installs the queue-backed handler on the ``weaprous`` logger and starts
+    the background writer. Calling it again replaces the previous setup.
+
+    :param level (str|int): lowest level logged, e.g. ``"INFO"``.
+    :param debug_sample (int): keep 1 ``DEBUG`` record in ``debug_sample``.
+    :param stream (file, optional): destination, defaults to ``sys.stdout``.
+
+    :rtype logging.Logger: the ``weaprous`` logger.
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError("Unknown log level")
+
+    root = logging.getLogger(ROOT_LOGGER)
+    with _lock:
+        _stop_listener()
+        _state["stream"] = stream
+        root.setLevel(level)
+        root.propagate = False
+        handler = QueueHandler(queue.SimpleQueue())
+        handler.addFilter(DebugSampler(debug_sample))
+        root.addHandler(handler)
+        _state["handler"] = handler
+        _start_listener(handler.queue)
+    return root
+
+
+def shutdown_logging():
+    """Flushes pending records and stops the background writer."""
+    with _lock:
+        _stop_listener()
+
+
+def _start_listener(records):
+    writer = logging.StreamHandler(_state["stream"] or sys.stdout)
+    writer.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(records, writer)
+    listener.start()
+    _state["listener"] = listener
+
+
+def _stop_listener():
+    listener, handler = _state["listener"], _state["handler"]
+    if listener is not None:
+        listener.stop()
+    if handler is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(handler)
+    _state["listener"] = _state["handler"] = None
+
+
+def _restart_after_fork():
+    """Gives a forked child its own queue and writer thread."""
+    global _lock
+    _lock = threading.Lock()
+    handler = _state["handler"]
+    if handler is None:
+        return
+    handler.queue = queue.SimpleQueue()
+    _start_listener(handler.queue)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+# Flush records still queued when the interpreter exits.
+atexit.register(shutdown_logging)
+
+
+def redact_headers(headers):
+    """
+    Returns a copy of a header dictionary safe to log.
+
+    :param headers (dict): request or response headers.
+    """
+    return {key: REDACTED if key.lower() in SENSITIVE_HEADERS else value
+            for key, value in headers.items()}
+
+
+def redact_cookies(cookies):
+    """Returns the cookie names of a cookie dictionary, values masked."""
+    return {key: REDACTED for key in cookies}
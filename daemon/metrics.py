@@ -0,0 +1,386 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.metrics
+~~~~~~~~~~~~~~~~~
+
+This module provides in-process metrics for the backend and the proxy,
+exposed in the Prometheus text format (version 0.0.4).
+
+- :class:`Counter <Counter>` and :class:`Histogram <Histogram>` record into a
+  per-thread shard: the hot path updates a dictionary owned by the calling
+  thread and takes no lock. Shards are only summed when the metrics are
+  rendered.
+- :class:`Gauge <Gauge>` holds a value behind a lock, or reads it from a
+  callback at render time (pool saturation, thread count).
+- :data:`REGISTRY` collects every metric; :func:`render` produces the text
+  served on the opt-in ``metrics_path`` of the backend and the proxy.
+
+Route labels use the route pattern of the ``WeApRous`` routes dictionary
+(e.g. ``/channels/<name>/members``), never the raw path, so the number of
+series stays bounded. Each pre-forked worker keeps its own metrics.
+
+Usage Example:
+--------------
+>>> REQUESTS.inc("GET", "/login", "200")
+>>> LATENCY.observe(0.004, "GET", "/login")
+>>> print(render())
+"""
+
+import abc
+import bisect
+import weakref
+import threading
+
+#: ``Content-Type`` of the text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+#: Default histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+#: Route label of requests served without a route handler (static files, login).
+UNROUTED = "<unrouted>"
+#: Route label of requests rejected before they could be routed.
+INVALID = "<invalid>"
+#: Upstream label of proxy requests answered from the response cache.
+CACHED = "<cache>"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = ('{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                                .replace('"', '\\"').replace('\n', '\\n'))
+               for name, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Registry:
+    """The :class:`Registry <Registry>` object, the set of metrics rendered
+    together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Adds a metric; its name must be unique."""
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError("Duplicate metric '{}'".format(metric.name))
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns every metric in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append("# HELP {} {}".format(metric.name, metric.help))
+            lines.append("# TYPE {} {}".format(metric.name, metric.kind))
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class _ShardOwner:
+    """Owner of a thread's shard; its finalizer retires the shard when the
+    thread exits, so short-lived threads do not accumulate shards."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded(abc.ABC):
+    """Base of metrics recorded into one dictionary per thread."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard)
+            self._local.owner = owner
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards = [s for s in self._shards if s is not shard]
+            self._merge(self._retired, shard)
+
+    def _collect(self):
+        with self._lock:
+            shards = [dict(self._retired)] + list(self._shards)
+        # Threads may add keys while we iterate: copy each shard first.
+        return [dict(shard) for shard in shards]
+
+    @abc.abstractmethod
+    def _merge(self, into, shard):
+        """Adds the series of a retired thread's ``shard`` to ``into``."""
+
+
+class Counter(_Sharded):
+    """The :class:`Counter <Counter>` object, a monotonically increasing count.
+
+    :attrs name (str): metric name, e.g. ``http_requests_total``.
+    :attrs labelnames (tuple): label names, values are given positionally.
+    """
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        """Adds ``amount`` to the series identified by the label values."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Returns the current total of a series."""
+        return sum(shard.get(labels, 0) for shard in self._collect())
+
+    def _merge(self, into, shard):
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def samples(self):
+        totals = {}
+        for shard in self._collect():
+            self._merge(totals, shard)
+        for labels in sorted(totals):
+            yield "{}{} {}".format(self.name, _format_labels(self.labelnames, labels),
+                                   _format_value(totals[labels]))
+
+
+class Histogram(_Sharded):
+    """The :class:`Histogram <Histogram>` object, a distribution of observed
+    values over fixed buckets.
+
+    :attrs buckets (tuple): upper bounds of the buckets, ``+Inf`` excluded.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        """Records one observation in the series identified by the label values."""
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _merge(self, into, shard):
+        for labels, series in shard.items():
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(series)
+            else:
+                for index, value in enumerate(series):
+                    total[index] += value
+
+    def samples(self):
+        totals = {}
+        for shard in self._collect():
+            self._merge(totals, shard)
+        for labels in sorted(totals):
+            series = totals[labels]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                yield "{}_bucket{} {}".format(
+                    self.name,
+                    _format_labels(self.labelnames, labels, ("le", _format_value(float(bound)))),
+                    cumulative)
+            label_text = _format_labels(self.labelnames, labels)
+            yield "{}_sum{} {}".format(self.name, label_text, _format_value(series[-1]))
+            yield "{}_count{} {}".format(self.name, label_text, cumulative)
+
+
+class Gauge:
+    """The :class:`Gauge <Gauge>` object, a value that goes up and down.
+
+    A series either holds a value changed with :meth:`inc`, :meth:`dec` and
+    :meth:`set`, or is bound to a callback with :meth:`set_function` that is
+    called at render time.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, func, *labels):
+        """Reads the series from ``func()`` whenever the metrics are rendered."""
+        with self._lock:
+            self._functions[labels] = func
+
+    def value(self, *labels):
+        func = self._functions.get(labels)
+        if func is not None:
+            return func()
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for labels, func in functions.items():
+            try:
+                values[labels] = func()
+            except Exception:
+                continue
+        for labels in sorted(values):
+            yield "{}{} {}".format(self.name, _format_labels(self.labelnames, labels),
+                                   _format_value(values[labels]))
+
+
+#: Process-wide registry rendered on the metrics endpoint.
+REGISTRY = Registry()
+
+#: Backend requests by method, route pattern and status code.
+REQUESTS = REGISTRY.register(Counter(
+    "weaprous_http_requests_total", "HTTP requests served by the backend.",
+    ("method", "route", "status")))
+#: Backend request latency, from the parsed header block to the last byte sent.
+LATENCY = REGISTRY.register(Histogram(
+    "weaprous_http_request_duration_seconds", "Backend request latency in seconds.",
+    ("method", "route")))
+#: Time spent in each middleware stage, excluding the stages it called.
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "weaprous_middleware_duration_seconds", "Own time of each backend middleware stage in seconds.",
+    ("stage",), buckets=(0.00005, 0.0001, 0.00025, 0.0005) + DEFAULT_BUCKETS))
+#: Open client connections by server kind (``backend`` or ``proxy``).
+CONNECTIONS = REGISTRY.register(Gauge(
+    "weaprous_connections_in_flight", "Client connections currently open.",
+    ("server",)))
+#: Connections shed with 503 because the worker queue was full.
+REJECTED = REGISTRY.register(Counter(
+    "weaprous_rejected_connections_total", "Connections rejected with 503 by the backend."))
+#: Connections closed by a read/write deadline, by server kind and phase.
+TIMEOUTS = REGISTRY.register(Counter(
+    "weaprous_timeouts_total", "Connections closed because a deadline expired.",
+    ("server", "phase")))
+#: Worker pool saturation of the threaded backend.
+POOL = REGISTRY.register(Gauge(
+    "weaprous_worker_pool", "Backend worker pool state (size, busy, pending, capacity).",
+    ("state",)))
+#: Proxied requests by virtual host, upstream and status code.
+PROXY_REQUESTS = REGISTRY.register(Counter(
+    "weaprous_proxy_requests_total", "Requests forwarded by the proxy.",
+    ("vhost", "upstream", "status")))
+#: Proxy latency, including the upstream round trip.
+PROXY_LATENCY = REGISTRY.register(Histogram(
+    "weaprous_proxy_request_duration_seconds", "Proxy request latency in seconds.",
+    ("vhost", "upstream")))
+#: Proxy connections to backends, by upstream and kind (``opened`` or ``reused``).
+UPSTREAM_CONNECTIONS = REGISTRY.register(Counter(
+    "weaprous_upstream_connections_total", "Backend connections opened or reused by the proxy.",
+    ("upstream", "kind")))
+#: Requests currently forwarded to each upstream by the proxy balancers.
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "weaprous_upstream_in_flight", "Requests in flight per proxy upstream.",
+    ("upstream",)))
+#: Whether each proxy upstream is healthy (1), half-open (0.5) or ejected (0).
+UPSTREAM_HEALTH = REGISTRY.register(Gauge(
+    "weaprous_upstream_health", "Proxy upstream state: 1 healthy, 0.5 half-open, 0 ejected.",
+    ("upstream",)))
+#: Proxy upstreams ejected after consecutive failures.
+UPSTREAM_EJECTIONS = REGISTRY.register(Counter(
+    "weaprous_upstream_ejections_total", "Proxy upstreams ejected by health checking.",
+    ("upstream",)))
+#: Proxy cache lookups by virtual host and result (``hit``, ``stale``,
+#: ``revalidated``, ``miss`` or ``bypass``).
+PROXY_CACHE = REGISTRY.register(Counter(
+    "weaprous_proxy_cache_total", "Proxy cache lookups by result.",
+    ("vhost", "result")))
+#: Bytes held by the proxy response cache.
+PROXY_CACHE_BYTES = REGISTRY.register(Gauge(
+    "weaprous_proxy_cache_bytes", "Bytes of responses stored by the proxy cache."))
+#: Live threads of the process.
+THREADS = REGISTRY.register(Gauge(
+    "weaprous_threads", "Threads alive in the process."))
+THREADS.set_function(threading.active_count)
+
+
+def render():
+    """Returns the metrics of :data:`REGISTRY` in the text exposition format."""
+    return REGISTRY.render()
+
+
+def response_status(response):
+    """
+    Returns the status code of an encoded response as a string, or ``"0"``
+    if it has no HTTP status line.
+
+    :param response (bytes): the encoded response, at least its status line.
+    """
+    if response and response[:5] == b"HTTP/":
+        code = response[9:12]
+        if code.isdigit():
+            return code.decode('ascii')
+    return "0"
+
+
+def build_metrics_response():
+    """Returns the encoded ``200 OK`` response carrying :func:`render`."""
+    body = render().encode('utf-8')
+    return (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: {}\r\n"
+        "Content-Length: {}\r\n"
+        "Cache-Control: no-store\r\n"
+        "\r\n"
+    ).format(CONTENT_TYPE, len(body)).encode('utf-8') + body
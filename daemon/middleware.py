@@ -0,0 +1,195 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.middleware
+~~~~~~~~~~~~~~~~~
+
+This module provides the :class:`Pipeline <Pipeline>` object, the ordered
+middleware chain through which the :class:`HttpAdapter <HttpAdapter>`
+produces every response.
+
+Application middleware is registered on :class:`WeApRous <WeApRous>` and
+runs first, in registration order, each stage a callable
+``stage(adapter, req, call_next)`` that may call ``call_next()`` to run the
+rest of the chain, or return without calling it to short-circuit. The
+built-in stages of the adapter (metrics endpoint, access control, route
+hooks, login, static files) follow; they are plain ``stage(adapter, req)``
+callables run in a flat loop, returning :data:`NEXT` to pass the request on.
+
+Three kinds of application middleware are supported:
+
+- ``before``: ``func(req)`` returns ``None`` to continue, or a result (as a
+  route handler would return) that answers the request at once.
+- ``after``: ``func(req, response)`` returns a replacement response, or
+  ``None`` to keep it.
+- ``around``: ``func(req, call_next)`` wraps the rest of the chain.
+
+The time spent in each stage, excluding the stages it called, is stored in
+``req.timings`` and observed in the ``weaprous_middleware_duration_seconds``
+histogram.
+
+Usage Example:
+--------------
+>>> @app.before
+>>> def limit(req):
+>>>     if too_many(req):
+>>>         return {"status": "error"}, 429
+
+>>> @app.around
+>>> def timer(req, call_next):
+>>>     response = call_next()
+>>>     return response
+"""
+
+import time
+
+from .metrics import STAGE_LATENCY
+
+#: Kinds of application middleware accepted by :meth:`Pipeline.add`.
+KINDS = ("before", "after", "around")
+
+#: Returned by a built-in stage that does not answer the request.
+NEXT = object()
+
+
+def before_stage(func):
+    """Wraps a ``func(req)`` hook into a stage that can short-circuit."""
+    def stage(adapter, req, call_next):
+        result = func(req)
+        if result is None:
+            return call_next()
+        return adapter.coerce_response(result)
+    return stage
+
+
+def after_stage(func):
+    """Wraps a ``func(req, response)`` hook into a stage run after the chain."""
+    def stage(adapter, req, call_next):
+        response = call_next()
+        result = func(req, response)
+        if result is None:
+            return response
+        return adapter.coerce_response(result)
+    return stage
+
+
+def around_stage(func):
+    """Wraps a ``func(req, call_next)`` hook into a stage."""
+    def stage(adapter, req, call_next):
+        return adapter.coerce_response(func(req, call_next))
+    return stage
+
+
+WRAPPERS = {
+    "before": before_stage,
+    "after": after_stage,
+    "around": around_stage,
+}
+
+
+def run_stages(adapter, req, stages, timings, total):
+    """
+    Runs the built-in stages in order until one answers.
+
+    :param stages (list): ``(name, stage)`` pairs of ``stage(adapter, req)``.
+    :param timings (dict): receives the time spent in each stage.
+    :param total (list): one-item accumulator of the time recorded so far.
+
+    :rtype: the response of the answering stage, ``None`` if none answered.
+    """
+    clock = time.perf_counter
+    started = clock()
+    for name, stage in stages:
+        response = stage(adapter, req)
+        now = clock()
+        timings[name] = now - started
+        total[0] += now - started
+        if response is not NEXT:
+            return response
+        started = now
+    return None
+
+
+class Pipeline:
+    """The :class:`Pipeline <Pipeline>` object, an ordered list of named
+    middleware stages.
+
+    :attrs stages (list): ``(name, stage)`` pairs of application middleware,
+                          in execution order.
+    """
+
+    __attrs__ = [
+        "stages",
+    ]
+
+    def __init__(self):
+        self.stages = []
+
+    def __len__(self):
+        return len(self.stages)
+
+    def add(self, func, kind="around", name=None):
+        """
+        Appends an application middleware.
+
+        :param func (callable): the hook, with the signature of its ``kind``.
+        :param kind (str): ``"before"``, ``"after"`` or ``"around"``.
+        :param name (str): stage name in timings, defaults to ``func.__name__``.
+
+        :rtype callable: ``func``, so ``add`` can back a decorator.
+        """
+        if kind not in WRAPPERS:
+            raise ValueError("kind must be one of {}".format(", ".join(KINDS)))
+        name = name or getattr(func, "__name__", "middleware")
+        self.stages.append((name, WRAPPERS[kind](func)))
+        return func
+
+    def run(self, adapter, req, builtin):
+        """
+        Runs a request through the application middleware, then the
+        built-in stages. The own time of every stage that ran (excluding
+        the stages it called) is stored in ``req.timings`` and observed in
+        the stage histogram.
+
+        :param adapter (HttpAdapter): the adapter serving the request.
+        :param req (Request): the prepared request.
+        :param builtin (list): ``(name, stage)`` pairs of built-in stages.
+
+        :rtype: the response of the first stage, ``None`` if no stage answered.
+        """
+        timings = req.timings = {}
+        total = [0.0]
+        stages = self.stages
+        count = len(stages)
+
+        def call(index):
+            if index == count:
+                return run_stages(adapter, req, builtin, timings, total)
+            name, stage = stages[index]
+            before = total[0]
+            started = time.perf_counter()
+            try:
+                return stage(adapter, req, lambda: call(index + 1))
+            finally:
+                own = time.perf_counter() - started - (total[0] - before)
+                timings[name] = timings.get(name, 0.0) + own
+                total[0] += own
+
+        try:
+            if count:
+                return call(0)
+            return run_stages(adapter, req, builtin, timings, total)
+        finally:
+            observe = STAGE_LATENCY.observe
+            for name, spent in timings.items():
+                observe(spent, name)
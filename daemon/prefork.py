@@ -0,0 +1,296 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.prefork
+~~~~~~~~~~~~~~~~~
+
+This module provides the multi-process mode of the backend and the proxy.
+Route handlers are plain Python, and the proxy event loop runs in one thread,
+so one process never uses more than one core however many worker threads it
+runs. :class:`Supervisor <Supervisor>` forks ``workers`` processes that all
+accept on the same port, each running the engine selected in the settings
+(thread pool or asyncio), and restarts any worker that dies.
+
+The listening port is shared in one of two ways:
+
+- with ``SO_REUSEPORT`` (Linux, BSD, macOS) every worker binds its own socket
+  and the kernel spreads new connections across them;
+- otherwise the supervisor binds one socket before forking and the workers
+  inherit it.
+
+Notes:
+------
+- State kept in module globals by an application (e.g. the tracker's peer and
+  channel tables) is per process; applications that must share it need
+  ``workers=1`` or an external store.
+- Platforms without ``os.fork`` (Windows) fall back to a single process.
+- With ``settings.config_path`` (proxy), ``SIGHUP`` sent to the supervisor is
+  forwarded to every worker, each reloading its own routing table, and a
+  restarted worker starts from the file as it is now.
+
+Usage Example:
+--------------
+>>> create_backend("0.0.0.0", 9000, routes, workers=4)
+>>> create_proxy("0.0.0.0", 8080, routes, engine="asyncio", workers=4)
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+
+from .logger import get_logger, shutdown_logging
+
+logger = get_logger(__name__)
+
+#: Seconds a worker must stay up to be considered healthy.
+MIN_UPTIME = 1.0
+#: Longest delay before restarting a worker that keeps crashing, in seconds.
+MAX_RESTART_DELAY = 30.0
+#: Seconds given to workers to exit on shutdown before they are killed.
+SHUTDOWN_GRACE = 5.0
+
+
+class Supervisor:
+    """The :class:`Supervisor <Supervisor>` object, the parent process of the
+    pre-forked workers.
+
+    :attrs ip (str): IP address to bind the server.
+    :attrs port (int): Port number to listen on.
+    :attrs routes (dict): Dictionary of route handlers.
+    :attrs settings (Settings): backend tunables, ``settings.workers`` processes are run.
+    :attrs reuse_port (bool): whether each worker binds its own ``SO_REUSEPORT`` socket.
+    :attrs children (dict): pid to worker slot of the running workers.
+    :attrs runner (callable): serves in a worker, called with ``(ip, port,
+                              routes, settings, server)``; defaults to the
+                              backend engine.
+    """
+
+    __attrs__ = [
+        "ip",
+        "port",
+        "routes",
+        "settings",
+        "reuse_port",
+        "children",
+        "runner",
+    ]
+
+    def __init__(self, ip, port, routes, settings, runner=None):
+        self.ip = ip
+        self.port = port
+        self.routes = routes
+        self.settings = settings
+        self.reuse_port = hasattr(socket, "SO_REUSEPORT")
+        self.children = {}
+        self.runner = runner
+        self._server = None
+        self._started = {}
+        self._delays = {}
+
+    def run(self):
+        """
+        Forks the workers and supervises them until the supervisor receives
+        ``SIGINT`` or ``SIGTERM``, then stops every worker.
+
+        :raises SystemExit: if the address cannot be bound, before any
+                            worker is forked.
+        """
+        # Imported lazily: the proxy does not load the backend otherwise.
+        from .backend import create_listener
+        try:
+            if self.reuse_port:
+                probe_port(self.ip, self.port)
+            else:
+                self._server = create_listener(self.ip, self.port, self.settings.backlog)
+        except OSError as e:
+            raise SystemExit("[Prefork] Cannot listen on {}:{}: {}".format(self.ip, self.port, e))
+
+        signal.signal(signal.SIGTERM, _raise_exit)
+        if self.settings.config_path and hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._forward)
+        logger.info("[Prefork] Supervisor %s starting %s workers on port %s (%s)",
+                    os.getpid(), self.settings.workers, self.port,
+                    "SO_REUSEPORT" if self.reuse_port else "shared socket")
+        try:
+            for slot in range(self.settings.workers):
+                self.spawn(slot)
+            self.supervise()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            self.stop()
+
+    def spawn(self, slot):
+        """Forks the worker process of a slot."""
+        pid = os.fork()
+        if pid == 0:
+            self._worker_main(slot)
+        self.children[pid] = slot
+        self._started[slot] = time.monotonic()
+
+    def supervise(self):
+        """Reaps dead workers and restarts them, backing off on crash loops."""
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                return
+            slot = self.children.pop(pid, None)
+            if slot is None:
+                continue
+
+            logger.warning("[Prefork] Worker %s (slot %s) exited with status %s",
+                           pid, slot, _exit_code(status))
+            uptime = time.monotonic() - self._started[slot]
+            if uptime < MIN_UPTIME:
+                delay = min(self._delays.get(slot, 0.5) * 2, MAX_RESTART_DELAY)
+            else:
+                delay = 0
+            self._delays[slot] = delay or 0.5
+            if delay:
+                logger.info("[Prefork] Restarting slot %s in %.1fs", slot, delay)
+                time.sleep(delay)
+            self.reload_routes()
+            self.spawn(slot)
+
+    def reload_routes(self):
+        """
+        Parses ``settings.config_path`` again, so that a restarted worker does
+        not serve routes the running workers have already reloaded. The
+        current routes are kept if the file cannot be read.
+        """
+        if not self.settings.config_path:
+            return
+        from .routing import parse_virtual_hosts
+        try:
+            self.routes = parse_virtual_hosts(self.settings.config_path)
+        except (OSError, ValueError) as e:
+            logger.error("[Prefork] Keeping the routes, %s unreadable: %s",
+                         self.settings.config_path, e)
+
+    def _forward(self, signum, frame):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def stop(self):
+        """Terminates the workers, killing those still alive after the grace period."""
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.monotonic() + SHUTDOWN_GRACE
+        while self.children and time.monotonic() < deadline:
+            for pid in list(self.children):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+
+        if self._server is not None:
+            self._server.close()
+        logger.info("[Prefork] Supervisor stopped")
+
+    def _worker_main(self, slot):
+        """Body of a forked worker; never returns."""
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if hasattr(signal, "SIGHUP"):
+                # Until the runner installs its own handler, a forwarded
+                # SIGHUP must neither kill the worker nor reach its siblings.
+                signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            from .backend import create_listener, run_engine
+            server = self._server
+            if server is None:
+                server = create_listener(self.ip, self.port, self.settings.backlog,
+                                         reuse_port=True)
+            logger.info("[Prefork] Worker %s (slot %s) serving", os.getpid(), slot)
+            runner = self.runner or run_engine
+            runner(self.ip, self.port, self.routes, self.settings, server)
+        except KeyboardInterrupt:
+            pass
+        except BaseException as e:
+            logger.error("[Prefork] Worker %s crashed: %s", os.getpid(), e)
+            code = 1
+        finally:
+            shutdown_logging()
+            sys.stdout.flush()
+            os._exit(code)
+
+
+def probe_port(ip, port):
+    """
+    Binds ``(ip, port)`` with ``SO_REUSEPORT`` and releases it at once, so
+    that an address in use (or invalid) fails in the supervisor instead of
+    in every worker, restarted forever. The probe does not listen: no
+    connection is queued on it.
+
+    :raises OSError: if the workers would not be able to bind.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((ip, port))
+    finally:
+        sock.close()
+
+
+def _raise_exit(signum, frame):
+    raise SystemExit(0)
+
+
+def _exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def run_prefork(ip, port, routes, settings, runner=None):
+    """
+    Runs the backend in ``settings.workers`` pre-forked processes, or in the
+    calling process when ``os.fork`` is not available.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param settings (Settings): backend tunables.
+    :param runner (callable, optional): serves in each worker, e.g.
+                                        :func:`run_proxy <daemon.proxy.run_proxy>`;
+                                        defaults to the backend engine.
+    """
+    if not hasattr(os, "fork"):
+        logger.warning("[Prefork] os.fork is not available, serving from a single process")
+        if runner is None:
+            from .backend import run_engine as runner
+        runner(ip, port, routes, settings)
+        return
+    Supervisor(ip, port, routes, settings, runner).run()
@@ -0,0 +1,368 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.profiler
+~~~~~~~~~~~~~~~~~
+
+This module provides on-demand profiling of a running backend process,
+driven from the opt-in admin endpoint (``settings.admin_path``) so that a
+slow tracker or WebApp can be inspected without a restart:
+
+- :class:`StackSampler <StackSampler>` samples the stacks of every thread
+  with ``sys._current_frames()`` at a fixed interval. Samples are wall-clock:
+  threads blocked in ``recv`` or waiting for work are counted too. Results
+  are collapsed stacks (``thread;file:func;... count``), the input format of
+  ``flamegraph.pl`` and speedscope.
+- :class:`RouteProfiler <RouteProfiler>` runs ``cProfile`` around the
+  dispatch of the next N requests of a route and merges them into one
+  ``pstats`` file (``python -m pstats <file>``).
+
+Admin requests (loopback clients sending ``X-Admin-Token``, not relayed by
+a proxy), relative to ``admin_path``:
+
+- ``GET  /profile``: state of both profilers, as JSON.
+- ``POST /profile/sampler/start?interval=0.005``: start sampling.
+- ``GET  /profile/sampler``: collapsed stacks collected so far.
+- ``POST /profile/sampler/stop``: stop and write a ``.collapsed`` file.
+- ``POST /profile/route?route=/send-peer&count=20``: profile the next
+  ``count`` requests of a route pattern (every route if omitted); the
+  ``.pstats`` file is written after the last one.
+- ``GET  /profile/route``: top functions of the collected profile.
+- ``POST /profile/route/stop``: stop early and write what was collected.
+
+Each pre-forked worker process has its own profilers; files are named after
+the process id.
+
+Usage Example:
+--------------
+>>> create_backend("127.0.0.1", 9000, routes, admin_path="/_admin", admin_token=secret)
+>>> # curl -X POST -H "X-Admin-Token: $secret" 'http://127.0.0.1:9000/_admin/profile/route?count=50'
+"""
+
+import io
+import os
+import sys
+import time
+import threading
+from urllib.parse import parse_qs
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+#: Seconds between two stack samples.
+DEFAULT_INTERVAL = 0.005
+#: Requests profiled by default when the route profiler is armed.
+DEFAULT_PROFILE_COUNT = 10
+#: Functions listed by ``GET /profile/route``.
+REPORT_LIMIT = 40
+#: Content type of the text reports.
+TEXT_TYPE = "text/plain; charset=utf-8"
+
+
+def profile_filename(directory, suffix):
+    """Returns a fresh ``weaprous-<pid>-<time>.<suffix>`` path in ``directory``."""
+    if not directory:
+        import tempfile
+        directory = tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    name = "weaprous-{}-{}.{}".format(os.getpid(), time.strftime("%Y%m%d-%H%M%S"), suffix)
+    return os.path.join(directory, name)
+
+
+class StackSampler:
+    """The :class:`StackSampler <StackSampler>` object, a background thread
+    counting the stacks of every other thread of the process.
+
+    :attrs interval (float): seconds between two samples.
+    :attrs counts (dict): ``collapsed stack -> number of samples``.
+    :attrs samples (int): number of sampling rounds taken.
+    :attrs last_file (str): path of the last written ``.collapsed`` file.
+    """
+
+    __attrs__ = [
+        "interval",
+        "counts",
+        "samples",
+        "last_file",
+    ]
+
+    def __init__(self):
+        self.interval = DEFAULT_INTERVAL
+        self.counts = {}
+        self.samples = 0
+        self.last_file = None
+        self._frames = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        """
+        Starts sampling, discarding the previous samples.
+
+        :rtype bool: ``False`` if the sampler was already running.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval or DEFAULT_INTERVAL
+            self.counts = {}
+            self.samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+            self._thread.start()
+        logger.info("[Profiler] Stack sampler started (every %.1f ms)", self.interval * 1000)
+        return True
+
+    def stop(self):
+        """
+        Stops sampling; the samples are kept until the next :meth:`start`.
+
+        :rtype bool: ``False`` if the sampler was not running.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return False
+            self._stop.set()
+            thread.join()
+            self._thread = None
+        logger.info("[Profiler] Stack sampler stopped after %s samples", self.samples)
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self.collapse(frame, names.get(ident, "thread-{}".format(ident)))
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+            self.samples += 1
+
+    def collapse(self, frame, thread_name):
+        """Returns ``thread;outer_func;...;inner_func`` for one stack."""
+        labels = self._frames
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = "{}:{}".format(
+                    os.path.basename(code.co_filename), code.co_name).replace(";", ":")
+            parts.append(label)
+            frame = frame.f_back
+        parts.append(thread_name.replace(";", ":").replace(" ", "_"))
+        parts.reverse()
+        return ";".join(parts)
+
+    def collapsed(self):
+        """Returns the samples in collapsed-stack text, most frequent first."""
+        counts = dict(self.counts)
+        lines = ["{} {}".format(stack, count)
+                 for stack, count in sorted(counts.items(), key=lambda item: -item[1])]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, directory=None):
+        """Writes the samples to a ``.collapsed`` file and returns its path."""
+        path = profile_filename(directory, "collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        self.last_file = path
+        return path
+
+
+class RouteProfiler:
+    """The :class:`RouteProfiler <RouteProfiler>` object, a deterministic
+    profile of the next requests of one route.
+
+    Only one request is profiled at a time; requests dispatched concurrently
+    with a profiled one run unprofiled and are not counted.
+
+    :attrs route (str): route pattern to profile, ``None`` for every route.
+    :attrs remaining (int): requests still to profile; ``0`` when disarmed.
+    :attrs profiled (int): requests profiled since :meth:`arm`.
+    :attrs stats (pstats.Stats): merged profile, ``None`` before the first request.
+    :attrs directory (str): where the ``.pstats`` file is written.
+    :attrs last_file (str): path of the last written ``.pstats`` file.
+    """
+
+    __attrs__ = [
+        "route",
+        "remaining",
+        "profiled",
+        "stats",
+        "directory",
+        "last_file",
+    ]
+
+    def __init__(self):
+        self.route = None
+        self.remaining = 0
+        self.profiled = 0
+        self.stats = None
+        self.directory = None
+        self.last_file = None
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def arm(self, route=None, count=DEFAULT_PROFILE_COUNT, directory=None):
+        """Profiles the next ``count`` requests matching ``route``."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with self._lock:
+            self.route = route
+            self.profiled = 0
+            self.stats = None
+            self.directory = directory
+            self.remaining = count
+        logger.info("[Profiler] Profiling the next %s requests of %s", count, route or "every route")
+
+    def disarm(self):
+        """
+        Stops profiling and writes what was collected.
+
+        :rtype str: path of the written file, ``None`` if nothing was profiled.
+        """
+        with self._lock:
+            self.remaining = 0
+            return self._dump()
+
+    def wants(self, req):
+        """Returns ``True`` if ``req`` should be profiled."""
+        return self.remaining > 0 and (self.route is None or self.route in (req.route, req.path))
+
+    def run(self, func, *args):
+        """
+        Calls ``func(*args)`` under ``cProfile`` and merges its profile; the
+        ``.pstats`` file is written after the last expected request.
+        """
+        if not self._busy.acquire(blocking=False):
+            return func(*args)
+        # Loaded on first use: profiling support is not part of startup.
+        import cProfile
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return func(*args)
+            finally:
+                profile.disable()
+                self._merge(profile)
+        finally:
+            self._busy.release()
+
+    def _merge(self, profile):
+        import pstats
+        with self._lock:
+            if self.remaining <= 0:
+                return
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self.profiled += 1
+            self.remaining -= 1
+            if self.remaining == 0:
+                path = self._dump()
+                logger.info("[Profiler] Profile of %s requests written to %s", self.profiled, path)
+
+    def _dump(self):
+        if self.stats is None:
+            return None
+        path = profile_filename(self.directory, "pstats")
+        self.stats.dump_stats(path)
+        self.last_file = path
+        return path
+
+    def report(self, sort="cumulative", limit=REPORT_LIMIT):
+        """Returns the top functions of the collected profile as text."""
+        with self._lock:
+            if self.stats is None:
+                return "No request profiled yet.\n"
+            out = io.StringIO()
+            self.stats.stream = out
+            self.stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+
+#: Process-wide profilers driven by the admin endpoint.
+SAMPLER = StackSampler()
+PROFILER = RouteProfiler()
+
+
+def status():
+    """Returns the state of both profilers as a dict."""
+    return {
+        "pid": os.getpid(),
+        "sampler": {
+            "running": SAMPLER.running,
+            "interval": SAMPLER.interval,
+            "samples": SAMPLER.samples,
+            "last_file": SAMPLER.last_file,
+        },
+        "route": {
+            "route": PROFILER.route,
+            "remaining": PROFILER.remaining,
+            "profiled": PROFILER.profiled,
+            "last_file": PROFILER.last_file,
+        },
+    }
+
+
+def handle_admin(method, path, query, directory=None):
+    """
+    Answers a profiling admin request.
+
+    :param method (str): HTTP method.
+    :param path (str): path relative to the admin prefix, e.g. ``/profile``.
+    :param query (str): raw query string.
+    :param directory (str): where profile files are written, ``None`` for
+                            the system temporary directory.
+
+    :rtype tuple: a ``(body, status_code[, headers])`` handler result.
+    """
+    params = {key: values[-1] for key, values in parse_qs(query or "").items()}
+    try:
+        if path == "/profile" and method == "GET":
+            return status(), 200
+        if path == "/profile/sampler" and method == "GET":
+            return SAMPLER.collapsed(), 200, {"Content-Type": TEXT_TYPE}
+        if path == "/profile/sampler/start" and method == "POST":
+            interval = float(params["interval"]) if "interval" in params else None
+            if interval is not None and interval <= 0:
+                raise ValueError("interval must be positive")
+            if not SAMPLER.start(interval):
+                return {"status": "error", "message": "Sampler already running"}, 409
+            return status(), 200
+        if path == "/profile/sampler/stop" and method == "POST":
+            if not SAMPLER.stop():
+                return {"status": "error", "message": "Sampler not running"}, 409
+            return {"file": SAMPLER.dump(directory), "samples": SAMPLER.samples}, 200
+        if path == "/profile/route" and method == "GET":
+            return PROFILER.report(params.get("sort", "cumulative")), 200, {"Content-Type": TEXT_TYPE}
+        if path == "/profile/route" and method == "POST":
+            count = int(params.get("count", DEFAULT_PROFILE_COUNT))
+            PROFILER.arm(params.get("route"), count, directory)
+            return status(), 200
+        if path == "/profile/route/stop" and method == "POST":
+            return {"file": PROFILER.disarm(), "profiled": PROFILER.profiled}, 200
+    except (KeyError, ValueError) as e:
+        return {"status": "error", "message": str(e)}, 400
+    return {"status": "error", "message": "Not Found"}, 404
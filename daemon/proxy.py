@@ -23,107 +23,394 @@ Requirement:
 - socket: provides socket networking interface.
 - threading: enables concurrent client handling via threads.
 - response: customized :class: `Response <Response>` utilities.
-- httpadapter: :class: `HttpAdapter <HttpAdapter >` adapter for HTTP request processing.
 - dictionary: :class: `CaseInsensitiveDict <CaseInsensitiveDict>` for managing headers and cookies.
+- logger: leveled, queue-backed logging.
+- metrics: per virtual host and upstream request counters and latency histograms.
+- deadline: idle, header, body, write and upstream deadlines per connection.
+- upstream: pooled keep-alive backend connections and response framing.
+- balancer: dist_policy load balancing over the proxy_pass of a host.
+- health: active and passive upstream health checks (circuit breakers).
+- proxycache: shared response cache honoring Cache-Control, per virtual host.
+- routing: compiled virtual host table (exact, wildcard, default_server), hot reload.
 
 """
+import time
 import socket
 import threading
 from .response import *
-from .httpadapter import HttpAdapter
 from .dictionary import CaseInsensitiveDict
+from .settings import Settings
+from .reader import RequestReader, RequestError
+from .request import parse_head
+from .deadline import Deadline
+from .balancer import BalancerTable, build_balancer
+from .health import HEALTH
+from .proxycache import PROXY_RESPONSE_CACHE, CachePolicy
+from .routing import RoutingTable, LiveRoutes
+from .upstream import (UpstreamPool, UpstreamError, read_response, upstream_reader,
+                       request_head, relay_body, expects_continue, CONTINUE)
+from .logger import get_logger, configure_logging
+from .metrics import (PROXY_REQUESTS, PROXY_LATENCY, CONNECTIONS, TIMEOUTS, UNROUTED,
+                      CACHED, response_status, build_metrics_response)
 
-#: A dictionary mapping hostnames to backend IP and port tuples.
-#: Used to determine routing targets for incoming requests.
-PROXY_PASS = {
-    "192.168.56.103:8080": ('192.168.56.103', 9000),
-    "app1.local": ('192.168.56.103', 9001),
-    "app2.local": ('192.168.56.103', 9002),
-}
+logger = get_logger(__name__)
 
+#: Methods safe to send twice, retried when a pooled connection was stale.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
 
-def forward_request(host, port, request):
+#: Backend connections shared by the proxy threads (see :func:`run_proxy`).
+UPSTREAM_POOL = UpstreamPool()
+
+#: Route of the hosts matching no host block, without a ``default_server``.
+DEFAULT_ROUTE = ('127.0.0.1:9000', 'round-robin')
+
+#: Last routes dict compiled by :func:`routing_table`, and its table.
+_COMPILED = (None, None)
+
+#: Balancers of the virtual hosts, rebuilt when their route changes.
+BALANCERS = BalancerTable()
+
+
+def upstream_expired(deadline):
+    """Returns ``True`` if the current phase of ``deadline`` has passed."""
+    left = deadline.remaining()
+    return left is not None and left <= 0
+
+
+def forward_request(host, port, request, conn, settings, deadline, pool=None, exchange=None,
+                    client_ip=None):
     """
-    Forwards an HTTP request to a backend server and retrieves the response.
+    Forwards an HTTP request to a backend server and relays the response to
+    the client.
+
+    Bodies are streamed in both directions as they arrive (see
+    :func:`relay_body <daemon.upstream.relay_body>`): the request body is
+    sent to the backend while the client uploads it, and the response is
+    written to the client piece by piece, so memory and time to first byte
+    do not depend on the payload size. Backend connections come from
+    ``pool`` and go back to it once the response body was read; an
+    idempotent request without body whose reused connection turns out to be
+    closed by the backend is retried once on a new connection.
+
+    While a body is relayed, ``upstream_timeout`` and ``write_timeout`` bound
+    each wait rather than the whole transfer; the upload as a whole is
+    bounded by ``body_timeout``.
+
+    ``Expect: 100-continue`` is answered by the proxy once the request head
+    reached the backend, and interim 1xx responses of the backend are not
+    relayed: the client gets the final response only.
+
+    With an ``exchange`` of the response cache, the request carries the
+    validators of a stale entry, a ``304 Not Modified`` answers the client
+    from the entry, and a storable response is copied to the cache while it
+    is relayed.
 
     :params host (str): IP address of the backend server.
     :params port (int): port number of the backend server.
-    :params request (str): incoming HTTP request.
-
-    :rtype bytes: Raw HTTP response from the backend server. If the connection
-                  fails, returns a 404 Not Found response.
+    :params request (tuple): the request from :func:`read_request`.
+    :params conn (socket.socket): client connection socket.
+    :params settings (Settings): deadlines of the client and the backend.
+    :params deadline (Deadline): deadline of the client connection.
+    :params pool (UpstreamPool, optional): backend connections, defaults to
+                                           :data:`UPSTREAM_POOL`.
+    :params exchange (CacheExchange, optional): cache side of the request.
+    :params client_ip (str, optional): client address, sent in ``X-Forwarded-For``.
+
+    :rtype bytes: the header block sent to the client.
+
+    :raises UpstreamError: 502 Bad Gateway if the backend is unreachable,
+                           resets the connection or answers a malformed
+                           response, 504 Gateway Timeout if it misses its
+                           connect or upstream deadline. Once the header
+                           block is sent (``sent``), the client connection
+                           can only be closed.
+    :raises RequestError: if the request body is malformed or too large.
+    :raises socket.timeout: if the client misses the body or write deadline.
     """
-
-    backend = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    method, target, version, headers, head, body = request
+    pool = pool if pool is not None else UPSTREAM_POOL
+    upstream = Deadline(None)
+    upstream.start("upstream", settings.upstream_timeout)
+    payload = request_head(head, client_ip)
+    if exchange is not None:
+        payload = exchange.prepare(payload)
+    # Only a request without body can be sent twice.
+    retry = method in IDEMPOTENT_METHODS and body.done
+    stage = "connect"
+    sent = None
 
     try:
-        backend.connect((host, port))
-        backend.sendall(request.encode())
-        response = b""
         while True:
-            chunk = backend.recv(4096)
-            if not chunk:
-                break
-            response += chunk
-        return response
+            stage = "connect"
+            backend, reused = pool.acquire(host, port, upstream)
+            stage = "request"
+            upstream.conn = backend
+            reusable = False
+            try:
+                response = None
+                try:
+                    send_buffers(backend, [payload], upstream)
+                    if not body.done:
+                        if expects_continue(version, headers):
+                            deadline.start("write", settings.write_timeout)
+                            send_buffers(conn, [CONTINUE], deadline)
+                        deadline.start("body", settings.body_timeout)
+                        relay_body(body, backend, body.mode == "chunked", upstream,
+                                   ((upstream, settings.upstream_timeout),))
+                        upstream.start("upstream", settings.upstream_timeout)
+                    stage = "response"
+                    reader = upstream_reader(backend, upstream)
+                    response = read_response(reader, method, version == "HTTP/1.1")
+                except ConnectionError:
+                    if not (reused and retry):
+                        raise
+                if response is None:
+                    if not (reused and retry):
+                        raise ConnectionError("Upstream closed the connection without answering")
+                    # Stale pooled connection: once more on a new one.
+                    logger.debug("[Proxy] Retrying on a new connection to %s:%s", host, port)
+                    retry = False
+                    continue
+
+                cached = exchange.on_response(response) if exchange is not None else None
+                deadline.start("write", settings.write_timeout)
+                stage = "relay"
+                if cached is not None:
+                    # 304 Not Modified: the stale entry was revalidated.
+                    send_buffers(conn, [cached], deadline)
+                    reusable = response.reusable and not reader.buffer
+                    return cached
+                sent = response.head
+                if exchange is not None:
+                    sent = sent[:-2] + b"X-Cache: MISS\r\n\r\n"
+                send_buffers(conn, [sent], deadline)
+                if response.body is not None:
+                    relay_body(response.body, conn, response.chunked, deadline,
+                               ((upstream, settings.upstream_timeout),
+                                (deadline, settings.write_timeout)),
+                               exchange.feed if exchange is not None else None)
+                reusable = response.reusable and not reader.buffer
+                return sent
+            finally:
+                pool.release(host, port, backend, reusable)
+    except socket.timeout as e:
+        if stage != "connect" and not upstream_expired(upstream):
+            raise
+        upstream.expired("proxy")
+        logger.warning("[Proxy] Upstream %s:%s missed its deadline", host, port)
+        raise UpstreamError(504, "Gateway Timeout", str(e), sent)
+    except (RequestError, ValueError) as e:
+        if stage == "request":
+            raise
+        logger.warning("[Proxy] Invalid response from %s:%s: %s", host, port, e)
+        raise UpstreamError(502, "Bad Gateway", str(e), sent)
     except socket.error as e:
-        print(("Socket error: {}".format(e)))
-        return (
-            "HTTP/1.1 404 Not Found\r\n"
-            "Content-Type: text/plain\r\n"
-            "Content-Length: 13\r\n"
-            "Connection: close\r\n"
-            "\r\n"
-            "404 Not Found"
-        ).encode('utf-8')
+        # While a body is relayed, the client socket may have failed too.
+        logger.warning("[Proxy] Upstream %s:%s failed: %s", host, port, e)
+        raise UpstreamError(502, "Bad Gateway", str(e), sent,
+                            fault=True if stage in ("connect", "response") else None)
 
 
-def resolve_routing_policy(hostname, routes):
+def refresh_cache(balancer, exchange, head, client_ip, settings, pool):
     """
-    Handles an routing policy to return the matching proxy_pass.
-    It determines the target backend to forward the request to.
+    Revalidates a cache entry served stale (``stale-while-revalidate``),
+    out of any client request: a ``304`` refreshes the entry, a storable
+    response replaces it.
+
+    :params balancer (Balancer): balancer of the virtual host.
+    :params exchange (CacheExchange): the background exchange of the entry.
+    :params head (bytes): header block of the client request that found
+                          the entry stale.
+    :params client_ip (str): address of that client, for hash policies.
+    """
+    chosen, trial = balancer.acquire(client_ip, exchange.headers, exchange.target)
+    if chosen is None:
+        PROXY_RESPONSE_CACHE.done(exchange)
+        return
+    upstream = Deadline(None)
+    upstream.start("upstream", settings.upstream_timeout)
+    backend = None
+    reusable = False
+    ok = None
+    try:
+        backend, _ = pool.acquire(chosen.host, chosen.port, upstream)
+        upstream.conn = backend
+        # A HEAD request may find the entry stale: refresh it with a GET.
+        payload = request_head(b"GET" + head[head.index(b" "):], client_ip)
+        send_buffers(backend, [exchange.prepare(payload)], upstream)
+        reader = upstream_reader(backend, upstream)
+        response = read_response(reader, "GET", False)
+        if response is None:
+            raise ConnectionError("Upstream closed the connection without answering")
+        if exchange.on_response(response) is None and response.body is not None:
+            data = response.body.read_chunk()
+            while data:
+                exchange.feed(data)
+                data = response.body.read_chunk()
+        exchange.finish()
+        reusable = response.reusable and not reader.buffer
+        ok = True
+    except (OSError, ValueError, RequestError) as e:
+        ok = False
+        logger.warning("[Proxy] Revalidation of %s on %s failed: %s",
+                       exchange.target, chosen.address, e)
+    finally:
+        if backend is not None:
+            pool.release(chosen.host, chosen.port, backend, reusable)
+        balancer.release(chosen, ok, trial)
+        PROXY_RESPONSE_CACHE.done(exchange)
+
+
+def send_error(conn, deadline, settings, status_code, reason):
+    """Writes an error response to the client and returns it."""
+    response = Response().build_error(status_code, reason)
+    deadline.start("write", settings.write_timeout)
+    send_buffers(conn, [response], deadline)
+    return response
+
+
+def read_request(conn, settings, deadline):
+    """
+    Reads the header block of one client request. The body is not read
+    here: it is relayed to the backend as it arrives (see
+    :func:`forward_request`).
+
+    :params conn (socket.socket): client connection socket.
+    :params settings (Settings): size limits and deadlines.
+    :params deadline (Deadline): deadline of the connection.
+
+    :rtype tuple: ``(method, target, version, headers, head, body)`` with the
+                  raw header block and a :class:`BodyStream <BodyStream>`, or
+                  ``None`` if the client closed without sending a request.
+
+    :raises RequestError: on oversized or malformed requests.
+    :raises socket.timeout: if the idle or header deadline passed.
+    """
+    reader = RequestReader(conn, settings.max_header_size, settings.max_body_size,
+                           deadline=deadline)
+    head = reader.read_head(settings.keepalive_timeout, settings.header_timeout)
+    if head is None:
+        return None
+
+    method, target, version, headers = parse_head(head)
+    return method, target, version, headers, head, reader.body_stream(headers)
+
+
+def routing_table(routes):
+    """
+    Returns the :class:`RoutingTable <RoutingTable>` of ``routes``: the
+    current table of a :class:`LiveRoutes <LiveRoutes>`, or the table of a
+    routes dict, compiled once and kept while the same dict is passed.
+    """
+    global _COMPILED
+    if isinstance(routes, LiveRoutes):
+        return routes.table
+    if isinstance(routes, RoutingTable):
+        return routes
+    compiled, table = _COMPILED
+    if compiled is not routes:
+        table = RoutingTable(routes)
+        _COMPILED = (routes, table)
+    return table
+
+
+def match_route(hostname, routes):
+    """
+    Matches a ``Host`` header against the host blocks (see
+    :mod:`daemon.routing`).
+
+    :params hostname (str): the ``Host`` header of the request.
+    :params routes (dict): dictionary mapping hostnames and location, or
+                           the :class:`LiveRoutes <LiveRoutes>` of the proxy.
+
+    :rtype tuple: ``(vhost, entry)``, the name of the matching host block
+                  and its route, ``(None, DEFAULT_ROUTE)`` if none matches.
+    """
+    table = routing_table(routes)
+    vhost = table.match(hostname)
+    if vhost is None:
+        return None, DEFAULT_ROUTE
+    return vhost, table.routes[vhost]
+
+
+def host_balancer(vhost, entry):
+    """
+    Returns the balancer of a host block (see :mod:`daemon.balancer`).
+    Hosts without any ``proxy_pass`` or with an invalid route go to
+    ``127.0.0.1:9000``.
+
+    :params vhost (str): name of the host block, ``None`` for the default route.
+    :params entry (tuple): route of the host block.
+
+    :rtype Balancer: the balancer applying the ``dist_policy`` of the host.
+    """
+    proxy_map = entry[0]
+    if not proxy_map:
+        logger.warning("[Proxy] No proxy_pass for hostname %s, using %s", vhost, DEFAULT_ROUTE[0])
+        entry = DEFAULT_ROUTE
+    try:
+        return BALANCERS.get(vhost if entry is not DEFAULT_ROUTE else None, entry)
+    except ValueError as e:
+        logger.warning("[Proxy] Invalid route of hostname %s (%s), using %s", vhost, e, DEFAULT_ROUTE[0])
+        return BALANCERS.get(None, DEFAULT_ROUTE)
 
-    :params host (str): IP address of the request target server.
-    :params port (int): port number of the request target server.
+
+def select_upstream(hostname, routes):
+    """
+    Returns the balancer of a virtual host (see :mod:`daemon.balancer`).
+    Hosts matching no host block go to the ``default_server``, or else to
+    ``127.0.0.1:9000``, as do hosts without any ``proxy_pass`` or with an
+    invalid route.
+
+    :params hostname (str): the ``Host`` header of the request.
     :params routes (dict): dictionary mapping hostnames and location.
+
+    :rtype Balancer: the balancer applying the ``dist_policy`` of the host.
     """
+    return host_balancer(*match_route(hostname, routes))
 
-    print(hostname)
-    proxy_map, policy = routes.get(hostname, ('127.0.0.1:9000', 'round-robin'))
-    print(proxy_map)
-    print(policy)
 
-    proxy_host = ''
-    proxy_port = '9000'
-    
-    # Handle the tuple case from get() default value or non-list configuration
-    if isinstance(proxy_map, tuple):
-        proxy_host, proxy_port = proxy_map[0].split(":", 2) if isinstance(proxy_map[0], str) else proxy_map[0].split(":", 2)
-        
-    elif isinstance(proxy_map, list):
-        if len(proxy_map) == 0:
-            print(("[Proxy] Emtpy resolved routing of hostname {}".format(hostname)))
-            print("Empty proxy_map result")
-            # TODO: implement the error handling for non mapped host
-            # Use a dummy host to raise an invalid connection
-            proxy_host = '127.0.0.1'
-            proxy_port = '9000'
-        # Lỗi len(value) đã được đổi thành len(proxy_map)
-        elif len(proxy_map) == 1: 
-            proxy_host, proxy_port = proxy_map[0].split(":", 2)
-        #elif: # apply the policy handling 
-        #   proxy_map
-        #   policy
-        else:
-            # Out-of-handle mapped host, dùng host đầu tiên trong list
-            proxy_host, proxy_port = proxy_map[0].split(":", 2)
-    else:
-        print(("[Proxy] resolve route of hostname {} is a singulair to".format(hostname)))
-        proxy_host, proxy_port = proxy_map.split(":", 2)
+def check_routes(table):
+    """
+    Checks every route of a reloaded :class:`RoutingTable <RoutingTable>`.
+
+    :raises ValueError: on an invalid ``proxy_pass``, ``dist_policy`` or
+                        cache directive.
+    """
+    for hostname, entry in table.routes.items():
+        try:
+            if entry[0]:
+                build_balancer(entry[0], entry[1])
+            if len(entry) > 2:
+                CachePolicy.from_options(entry[2])
+        except ValueError as e:
+            raise ValueError("host {}: {}".format(hostname, e))
+
+
+def resolve_routing_policy(hostname, routes, client_ip=None, headers=None, target=None):
+    """
+    Handles an routing policy to return the matching proxy_pass.
+    It determines the target backend to forward the request to, applying
+    the ``dist_policy`` of the host when it has several ``proxy_pass``.
 
-    return proxy_host, proxy_port
+    :params hostname (str): the ``Host`` header of the request.
+    :params routes (dict): dictionary mapping hostnames and location.
+    :params client_ip (str, optional): client address, for hash policies.
+    :params headers (dict, optional): request headers, for hash policies.
+    :params target (str, optional): request target, for hash policies.
 
-def handle_client(ip, port, conn, addr, routes):
+    :rtype tuple: ``(proxy_host, proxy_port)`` of the chosen backend,
+                  ``(None, None)`` if every upstream of the host is ejected.
+    """
+    balancer = select_upstream(hostname, routes)
+    logger.debug("[Proxy] hostname %s upstreams %s policy %s",
+                 hostname, balancer.upstreams, balancer.name)
+    upstream = balancer.pick(client_ip, headers, target)
+    if upstream is None:
+        return None, None
+    return upstream.host, upstream.port
+
+def handle_client(ip, port, conn, addr, routes, settings=None, pool=None):
     """
     Handles an individual client connection by parsing the request,
     determining the target backend, and forwarding the request.
@@ -132,88 +419,192 @@ def handle_client(ip, port, conn, addr, routes):
     matches the hostname against known routes. In the matching
     condition,it forwards the request to the appropriate backend.
 
-    The handler sends the backend response back to the client or
+    The handler streams the backend response back to the client or
     returns 404 if the hostname is unreachable or is not recognized.
 
+    Hosts with ``proxy_cache on`` answer ``GET``/``HEAD`` requests from
+    :data:`PROXY_RESPONSE_CACHE <daemon.proxycache.PROXY_RESPONSE_CACHE>`
+    when it holds a fresh response (see :mod:`daemon.proxycache`).
+
+    Reading the request, waiting for the backend and writing the response
+    each run under a deadline from ``settings`` (``keepalive_timeout`` for
+    the first byte, then ``header_timeout``, ``body_timeout``,
+    ``upstream_timeout`` and ``write_timeout``), so a slow client or backend
+    cannot hold the thread forever.
+
     :params ip (str): IP address of the proxy server.
     :params port (int): port number of the proxy server.
     :params conn (socket.socket): client connection socket.
     :params addr (tuple): client address (IP, port).
     :params routes (dict): dictionary mapping hostnames and location.
+    :params settings (Settings, optional): deadlines, size limits and the
+                                           ``metrics_path`` answered by the
+                                           proxy itself.
+    :params pool (UpstreamPool, optional): keep-alive backend connections.
     """
     # LƯU Ý: Khối này không sử dụng HttpAdapter mà dùng socket thô để forwarding.
+    settings = settings if settings is not None else Settings()
+    deadline = Deadline(conn)
     
     # Do request có thể rỗng, nên đặt trong try/except.
+    CONNECTIONS.inc("proxy")
     try:
-        request = conn.recv(4096).decode(errors='ignore')
+        request = read_request(conn, settings, deadline)
         if not request:
-            conn.close()
             return
-            
-        hostname = ""
-
-        # Extract hostname
-        for line in request.splitlines():
-            if line.lower().startswith('host:'):
-                hostname = line.split(':', 1)[1].strip()
-                break # Tìm thấy Host, thoát sớm
+        started = time.perf_counter()
 
-        print(("[Proxy] {} at Host: {}".format(addr, hostname)))
+        method, target, version, headers = request[:4]
+        if settings.metrics_path and method == 'GET' and target == settings.metrics_path:
+            deadline.start("write", settings.write_timeout)
+            deadline.apply()
+            conn.sendall(build_metrics_response())
+            return
 
-        # Resolve the matching destination in routes and need conver port
-        # to integer value
-        resolved_host, resolved_port = resolve_routing_policy(hostname, routes)
-        
+        # Extract hostname
+        hostname = headers.get('host', '')
+
+        logger.debug("[Proxy] %s at Host: %s", addr, hostname)
+
+        # Label with the configured virtual host, never the raw Host header
+        name, entry = match_route(hostname, routes)
+        vhost = name if name is not None else "<default>"
+
+        # Resolve the matching destination in routes with the dist_policy
+        # of the host, skipping ejected upstreams. A request that can be
+        # sent twice moves on to another upstream when the first one fails.
+        balancer = host_balancer(name, entry)
+        attempts = 2 if method in IDEMPOTENT_METHODS and request[5].done else 1
+        failed = ()
+        error = (502, "Bad Gateway")
+        upstream = UNROUTED
+        response = None
+
+        # Answer from the response cache of the host when it can.
+        policy = PROXY_RESPONSE_CACHE.policy(vhost, entry[2] if len(entry) > 2 else None)
+        response, exchange = PROXY_RESPONSE_CACHE.lookup(policy, vhost, method, target, headers)
+        if response is not None:
+            upstream = CACHED
+            deadline.start("write", settings.write_timeout)
+            send_buffers(conn, [response], deadline)
+            if exchange is not None:
+                # Served stale: refresh the entry out of this request.
+                threading.Thread(target=refresh_cache,
+                                 args=(balancer, exchange, request[4], addr[0], settings,
+                                       pool if pool is not None else UPSTREAM_POOL),
+                                 daemon=True).start()
+        while response is None:
+            chosen, trial = balancer.acquire(addr[0], headers, target, failed)
+            if chosen is None:
+                if not failed:
+                    logger.warning("[Proxy] No healthy upstream for host %s", hostname)
+                response = send_error(conn, deadline, settings, *error)
+                break
+            upstream = chosen.address
+            ok = None
+            try:
+                logger.debug("[Proxy] Host name %s is forwarded to %s", hostname, upstream)
+                response = forward_request(chosen.host, chosen.port, request,
+                                           conn, settings, deadline, pool, exchange, addr[0])
+                ok = True
+                if exchange is not None:
+                    exchange.finish()
+            except UpstreamError as e:
+                ok = False if e.fault else None
+                error = (e.status_code, e.reason)
+                attempts -= 1
+                if e.sent is not None:
+                    response = e.sent
+                elif attempts == 0:
+                    response = send_error(conn, deadline, settings, *error)
+                failed += (chosen,)
+            finally:
+                balancer.release(chosen, ok, trial)
+        PROXY_REQUESTS.inc(vhost, upstream, response_status(response))
+        PROXY_LATENCY.observe(time.perf_counter() - started, vhost, upstream)
+
+    except RequestError as e:
+        logger.warning("[Proxy] Rejected request from %s: %s", addr, e)
         try:
-            resolved_port = int(resolved_port)
-        except ValueError:
-            print("Not a valid integer port, defaulting to 9000.")
-            resolved_port = 9000
-
-        if resolved_host:
-            print(("[Proxy] Host name {} is forwarded to {}:{}".format(hostname,resolved_host, resolved_port)))
-            response = forward_request(resolved_host, resolved_port, request) 
-        else:
-            response = (
-                "HTTP/1.1 404 Not Found\r\n"
-                "Content-Type: text/plain\r\n"
-                "Content-Length: 13\r\n"
-                "Connection: close\r\n"
-                "\r\n"
-                "404 Not Found"
-            ).encode('utf-8')
-            
-        conn.sendall(response)
-        
+            conn.settimeout(0)
+            conn.send(Response().build_error(e.status_code, e.reason))
+        except OSError:
+            pass
+    except socket.timeout:
+        deadline.expired("proxy")
+        if deadline.phase in ("header", "body"):
+            logger.info("[Proxy] %s deadline exceeded by %s", deadline.phase, addr)
+            try:
+                conn.settimeout(0)
+                conn.send(Response().build_error(408, "Request Timeout"))
+            except OSError:
+                pass
     except Exception as e:
-        print(f"[Proxy Handle Error] {e}")
+        logger.error("[Proxy Handle Error] %s", e)
     finally:
+        CONNECTIONS.dec("proxy")
         conn.close()
 
-def run_proxy(ip, port, routes):
+def run_proxy(ip, port, routes, settings=None, server=None):
     """
     Starts the proxy server and listens for incoming connections. 
 
     The process dinds the proxy server to the specified IP and port.
     In each incomping connection, it accepts the connections and
     spawns a new thread for each client using `handle_client`.
+    With ``settings.engine == "asyncio"``, the connections are served by
+    one event loop instead (see :mod:`daemon.asyncproxy`).
     
 
     :params ip (str): IP address to bind the proxy server.
     :params port (int): port number to listen on.
-    :params routes (dict): dictionary mapping hostnames and location.
+    :params routes (dict): dictionary mapping hostnames and location, or
+                           a :class:`LiveRoutes <LiveRoutes>`. With
+                           ``settings.config_path``, the file is reloaded on
+                           ``SIGHUP`` and when it changes.
+    :params settings (Settings, optional): deadlines, limits, metrics path
+                                           and upstream pool limits.
+    :params server (socket.socket, optional): an already listening socket,
+                                              e.g. from a pre-fork supervisor.
 
     """
-
-    proxy = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    
-    # ✅ FIX: Thiết lập SO_REUSEADDR để tránh lỗi Address already in use khi khởi động lại
-    proxy.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
+    if settings is None:
+        settings = Settings()
+    global UPSTREAM_POOL
+    UPSTREAM_POOL = UpstreamPool(settings.upstream_max_idle,
+                                 settings.upstream_max_per_host,
+                                 settings.upstream_idle_timeout,
+                                 settings.upstream_connect_timeout)
+    HEALTH.configure(settings.max_fails, settings.fail_timeout)
+    PROXY_RESPONSE_CACHE.configure(settings.proxy_cache_bytes, settings.proxy_cache_entry_size)
+    if not isinstance(routes, LiveRoutes):
+        routes = LiveRoutes(routes, settings.config_path)
+    if routes.check is None:
+        routes.check = check_routes
+    # Register the upstreams so that they are probed before their first
+    # request, and check the cache directives of every host.
+    for hostname, entry in routes.routes.items():
+        host_balancer(hostname, entry)
+        PROXY_RESPONSE_CACHE.policy(hostname, entry[2] if len(entry) > 2 else None)
+    HEALTH.start(settings.health_interval, settings.health_timeout, settings.health_path)
+    routes.watch(settings.reload_interval)
+    routes.install_signal_handler()
+
+    if settings.engine == "asyncio":
+        # Imported lazily: the threaded engine does not need asyncio.
+        from .asyncproxy import run_async_proxy
+        run_async_proxy(ip, port, routes, settings, server)
+        return
+
+    proxy = server
     try:
-        proxy.bind((ip, port))
-        proxy.listen(50)
-        print(("[Proxy] Listening on IP {} port {}".format(ip,port)))
+        if proxy is None:
+            proxy = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # ✅ FIX: Thiết lập SO_REUSEADDR để tránh lỗi Address already in use khi khởi động lại
+            proxy.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            proxy.bind((ip, port))
+            proxy.listen(settings.backlog)
+        logger.info("[Proxy] Listening on IP %s port %s", ip, port)
         while True:
             conn, addr = proxy.accept()
             #
@@ -223,21 +614,54 @@ def run_proxy(ip, port, routes):
             #
             client_thread = threading.Thread(
                 target=handle_client,
-                args=(ip, port, conn, addr, routes)
+                args=(ip, port, conn, addr, routes, settings, UPSTREAM_POOL)
             )
             client_thread.daemon = True
             client_thread.start()
             
     except socket.error as e:
-        print(("Socket error: {}".format(e)))
+        logger.error("Socket error: %s", e)
 
-def create_proxy(ip, port, routes):
+def create_proxy(ip, port, routes, **options):
     """
     Entry point for launching the proxy server.
 
     :params ip (str): IP address to bind the proxy server.
     :params port (int): port number to listen on.
     :params routes (dict): dictionary mapping hostnames and location.
+    :params options: :class:`Settings <Settings>` keywords, e.g.
+                     ``metrics_path="/metrics"`` to answer Prometheus metrics,
+                     or the ``header_timeout``/``body_timeout``/
+                     ``write_timeout``/``upstream_timeout`` deadlines, and
+                     the ``upstream_max_idle``/``upstream_max_per_host``/
+                     ``upstream_idle_timeout``/``upstream_connect_timeout``
+                     limits of the backend connection pool, and the
+                     ``health_interval``/``health_timeout``/``health_path``/
+                     ``max_fails``/``fail_timeout`` health checks, and the
+                     ``proxy_cache_bytes``/``proxy_cache_entry_size``
+                     budgets of the response cache. ``engine="asyncio"``
+                     serves every connection from one event loop instead of
+                     a thread each; ``workers=N`` pre-forks N processes
+                     sharing the port. ``config_path`` names the file
+                     ``routes`` was parsed from, reloaded on ``SIGHUP`` and
+                     checked for changes every ``reload_interval`` seconds.
+
+    :raises SystemExit: if ``routes`` is rejected, as a reload would be.
     """
 
-    run_proxy(ip, port, routes)
\ No newline at end of file
+    settings = Settings(**options)
+    configure_logging(settings.log_level, settings.log_debug_sample)
+    # Checked as a reload would be, before any worker is forked.
+    try:
+        table = routing_table(routes)
+        check_routes(table)
+    except ValueError as e:
+        raise SystemExit("[Proxy] Invalid configuration {}: {}".format(
+            settings.config_path or "routes", e))
+    for hostname, entry in table.routes.items():
+        logger.info("[Proxy] route %s %s", hostname, entry)
+    if settings.workers > 1:
+        from .prefork import run_prefork
+        run_prefork(ip, port, routes, settings, run_proxy)
+    else:
+        run_proxy(ip, port, routes, settings)
@@ -0,0 +1,555 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.proxycache
+~~~~~~~~~~~~~~~~~
+
+This module provides the shared HTTP cache of the proxy, enabled per
+virtual host with ``proxy_cache on;`` in ``proxy.conf``. Responses are
+keyed by virtual host, path and query, and the request headers named by
+their ``Vary``; ``HEAD`` requests are answered from ``GET`` entries.
+
+Storage follows the rules of a shared cache:
+
+- only ``GET`` responses with status 200, 203, 301, 404 or 410, complete
+  and no larger than ``proxy_cache_entry_size``;
+- never with ``Cache-Control: no-store`` or ``private``, ``Set-Cookie``,
+  ``Vary: *``, nor for requests carrying ``Authorization``;
+- fresh for ``s-maxage``, ``max-age`` or ``Expires - Date``, else for the
+  ``proxy_cache_valid`` seconds of the host; ``no-cache`` responses are
+  stored when they carry a validator and revalidated on every use.
+
+A stale entry with an ``ETag`` or ``Last-Modified`` is revalidated with a
+conditional request; a ``304`` refreshes it. Within its
+``stale-while-revalidate`` window (from the response, or
+``proxy_cache_stale_while_revalidate`` of the host) it is served at once
+while one background request refreshes it. Entries live in an LRU bounded
+by ``proxy_cache_bytes``.
+
+Results are counted in ``weaprous_proxy_cache_total{vhost,result}``
+(``hit``, ``stale``, ``revalidated``, ``miss``, ``bypass``) and answered
+in an ``X-Cache`` header.
+
+Configuration Example (``config/proxy.conf``):
+----------------------------------------------
+host "app1.local" {
+    proxy_pass http://127.0.0.1:9001;
+    proxy_cache on;
+    proxy_cache_valid 60;
+    proxy_cache_stale_while_revalidate 30;
+}
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+from .metrics import PROXY_CACHE, PROXY_CACHE_BYTES
+
+#: Total bytes kept by the default cache.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+#: Largest response body stored.
+DEFAULT_MAX_ENTRY_SIZE = 1024 * 1024
+#: Statuses cacheable without explicit freshness (heuristically cacheable).
+CACHEABLE_STATUS = (200, 203, 301, 404, 410)
+#: Header lines kept in a ``304 Not Modified`` answered from the cache.
+NOT_MODIFIED_FIELDS = (b"cache-control", b"content-location", b"date", b"etag",
+                       b"expires", b"last-modified", b"vary")
+#: Header lines of the stored response recomputed when it is served.
+COMPUTED_FIELDS = (b"age", b"x-cache")
+#: Request headers replaced by the validators of a stale entry.
+CONDITIONAL_FIELDS = (b"if-none-match", b"if-modified-since")
+
+DIRECTIVE = re.compile(r'([\w-]+)\s*(?:=\s*("[^"]*"|[^,\s]*))?')
+
+
+def parse_cache_control(value):
+    """
+    Parses a ``Cache-Control`` header.
+
+    :rtype dict: lower-cased directive to value (``None`` without value).
+    """
+    directives = {}
+    for name, argument in DIRECTIVE.findall(value or ""):
+        directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def seconds(directives, name):
+    """Returns a delta-seconds directive as an int, or ``None``."""
+    value = directives.get(name)
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
+
+
+def http_timestamp(value):
+    """Returns the timestamp of an HTTP date, or ``None`` if invalid."""
+    if not value:
+        return None
+    # email.utils is slow to import and only needed here.
+    from email.utils import parsedate_to_datetime
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def field_map(fields):
+    """Maps the lower-cased names of header lines to their (last) value."""
+    headers = {}
+    for line in fields:
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower().decode("latin-1")] = value.strip().decode("latin-1")
+    return headers
+
+
+class CacheEntry:
+    """The :class:`CacheEntry <CacheEntry>` object, one stored response.
+
+    :attrs key (tuple): ``(vhost, target, vary values)``.
+    :attrs status_line (bytes): status line of the response.
+    :attrs fields (list): end-to-end header lines, framing excluded.
+    :attrs body (bytes): the response body.
+    :attrs stored (float): ``time.time()`` of the last (re)validation.
+    :attrs initial_age (int): ``Age`` of the response when it was received.
+    :attrs lifetime (int): seconds the entry is fresh.
+    :attrs stale_window (int): seconds it may be served stale while it is
+                               revalidated in the background.
+    :attrs etag (str): entity tag, ``None`` without one.
+    :attrs last_modified (str): ``Last-Modified`` date, ``None`` without one.
+    :attrs refreshing (bool): whether a background revalidation is running.
+    """
+
+    __attrs__ = [
+        "key",
+        "status_line",
+        "fields",
+        "body",
+        "stored",
+        "initial_age",
+        "lifetime",
+        "stale_window",
+        "etag",
+        "last_modified",
+        "refreshing",
+    ]
+
+    def __init__(self, key, status_line, fields, body, policy):
+        self.key = key
+        self.status_line = status_line
+        self.body = body
+        self.refreshing = False
+        self.update(fields, policy)
+
+    def update(self, fields, policy):
+        """Takes the header lines and freshness of a (revalidated) response."""
+        self.fields = [line for line in fields
+                       if line.partition(b":")[0].strip().lower() not in COMPUTED_FIELDS]
+        headers = field_map(fields)
+        self.stored = time.time()
+        age = headers.get("age", "")
+        self.initial_age = int(age) if age.isdigit() else 0
+        self.lifetime, self.stale_window = freshness(headers, policy)
+        self.etag = headers.get("etag")
+        self.last_modified = headers.get("last-modified")
+
+    @property
+    def cost(self):
+        """Bytes charged against the cache budget."""
+        return len(self.body) + sum(len(line) for line in self.fields) + len(self.status_line)
+
+    def age(self, now):
+        return self.initial_age + max(int(now - self.stored), 0)
+
+    def is_fresh(self, now):
+        return self.age(now) < self.lifetime
+
+    def serve_stale(self, now):
+        """Whether it may be served stale while it is revalidated."""
+        return self.age(now) < self.lifetime + self.stale_window
+
+    def render(self, method, result, now, request_headers=None):
+        """
+        Encodes the entry as a response for the client.
+
+        :param method (str): ``GET`` or ``HEAD`` (no body).
+        :param result (str): value of the ``X-Cache`` header.
+        :param request_headers (dict): lower-cased request headers; a
+                                       matching ``If-None-Match`` gives a
+                                       ``304 Not Modified``.
+        """
+        extra = [b"Age: %d" % self.age(now), b"X-Cache: " + result.upper().encode("ascii")]
+        if_none_match = (request_headers or {}).get("if-none-match")
+        if self.etag and if_none_match and (
+                if_none_match.strip() == "*" or self.etag in
+                [tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+                 for tag in if_none_match.split(",")]):
+            fields = [line for line in self.fields
+                      if line.partition(b":")[0].strip().lower() in NOT_MODIFIED_FIELDS]
+            head = [self.status_line.split(b" ", 1)[0] + b" 304 Not Modified"] + fields + extra
+            return b"\r\n".join(head + [b"Connection: close"]) + b"\r\n\r\n"
+
+        head = [self.status_line] + self.fields + extra + [
+            b"Content-Length: %d" % len(self.body), b"Connection: close"]
+        body = self.body if method != "HEAD" else b""
+        return b"\r\n".join(head) + b"\r\n\r\n" + body
+
+
+def freshness(headers, policy):
+    """
+    Computes the freshness of a response.
+
+    :param headers (dict): lower-cased response headers.
+    :param policy (CachePolicy): defaults of the virtual host.
+
+    :rtype tuple: ``(lifetime, stale_window)`` in seconds.
+    """
+    directives = parse_cache_control(headers.get("cache-control"))
+    stale_window = seconds(directives, "stale-while-revalidate")
+    if stale_window is None:
+        stale_window = policy.stale_while_revalidate
+    if "no-cache" in directives:
+        return 0, 0
+
+    lifetime = seconds(directives, "s-maxage")
+    if lifetime is None:
+        lifetime = seconds(directives, "max-age")
+    if lifetime is None and "expires" in headers:
+        expires = http_timestamp(headers["expires"])
+        date = http_timestamp(headers.get("date")) or time.time()
+        lifetime = max(int(expires - date), 0) if expires is not None else 0
+    if lifetime is None:
+        lifetime = policy.valid
+    return lifetime, stale_window
+
+
+class CachePolicy:
+    """The :class:`CachePolicy <CachePolicy>` object, the ``proxy_cache_*``
+    directives of one virtual host.
+
+    :attrs enabled (bool): ``proxy_cache on``.
+    :attrs valid (int): freshness of responses without explicit freshness.
+    :attrs stale_while_revalidate (int): default stale window, in seconds.
+    """
+
+    __attrs__ = [
+        "enabled",
+        "valid",
+        "stale_while_revalidate",
+    ]
+
+    def __init__(self, enabled=False, valid=0, stale_while_revalidate=0):
+        self.enabled = enabled
+        self.valid = valid
+        self.stale_while_revalidate = stale_while_revalidate
+
+    @classmethod
+    def from_options(cls, options):
+        """
+        Builds the policy of a host from its route options.
+
+        :param options (dict): directives of the host block, e.g.
+                               ``{"proxy_cache": "on", "proxy_cache_valid": "60"}``.
+        """
+        return cls(
+            enabled=options.get("proxy_cache", "off").lower() == "on",
+            valid=int(options.get("proxy_cache_valid", 0)),
+            stale_while_revalidate=int(options.get("proxy_cache_stale_while_revalidate", 0)),
+        )
+
+
+#: Policy of the hosts without ``proxy_cache`` directives.
+DISABLED = CachePolicy()
+
+
+class CacheExchange:
+    """The :class:`CacheExchange <CacheExchange>` object, the cache side of
+    one proxied request, handed to :func:`forward_request
+    <daemon.proxy.forward_request>`.
+
+    :attrs vhost (str): the virtual host.
+    :attrs method (str): ``GET`` or ``HEAD``.
+    :attrs target (str): path and query.
+    :attrs headers (dict): lower-cased request headers.
+    :attrs entry (CacheEntry): the stale entry being revalidated, or ``None``.
+    :attrs background (bool): whether it revalidates an entry already served
+                              stale, out of any client request.
+    """
+
+    __attrs__ = [
+        "vhost",
+        "method",
+        "target",
+        "headers",
+        "entry",
+        "background",
+    ]
+
+    def __init__(self, cache, policy, vhost, method, target, headers, entry=None,
+                 background=False):
+        self.vhost = vhost
+        self.method = method
+        self.target = target
+        self.headers = headers
+        self.entry = entry
+        self.background = background
+        self._counted = False
+        self._cache = cache
+        self._policy = policy
+        self._response = None
+        self._body = None
+
+    def prepare(self, payload):
+        """Adds the validators of the stale entry to the request head."""
+        entry = self.entry
+        if entry is None:
+            return payload
+        # The validators of the client are checked against the entry instead.
+        lines = [line for line in payload[:-4].split(b"\r\n")
+                 if line.partition(b":")[0].strip().lower() not in CONDITIONAL_FIELDS]
+        if entry.etag:
+            lines.append(b"If-None-Match: " + entry.etag.encode("latin-1"))
+        if entry.last_modified:
+            lines.append(b"If-Modified-Since: " + entry.last_modified.encode("latin-1"))
+        return b"\r\n".join(lines) + b"\r\n\r\n"
+
+    def on_response(self, response):
+        """
+        Inspects the backend response before it is relayed.
+
+        :param response (UpstreamResponse): the backend response.
+
+        :rtype bytes: the response to send instead (the revalidated entry on
+                      a ``304``), or ``None`` to relay the backend response.
+        """
+        entry = self.entry
+        self._body = None
+        if entry is not None and response.status_code == 304:
+            self._cache.revalidate(entry, self._merge(entry.fields, response.fields),
+                                   self._policy)
+            self._count("revalidated")
+            return entry.render(self.method, "revalidated", time.time(), self.headers)
+
+        self._count("miss")
+        if self.method == "GET" and self._cache.storable(response, self.headers, self._policy):
+            self._response = response
+            self._body = []
+            self._size = 0
+        return None
+
+    def feed(self, data):
+        """Receives a piece of the relayed body."""
+        if self._body is None:
+            return
+        self._size += len(data)
+        if self._size > self._cache.max_entry_size:
+            self._body = None
+        else:
+            self._body.append(data)
+
+    def finish(self):
+        """Stores the response once its body was relayed completely."""
+        if self._body is None:
+            return
+        response = self._response
+        vary = field_map(response.fields).get("vary", "")
+        names = tuple(sorted(name.strip().lower() for name in vary.split(",") if name.strip()))
+        self._cache.store(self.vhost, self.target, names, self.headers,
+                          response.status_line, response.fields, b"".join(self._body),
+                          self._policy)
+        self._body = None
+
+    def _count(self, result):
+        # A background revalidation was counted as "stale" already, and a
+        # retried request is counted once.
+        if not self.background and not self._counted:
+            self._counted = True
+            self._cache.count(self.vhost, result)
+
+    @staticmethod
+    def _merge(fields, updates):
+        names = {line.partition(b":")[0].strip().lower() for line in updates}
+        return [line for line in fields
+                if line.partition(b":")[0].strip().lower() not in names] + list(updates)
+
+
+class ProxyCache:
+    """The :class:`ProxyCache <ProxyCache>` object, a thread-safe LRU of
+    :class:`CacheEntry <CacheEntry>` objects bounded by a byte budget.
+
+    :attrs max_bytes (int): byte budget of all entries.
+    :attrs max_entry_size (int): largest body stored.
+    """
+
+    __attrs__ = [
+        "max_bytes",
+        "max_entry_size",
+    ]
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_size=DEFAULT_MAX_ENTRY_SIZE):
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self._entries = OrderedDict()
+        #: (vhost, target) -> names of the request headers in the key
+        self._vary = {}
+        self._bytes = 0
+        #: vhost -> (route options, CachePolicy)
+        self._policies = {}
+        self._lock = threading.Lock()
+        PROXY_CACHE_BYTES.set_function(lambda: self._bytes)
+
+    def configure(self, max_bytes=None, max_entry_size=None):
+        """Changes the budgets, evicting entries if the cache is now too big."""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_entry_size is not None:
+                self.max_entry_size = max_entry_size
+            self._evict()
+
+    def policy(self, vhost, options):
+        """
+        Returns the :class:`CachePolicy <CachePolicy>` of a virtual host,
+        rebuilt when its route options are replaced.
+
+        :param options (dict): the directives of the host, ``None`` if none.
+        """
+        if not options:
+            return DISABLED
+        cached = self._policies.get(vhost)
+        if cached is None or cached[0] is not options:
+            cached = self._policies[vhost] = (options, CachePolicy.from_options(options))
+        return cached[1]
+
+    def count(self, vhost, result):
+        PROXY_CACHE.inc(vhost, result)
+
+    def lookup(self, policy, vhost, method, target, headers):
+        """
+        Looks a request up.
+
+        :param policy (CachePolicy): directives of the virtual host.
+
+        :rtype tuple: ``(response, exchange)``: the encoded response to serve
+                      now (``None`` on a miss), and the
+                      :class:`CacheExchange <CacheExchange>` to hand to the
+                      backend request (``None`` when the request bypasses the
+                      cache or is answered without one).
+        """
+        if not policy.enabled or method not in ("GET", "HEAD"):
+            return None, None
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives or "authorization" in headers:
+            self.count(vhost, "bypass")
+            return None, None
+
+        now = time.time()
+        with self._lock:
+            names = self._vary.get((vhost, target), ())
+            key = (vhost, target, tuple(headers.get(name, "") for name in names))
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        exchange = CacheExchange(self, policy, vhost, method, target, headers)
+        if entry is None:
+            return None, exchange
+
+        revalidate = "no-cache" in directives or seconds(directives, "max-age") == 0
+        if not revalidate and entry.is_fresh(now):
+            self.count(vhost, "hit")
+            return entry.render(method, "hit", now, headers), None
+        if not revalidate and entry.serve_stale(now):
+            self.count(vhost, "stale")
+            with self._lock:
+                start = not entry.refreshing
+                entry.refreshing = True
+            exchange = CacheExchange(self, policy, vhost, "GET", target, headers, entry, True)
+            return entry.render(method, "stale", now, headers), exchange if start else None
+        if entry.etag or entry.last_modified:
+            exchange.entry = entry
+        return None, exchange
+
+    def storable(self, response, headers, policy):
+        """Whether a backend response to a ``GET`` may be stored."""
+        if response.status_code not in CACHEABLE_STATUS:
+            return False
+        fields = field_map(response.fields)
+        directives = parse_cache_control(fields.get("cache-control"))
+        if "no-store" in directives or "private" in directives or "set-cookie" in fields:
+            return False
+        if fields.get("vary", "").strip() == "*":
+            return False
+        framing = response.framing
+        if framing is not None and framing[0] == "length" and framing[1] > self.max_entry_size:
+            return False
+        lifetime = freshness(fields, policy)[0]
+        return lifetime > 0 or "etag" in fields or "last-modified" in fields
+
+    def store(self, vhost, target, names, headers, status_line, fields, body, policy):
+        """Stores a complete response."""
+        key = (vhost, target, tuple(headers.get(name, "") for name in names))
+        entry = CacheEntry(key, status_line, fields, body, policy)
+        with self._lock:
+            if entry.cost > self.max_bytes:
+                return
+            self._remove(key)
+            self._vary[(vhost, target)] = names
+            self._entries[key] = entry
+            self._bytes += entry.cost
+            self._evict()
+
+    def revalidate(self, entry, fields, policy):
+        """
+        Updates an entry from a ``304 Not Modified``, charging the budget
+        with the size of its new header lines.
+        """
+        with self._lock:
+            cached = self._entries.get(entry.key) is entry
+            if cached:
+                self._bytes -= entry.cost
+            entry.update(fields, policy)
+            if cached:
+                self._bytes += entry.cost
+                self._evict()
+
+    def done(self, exchange):
+        """Ends a background revalidation."""
+        if exchange.entry is not None:
+            exchange.entry.refreshing = False
+
+    def clear(self):
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._bytes = 0
+
+    @property
+    def size(self):
+        """Bytes currently charged against the budget."""
+        return self._bytes
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.cost
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+
+#: Process-wide cache of the proxy.
+PROXY_RESPONSE_CACHE = ProxyCache()
@@ -0,0 +1,330 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.reader
+~~~~~~~~~~~~~~~~~
+
+This module provides an incremental, framing-aware HTTP message reader used
+by the :class:`HttpAdapter <HttpAdapter>` in place of a single ``recv(4096)``.
+
+- :class:`RequestReader <RequestReader>` buffers bytes from a blocking socket,
+  finds the end of the header block as it arrives and keeps any extra bytes
+  (pipelined requests) for the next message.
+- :class:`BodyStream <BodyStream>` delivers a message body framed by
+  ``Content-Length`` or ``Transfer-Encoding: chunked`` (or, for backend
+  responses, by the end of the connection), either all at once or piece by
+  piece for handlers that stream large uploads and for the proxy relay.
+
+Size limits are enforced while reading: an oversized header block raises
+:class:`RequestError <RequestError>` with status 431, an oversized body with
+status 413, malformed framing with status 400. Time is bounded by an optional
+:class:`Deadline <Deadline>` applied before every ``recv``: a slow client
+raises ``socket.timeout`` once the deadline of the current phase passes.
+
+Usage Example:
+--------------
+>>> reader = RequestReader(conn, max_header_size=65536, max_body_size=1048576)
+>>> head = reader.read_head()
+>>> body = reader.body_stream(headers).read()
+"""
+
+#: Bytes requested from the socket per ``recv`` call.
+RECV_SIZE = 16 * 1024
+
+
+class RequestError(Exception):
+    """Raised when an incoming message cannot be framed.
+
+    :attrs status_code (int): HTTP status to answer (400, 413 or 431).
+    :attrs reason (str): HTTP reason phrase matching ``status_code``.
+    """
+
+    def __init__(self, status_code, reason, message=None):
+        super().__init__(message or reason)
+        self.status_code = status_code
+        self.reason = reason
+
+
+def body_framing(headers):
+    """
+    Determines how the body of a message is delimited.
+
+    :param headers (dict): lower-cased request headers.
+
+    :rtype tuple: ``("chunked", None)`` or ``("length", n)``.
+
+    :raises RequestError: if ``Content-Length`` is not a valid integer.
+    """
+    transfer_encoding = headers.get('transfer-encoding', '').lower()
+    if 'chunked' in transfer_encoding:
+        return "chunked", None
+
+    value = headers.get('content-length', '').strip()
+    if not value:
+        return "length", 0
+    if not value.isdigit():
+        raise RequestError(400, "Bad Request", "Invalid Content-Length")
+    return "length", int(value)
+
+
+def parse_chunk_size(line):
+    """
+    Parses the size line of a chunk, ignoring chunk extensions.
+
+    :param line (bytes): the chunk size line without its CRLF.
+
+    :rtype int: size of the chunk data in bytes.
+    """
+    size = line.split(b";", 1)[0].strip()
+    try:
+        return int(size, 16)
+    except ValueError:
+        raise RequestError(400, "Bad Request", "Invalid chunk size")
+
+
+class RequestReader:
+    """The :class:`RequestReader <RequestReader>` object, a buffered reader of
+    HTTP messages from one connection.
+
+    :attrs conn (socket.socket): the blocking client socket.
+    :attrs max_header_size (int): largest accepted header block, in bytes.
+    :attrs max_body_size (int): largest accepted body, in bytes.
+    :attrs deadline (Deadline): deadline applied before each ``recv``, or ``None``.
+    """
+
+    __attrs__ = [
+        "conn",
+        "max_header_size",
+        "max_body_size",
+        "deadline",
+    ]
+
+    def __init__(self, conn, max_header_size, max_body_size, buffer=b"", deadline=None):
+        self.conn = conn
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer = bytearray(buffer)
+        self.deadline = deadline
+
+    def fill(self):
+        """
+        Receives more bytes into the buffer.
+
+        :rtype bool: ``False`` when the peer closed the connection.
+
+        :raises socket.timeout: if the deadline of the current phase passed.
+        """
+        if self.deadline is not None:
+            self.deadline.apply()
+        chunk = self.conn.recv(RECV_SIZE)
+        if not chunk:
+            return False
+        self.buffer += chunk
+        return True
+
+    def read_head(self, idle_timeout=None, header_timeout=None):
+        """
+        Reads one header block (request line and headers), parsing the end of
+        headers incrementally as bytes arrive.
+
+        With a deadline, the wait for the first byte is bounded by
+        ``idle_timeout`` and the rest of the block by ``header_timeout``,
+        counted from that first byte. Without either timeout the current
+        phase of the deadline is kept (e.g. ``upstream`` on the proxy).
+
+        :rtype bytes: the header block without the terminating blank line, or
+                      ``None`` if the connection closed before a full block.
+
+        :raises RequestError: 431 if the block exceeds ``max_header_size``.
+        :raises socket.timeout: if the idle or header deadline passed.
+        """
+        deadline = self.deadline
+        if idle_timeout is None and header_timeout is None:
+            deadline = None
+        if deadline is not None:
+            if self.buffer:
+                deadline.start("header", header_timeout)
+            else:
+                deadline.start("idle", idle_timeout)
+        searched = 0
+        while True:
+            # Tolerate stray CRLFs between pipelined requests.
+            while self.buffer[:2] == b"\r\n":
+                del self.buffer[:2]
+
+            end = self.buffer.find(b"\r\n\r\n", max(searched - 3, 0))
+            if end >= 0:
+                break
+            if len(self.buffer) > self.max_header_size:
+                raise RequestError(431, "Request Header Fields Too Large")
+            searched = len(self.buffer)
+            if not self.fill():
+                return None
+            if deadline is not None and deadline.phase == "idle":
+                deadline.start("header", header_timeout)
+
+        if end > self.max_header_size:
+            raise RequestError(431, "Request Header Fields Too Large")
+
+        head = bytes(self.buffer[:end])
+        del self.buffer[:end + 4]
+        return head
+
+    def read_exact(self, size):
+        """
+        Reads exactly ``size`` bytes.
+
+        :raises RequestError: 400 if the connection closes early.
+        """
+        while len(self.buffer) < size:
+            if not self.fill():
+                raise RequestError(400, "Bad Request", "Truncated body")
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def read_some(self, limit):
+        """Reads between 1 and ``limit`` bytes, receiving only if the buffer is empty."""
+        if not self.buffer and not self.fill():
+            raise RequestError(400, "Bad Request", "Truncated body")
+        data = bytes(self.buffer[:limit])
+        del self.buffer[:limit]
+        return data
+
+    def read_line(self):
+        """Reads one CRLF-terminated line, returned without its CRLF."""
+        searched = 0
+        while True:
+            end = self.buffer.find(b"\r\n", max(searched - 1, 0))
+            if end >= 0:
+                break
+            if len(self.buffer) > self.max_header_size:
+                raise RequestError(400, "Bad Request", "Chunk line too long")
+            searched = len(self.buffer)
+            if not self.fill():
+                raise RequestError(400, "Bad Request", "Truncated chunk")
+        line = bytes(self.buffer[:end])
+        del self.buffer[:end + 2]
+        return line
+
+    def body_stream(self, headers):
+        """
+        Returns a :class:`BodyStream <BodyStream>` over the body described by
+        the given (lower-cased) request headers.
+        """
+        mode, length = body_framing(headers)
+        if mode == "length" and length > self.max_body_size:
+            raise RequestError(413, "Payload Too Large")
+        return BodyStream(self, mode, length)
+
+
+class BodyStream:
+    """The :class:`BodyStream <BodyStream>` object, a file-like view of one
+    message body. Route handlers registered with ``stream=True`` receive it as
+    their ``body`` argument and can read it incrementally::
+
+      >>> for piece in body:
+      >>>     sink.write(piece)
+
+    :attrs mode (str): ``"length"``, ``"chunked"`` or ``"close"`` (until the
+                       peer closes; responses only).
+    :attrs length (int): declared size for ``"length"`` bodies.
+    :attrs received (int): bytes delivered so far.
+    """
+
+    __attrs__ = [
+        "mode",
+        "length",
+        "received",
+    ]
+
+    def __init__(self, reader, mode, length):
+        self._reader = reader
+        self.mode = mode
+        self.length = length
+        self.received = 0
+        self._chunk_left = 0
+        self._done = mode == "length" and not length
+
+    @property
+    def done(self):
+        """``True`` once the whole body has been read."""
+        return self._done
+
+    def _account(self, data):
+        self.received += len(data)
+        if self.received > self._reader.max_body_size:
+            raise RequestError(413, "Payload Too Large")
+        return data
+
+    def read_chunk(self, size=RECV_SIZE):
+        """
+        Reads the next piece of the body, at most ``size`` bytes.
+
+        :rtype bytes: the piece, or ``b""`` at the end of the body.
+        """
+        if self._done:
+            return b""
+
+        if self.mode == "close":
+            if not self._reader.buffer and not self._reader.fill():
+                self._done = True
+                return b""
+            return self._account(self._reader.read_some(size))
+
+        if self.mode == "length":
+            left = self.length - self.received
+            data = self._account(self._reader.read_some(min(size, left)))
+            if self.received >= self.length:
+                self._done = True
+            return data
+
+        if self._chunk_left == 0:
+            self._chunk_left = parse_chunk_size(self._reader.read_line())
+            if self._chunk_left == 0:
+                # Last chunk: skip optional trailers up to the blank line.
+                while self._reader.read_line():
+                    pass
+                self._done = True
+                return b""
+
+        data = self._account(self._reader.read_some(min(size, self._chunk_left)))
+        self._chunk_left -= len(data)
+        if self._chunk_left == 0:
+            if self._reader.read_exact(2) != b"\r\n":
+                raise RequestError(400, "Bad Request", "Missing chunk terminator")
+        return data
+
+    def read(self, size=-1):
+        """
+        Reads up to ``size`` bytes, or the rest of the body if ``size`` < 0.
+        """
+        if size is not None and size >= 0:
+            return self.read_chunk(size)
+        if self.mode == "length":
+            data = self._account(self._reader.read_exact(self.length - self.received))
+            self._done = True
+            return data
+        return b"".join(iter(self))
+
+    def __iter__(self):
+        while True:
+            data = self.read_chunk()
+            if not data:
+                return
+            yield data
+
+    def drain(self):
+        """Discards the unread rest of the body so the next request can be read."""
+        for _ in self:
+            pass
@@ -16,8 +16,70 @@ daemon.request
 
 This module provides a Request object to manage and persist 
 request settings (cookies, auth, proxies).
+
+The header block is parsed in a single pass by
+:func:`parse_head`: request line, path, query string and lower-cased headers
+are produced at once, and cookies are only parsed when first accessed.
 """
 from .dictionary import CaseInsensitiveDict
+from .reader import RequestError
+from .logger import get_logger, redact_cookies
+import logging
+
+logger = get_logger(__name__)
+
+
+def parse_head(data):
+    """
+    Parses a request header block in a single pass.
+
+    The raw bytes are decoded once, split once into lines and each header
+    line is partitioned once on its first colon: no line is scanned or
+    decoded twice.
+
+    :param data (bytes): the header block without the terminating blank line
+                         (an already decoded ``str`` is accepted).
+
+    :rtype tuple: ``(method, target, version, headers)``; header names are
+                  lower-cased, a repeated header keeps its last value.
+
+    :raises RequestError: 400 if the request line is malformed.
+    """
+    if not isinstance(data, str):
+        data = data.decode('utf-8', errors='ignore')
+    lines = data.split("\r\n")
+
+    parts = lines[0].split()
+    if len(parts) != 3:
+        raise RequestError(400, "Bad Request", "Malformed request line")
+    method, target, version = parts
+
+    headers = {}
+    for index in range(1, len(lines)):
+        name, colon, value = lines[index].partition(":")
+        if colon and name:
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def parse_cookies(cookie_header):
+    """
+    Parses a ``Cookie`` header value into a dictionary.
+
+    :param cookie_header (str): the header value, e.g. ``"auth=true; sid=1"``.
+
+    :rtype dict: cookie names to values, both stripped.
+    """
+    cookies = {}
+    if not cookie_header:
+        return cookies
+    for pair in cookie_header.split(';'):
+        key, _, value = pair.partition('=')
+        key = key.strip()
+        if key:
+            cookies[key] = value.strip()
+    return cookies
+
 
 class Request():
     """The fully mutable "class" `Request <Request>` object,
@@ -27,6 +89,9 @@ class Request():
     should not be instantiated manually; doing so may produce undesirable
     effects.
 
+    Attributes are declared in ``__slots__``: a request is created per
+    message, so it carries no per-instance ``__dict__``.
+
     Usage::
 
       >>> import deamon.request
@@ -39,15 +104,37 @@ class Request():
     __attrs__ = [
         "method",
         "url",
+        "path",
+        "query",
+        "version",
         "headers",
         "body",
-        "reason",
         "cookies",
-        "body",
         "routes",
         "hook",
+        "params",
+        "allowed",
+        "route",
+        "timings",
     ]
 
+    __slots__ = (
+        "method",
+        "url",
+        "path",
+        "query",
+        "version",
+        "headers",
+        "body",
+        "routes",
+        "hook",
+        "params",
+        "allowed",
+        "route",
+        "timings",
+        "_cookies",
+    )
+
     def __init__(self):
         #: HTTP verb to send to the server.
         self.method = None
@@ -57,78 +144,82 @@ class Request():
         self.headers = None
         #: HTTP path
         self.path = None 
-        # The cookies set used to create Cookie header
-        self.cookies = None
+        #: Query string, without the leading '?'
+        self.query = ''
+        #: HTTP version
+        self.version = None
+        # The cookies set used to create Cookie header (parsed on first access)
+        self._cookies = None
         #: request body to send to the server.
         self.body = None
         #: Routes
         self.routes = {}
         #: Hook point for routed mapped-path
         self.hook = None
+        #: Path parameters captured by the matched route
+        self.params = {}
+        #: Methods allowed on the path when only the method did not match
+        self.allowed = None
+        #: Route pattern that matched, e.g. ``/channels/<name>/members``
+        self.route = None
+        #: Own time of each middleware stage in seconds, set by dispatch
+        self.timings = None
+
+    @property
+    def cookies(self):
+        """Request cookies, parsed from the ``Cookie`` header on first access."""
+        if self._cookies is None:
+            self._cookies = parse_cookies((self.headers or {}).get('cookie'))
+        return self._cookies
+
+    @cookies.setter
+    def cookies(self, cookies):
+        self._cookies = cookies
 
     def extract_request_line(self, request):
+        """Returns ``(method, path, version)`` of a raw header block."""
         try:
-            lines = request.splitlines()
-            first_line = lines[0]
-            method, path, version = first_line.split()
-
-            if path == '/':
-                path = '/index.html'
-        except Exception:
-            return None, None
-
+            method, target, version, _ = parse_head(request)
+        except RequestError:
+            return None, None, None
+        path = target.split('?', 1)[0]
+        if path == '/':
+            path = '/index.html'
         return method, path, version
             
     def prepare_headers(self, request):
         """Prepares the given HTTP headers."""
-        lines = request.split('\r\n')
-        headers = {}
-        for line in lines[1:]:
-            if ': ' in line:
-                # Sửa: split(': ', 1) để đảm bảo key không bị thừa khoảng trắng
-                key, val = line.split(': ', 1)
-                headers[key.lower()] = val.strip() # Sửa: Strip giá trị để làm sạch
-        return headers
+        return parse_head(request)[3]
 
     def prepare(self, request, routes=None):
-        """Prepares the entire request with the given parameters."""
+        """Prepares the entire request with the given parameters.
+
+        :param request (bytes): the raw header block (``str`` is accepted).
+        :param routes (dict): route handlers, a :class:`Router <Router>` or a dict.
+
+        :raises RequestError: 400 if the request line is malformed.
+        """
 
-        # Prepare the request line from the request header
-        self.method, self.path, self.version = self.extract_request_line(request)
-        print(("[Request] {} path {} version {}".format(self.method, self.path, self.version)))
+        # Single pass over the header block
+        self.method, self.url, self.version, self.headers = parse_head(request)
+        path, _, self.query = self.url.partition('?')
+        if path == '/':
+            path = '/index.html'
+        self.path = path
+        logger.debug("[Request] %s path %s version %s", self.method, self.path, self.version)
 
         # Routing logic (giữ nguyên)
-        if not routes == {}:
+        if routes:
             self.routes = routes
-            self.hook = routes.get((self.method, self.path))
-
-        self.headers = self.prepare_headers(request)
-        
-        # --- BẮT ĐẦU PHẦN SỬA LỖI PARSING COOKIE TRONG REQUEST.PY ---
-        self.cookies = {}
-        cookie_string = self.headers.get('cookie', '')
-
-        # Phân tích chuỗi cookie nếu nó tồn tại
-        if cookie_string:
-            # Tách các cặp key=value bằng dấu '; ' hoặc ';'
-            pairs = cookie_string.split('; ')
-            if len(pairs) == 1:
-                 pairs = cookie_string.split(';')
-
-            for pair in pairs:
-                # Tách key và value, giới hạn 1 lần tách
-                if '=' in pair:
-                    key, value = pair.split('=', 1)
-                    
-                    # LƯU Ý QUAN TRỌNG: Làm sạch key và value
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    # Lưu key và value đã được làm sạch
-                    self.cookies[key] = value
-        
-        print(f"[Request] Cookies found: {self.cookies}")
-        # --- KẾT THÚC PHẦN SỬA ---
+            if hasattr(routes, 'lookup'):
+                # Compiled router: path parameters and 405 detection
+                self.hook, self.params, self.allowed, self.route = routes.lookup(self.method, self.path)
+            else:
+                self.hook = routes.get((self.method, self.path))
+                self.route = self.path if self.hook else None
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Request] Cookies found: %s", redact_cookies(self.cookies))
 
         return
 
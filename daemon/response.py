@@ -18,15 +18,180 @@ This module provides a :class: `Response <Response>` object to manage and persis
 response settings (cookies, auth, proxies), and to construct HTTP responses
 based on incoming requests. 
 
-The current version supports MIME type detection, content loading and header formatting
+The current version supports MIME type detection, content loading and header formatting.
+Static files are served through the process-wide asset cache
+(:mod:`daemon.assetcache`): small files come from memory with pre-encoded
+headers, large ones are streamed by :meth:`Response.send_body` with
+``os.sendfile`` (or mmap-backed chunked writes where sendfile is unavailable).
+Conditional requests (``If-None-Match``/``If-Modified-Since``) get a body-less
+``304 Not Modified``.
+
+Route handlers may also return a :class:`Response <Response>` (or a dict,
+bytes or str that :func:`make_response` wraps into one): JSON is encoded once
+straight to UTF-8 bytes, status lines and the ``Date`` header are cached,
+and :meth:`Response.serialize` yields the header block and the body as
+separate buffers for a single vectored send (:func:`send_buffers`).
 """
 import datetime
 import os
+import json
+import mmap
+import time
 import mimetypes
+from http import HTTPStatus
 from .dictionary import CaseInsensitiveDict
+from .assetcache import ASSET_CACHE, format_http_date
+from .compression import negotiate, compress, is_compressible, DEFAULT_MIN_SIZE
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 BASE_DIR = ""
 
+#: Size of the slices written by the mmap fallback of :meth:`Response.send_body`.
+SEND_CHUNK_SIZE = 64 * 1024
+
+#: Encoded status lines by status code, e.g. ``{200: b"HTTP/1.1 200 OK\r\n"}``.
+STATUS_LINES = {}
+
+#: ``(second, value)`` of the last formatted ``Date`` header.
+_date_cache = (0, "")
+
+#: Shared encoder for handler results: compact, UTF-8 kept as is.
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+#: Headers of a handler response always written by :meth:`Response.serialize`.
+SERIALIZED_HEADERS = frozenset(("content-length", "connection", "keep-alive", "date"))
+
+JSON_TYPE = "application/json; charset=utf-8"
+HTML_TYPE = "text/html; charset=utf-8"
+BINARY_TYPE = "application/octet-stream"
+
+
+def reason_phrase(status_code):
+    """Returns the standard reason phrase of a status code, e.g. ``"Not Found"``."""
+    try:
+        return HTTPStatus(status_code).phrase
+    except ValueError:
+        return "Unknown"
+
+
+def status_line(status_code, reason=None):
+    """
+    Returns the encoded status line (CRLF included) of a status code. Lines
+    with the standard reason phrase are built once and cached.
+
+    :param status_code (int): HTTP status code.
+    :param reason (str): reason phrase, ``None`` for the standard one.
+
+    :rtype bytes: e.g. ``b"HTTP/1.1 404 Not Found\r\n"``.
+    """
+    line = STATUS_LINES.get(status_code)
+    if line is None:
+        line = "HTTP/1.1 {} {}\r\n".format(status_code, reason_phrase(status_code)).encode('latin-1')
+        STATUS_LINES[status_code] = line
+    if reason is None or line[13:-2] == reason.encode('latin-1', errors='replace'):
+        return line
+    return "HTTP/1.1 {} {}\r\n".format(status_code, reason).encode('latin-1', errors='replace')
+
+
+def http_date():
+    """
+    Returns the value of the ``Date`` header for the current second; it is
+    formatted at most once per second.
+
+    :rtype str: e.g. ``"Sun, 18 Oct 2026 08:00:00 GMT"``.
+    """
+    global _date_cache
+    second = int(time.time())
+    cached = _date_cache
+    if cached[0] != second:
+        cached = (second, format_http_date(second))
+        _date_cache = cached
+    return cached[1]
+
+
+def encode_json(data):
+    """Encodes a JSON-serialisable value into UTF-8 bytes."""
+    return JSON_ENCODER.encode(data).encode('utf-8')
+
+
+def make_response(result, response=None):
+    """
+    Converts the value returned by a route handler into a response.
+
+    Accepted values: a :class:`Response <Response>`; a dict or list (sent as
+    JSON); bytes (``application/octet-stream``); a str (``text/html``); or a
+    ``(body, status_code)`` / ``(body, status_code, headers)`` tuple of any of
+    these. A str starting with ``HTTP/`` is a raw response assembled by the
+    handler and is only encoded.
+
+    :param result: the handler return value.
+    :param response (Response): response to fill instead of a new one, e.g.
+                                the one the adapter prepared for the request.
+
+    :rtype Response or bytes: a :class:`Response <Response>`, or the encoded
+                              raw response.
+    """
+    status_code, headers = 200, None
+    if isinstance(result, tuple):
+        if len(result) == 3:
+            result, status_code, headers = result
+        else:
+            result, status_code = result
+
+    if isinstance(result, Response):
+        response = result
+    elif isinstance(result, str) and result.startswith("HTTP/"):
+        # Phản hồi thô do handler tự dựng (kiểu cũ)
+        return result.encode('utf-8')
+    else:
+        if response is None:
+            response = Response()
+        response.set_body(result)
+
+    if status_code != 200:
+        response.set_status(status_code)
+    if headers:
+        for name, value in headers.items():
+            response.headers[name] = value
+    return response
+
+
+def send_buffers(conn, buffers, deadline=None):
+    """
+    Writes several buffers to a socket with vectored ``sendmsg`` calls, so the
+    header block and the body go out without being concatenated first. Falls
+    back to ``sendall`` where ``sendmsg`` is not available.
+
+    :params conn (socket.socket): client connection socket.
+    :params buffers (list): bytes-like objects, written in order.
+    :params deadline (Deadline): write deadline applied before each call.
+
+    :raises socket.timeout: if the client does not read before the deadline.
+    """
+    if deadline is not None:
+        deadline.apply()
+    if len(buffers) == 1:
+        conn.sendall(buffers[0])
+        return
+    if not hasattr(conn, 'sendmsg'):
+        conn.sendall(b"".join(buffers))
+        return
+    pending = [memoryview(buf) for buf in buffers if buf]
+    while pending:
+        if deadline is not None:
+            deadline.apply()
+        sent = conn.sendmsg(pending)
+        while sent:
+            first = pending[0]
+            if sent >= len(first):
+                sent -= len(first)
+                del pending[0]
+            else:
+                pending[0] = first[sent:]
+                sent = 0
+
 class Response(): 
     """The :class:`Response <Response>` object, which contains a
     server's response to an HTTP request.
@@ -76,11 +241,15 @@ class Response():
     ]
 
 
-    def __init__(self, request=None):
+    def __init__(self, request=None, body=None, status_code=200, headers=None):
         """
         Initializes a new :class:`Response <Response>` object.
 
         : params request : The originating request object.
+        : params body : content returned by a route handler: dict or list
+                        (JSON), bytes or str (see :meth:`set_body`).
+        : params status_code (int): HTTP status code of a handler response.
+        : params headers (dict): extra headers of a handler response.
         """
 
         self._content = False
@@ -120,6 +289,147 @@ class Response():
         self.cookies_to_set = CaseInsensitiveDict() 
         self._header_sent = False # Cờ kiểm tra header đã được gửi chưa
 
+        #: Whether the connection stays open after this response (HTTP/1.1
+        #: keep-alive), decided by the :class:`HttpAdapter <HttpAdapter>`.
+        self.keep_alive = False
+
+        #: Path of a file whose content is the body still to be sent after the
+        #: header (see :meth:`send_body`), and its size in bytes.
+        self.body_file = None
+        self.body_length = 0
+
+        #: Pre-encoded header lines of a cached static file, status line
+        #: included; :meth:`serialize` adds the per-request ones.
+        self._header = None
+
+        #: Smallest body served compressed, or ``None`` to disable compression.
+        self.compress_min_size = DEFAULT_MIN_SIZE
+
+        if status_code != 200:
+            self.set_status(status_code)
+        if headers:
+            self.headers.update(headers)
+        if body is not None:
+            self.set_body(body)
+
+    @classmethod
+    def json(cls, data, status_code=200, headers=None):
+        """
+        Builds a JSON response, e.g. ``return Response.json({"ok": True}, 201)``.
+
+        :params data: JSON-serialisable value.
+        :params status_code (int): HTTP status code.
+        :params headers (dict): extra headers.
+        """
+        return cls(body=data, status_code=status_code, headers=headers)
+
+    def set_status(self, status_code, reason=None):
+        """Sets the status code and its reason phrase (standard one by default)."""
+        self.status_code = status_code
+        self.reason = reason or reason_phrase(status_code)
+
+    def set_body(self, body, content_type=None):
+        """
+        Sets the content of a handler response. Dicts and lists are encoded as
+        JSON once, straight to bytes; str is encoded as UTF-8. The
+        ``Content-Type`` is derived from a non-empty body unless already set.
+
+        :params body (dict, list, bytes or str): the content.
+        :params content_type (str): explicit ``Content-Type``.
+        """
+        if isinstance(body, (dict, list)):
+            self._content = encode_json(body)
+            default_type = JSON_TYPE
+        elif isinstance(body, str):
+            self._content = body.encode('utf-8')
+            default_type = HTML_TYPE
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            self._content = body
+            default_type = BINARY_TYPE
+        else:
+            raise TypeError("Unsupported response body: {}".format(type(body).__name__))
+        if content_type:
+            self.headers['Content-Type'] = content_type
+        elif self._content and 'Content-Type' not in self.headers:
+            self.headers['Content-Type'] = default_type
+
+    @property
+    def content(self):
+        """Encoded body of a handler response (``b""`` if there is none)."""
+        return self._content or b""
+
+    def compress_body(self, coding, min_size):
+        """
+        Compresses the body of a handler response in place when its
+        ``Content-Type`` is textual and it is at least ``min_size`` bytes;
+        such responses also get ``Vary: Accept-Encoding``.
+
+        :params coding (str): negotiated coding, or ``None`` for identity.
+        :params min_size (int): smallest body worth compressing.
+        """
+        body = self.content
+        if (len(body) < min_size or self.status_code in (204, 304)
+                or 'Content-Encoding' in self.headers
+                or not is_compressible(self.headers.get('Content-Type'))):
+            return
+        vary = self.headers.get('Vary')
+        if not vary:
+            self.headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower() and vary.strip() != '*':
+            self.headers['Vary'] = vary + ', Accept-Encoding'
+        if coding is None:
+            return
+        encoded = compress(bytes(body), coding)
+        if len(encoded) < len(body):
+            self._content = encoded
+            self.headers['Content-Encoding'] = coding
+
+    def serialize(self, keepalive_timeout=None):
+        """
+        Encodes a handler response for sending. The status line comes from
+        the cache, ``Date`` is formatted at most once per second, and
+        ``Content-Length``/``Connection`` always match the body and
+        :attr:`keep_alive`, whatever the handler set.
+
+        :params keepalive_timeout (float): advertised in ``Keep-Alive`` when
+                                           the connection stays open.
+
+        :rtype list: ``[header_block, body]``, for :func:`send_buffers`.
+        """
+        if self._header is not None:
+            # Static file: the cached body is sent as is, never copied.
+            head = self._header + (self.build_dynamic_headers(keepalive_timeout)
+                                   + "\r\n").encode('utf-8')
+            return [head, self._content] if self._content else [head]
+        body = self.content
+        status_code = self.status_code
+        bodyless = status_code in (204, 304) or status_code < 200
+        if bodyless:
+            body = b""
+        lines = []
+        for key, value in self.headers.items():
+            if key not in SERIALIZED_HEADERS:
+                # CaseInsensitiveDict giữ tên viết thường; gửi dạng chuẩn
+                lines.append(f"{key.title()}: {value}\r\n")
+        for cookie_string in self.cookies_to_set.values():
+            lines.append(f"Set-Cookie: {cookie_string}\r\n")
+        if not bodyless:
+            lines.append(f"Content-Length: {len(body)}\r\n")
+        lines.append(f"Date: {http_date()}\r\n")
+        if self.keep_alive:
+            lines.append("Connection: keep-alive\r\n")
+            if keepalive_timeout:
+                lines.append(f"Keep-Alive: timeout={int(keepalive_timeout)}\r\n")
+        else:
+            lines.append("Connection: close\r\n")
+        lines.append("\r\n")
+        return [status_line(status_code, self.reason) + "".join(lines).encode('utf-8'), body]
+
+    @property
+    def connection(self):
+        """Value of the ``Connection`` header matching :attr:`keep_alive`."""
+        return 'keep-alive' if self.keep_alive else 'close'
+
     # ✅ FIX: Phương thức set_cookie để HttpAdapter gọi (Task 1A)
     def set_cookie(self, key, value, path='/', max_age=None):
         """Lưu một cookie để đưa vào Set-Cookie header."""
@@ -165,7 +475,7 @@ class Response():
 
         # Processing mime_type based on main_type and sub_type
         main_type, sub_type = mime_type.split('/', 1)
-        print(("[Response] processing MIME main_type={} sub_type={}".format(main_type,sub_type)))
+        logger.debug("[Response] processing MIME main_type=%s sub_type=%s", main_type, sub_type)
         if main_type == 'text':
             self.headers['Content-Type']='text/{}'.format(sub_type)
             if sub_type == 'plain' or sub_type == 'css' or sub_type == 'javascript':
@@ -205,19 +515,82 @@ class Response():
 
         full_path = os.path.join(base_dir, filepath)
 
-        print(("[Response] serving the object at location {}".format(full_path)))
+        logger.debug("[Response] serving the object at location %s", full_path)
         
         try:
             # Mở file ở chế độ đọc nhị phân ('rb')
             with open(full_path, 'rb') as f:
                 content = f.read()
         except FileNotFoundError:
-            print(f"[Error] File not found: {full_path}")
+            logger.info("[Error] File not found: %s", full_path)
             # Trả về nội dung lỗi để build_response biết mà gọi build_notfound
             return 0, b"404 Not Found"
             
         return len(content), content
 
+    def locate_content(self, path, base_dir):
+        """
+        Resolves the file serving ``path`` without reading it.
+
+        :params path (str): request path.
+        :params base_dir (str): base directory returned by :meth:`prepare_content_type`.
+
+        :rtype tuple: ``(full_path, size)``, or ``(None, 0)`` if there is no such file.
+        """
+        if path.startswith('/static/'):
+            filepath = path[8:]
+        elif path.startswith('/www/'):
+            filepath = path[5:]
+        else:
+            filepath = path.lstrip('/')
+
+        full_path = os.path.join(base_dir, filepath)
+        logger.debug("[Response] serving the object at location %s", full_path)
+
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            logger.info("[Error] File not found: %s", full_path)
+            return None, 0
+        if not os.path.isfile(full_path):
+            return None, 0
+        return full_path, st.st_size
+
+    def send_body(self, conn, deadline=None):
+        """
+        Writes the pending file body (set by :meth:`build_response`) to the
+        socket after the header has been sent. Uses ``os.sendfile`` through
+        ``socket.sendfile`` so the file never goes through the Python heap;
+        without sendfile support, writes slices of a read-only mmap.
+
+        :params conn (socket.socket): client connection socket.
+        :params deadline (Deadline): write deadline; ``socket.sendfile``
+                                     applies the time left to each wait.
+
+        :raises OSError: if the file could not be sent completely.
+        """
+        if self.body_file is None or self.body_length == 0:
+            return
+        if deadline is not None:
+            deadline.apply()
+
+        with open(self.body_file, 'rb') as f:
+            if hasattr(os, 'sendfile'):
+                sent = conn.sendfile(f, 0, self.body_length)
+            else:
+                sent = 0
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    end = min(self.body_length, len(mapped))
+                    while sent < end:
+                        if deadline is not None:
+                            deadline.apply()
+                        with memoryview(mapped)[sent:min(sent + SEND_CHUNK_SIZE, end)] as piece:
+                            conn.sendall(piece)
+                            sent += len(piece)
+
+        if sent != self.body_length:
+            raise OSError("File {} changed while being sent".format(self.body_file))
+
     def build_response_header(self, request):
         """
         Constructs the HTTP response headers based on the class:`Request <Request>
@@ -232,15 +605,14 @@ class Response():
              self.headers['Content-Length'] = len(self._content)
 
         # Cập nhật trạng thái và lý do (dùng self.status_code và self.reason)
-        status_line = f"HTTP/1.1 {self.status_code} {self.reason}\r\n"
         header_lines = []
 
         # Thêm các header chuẩn (giữ nguyên các header động/tĩnh cần thiết)
         # Khởi tạo headers mặc định nếu chưa có
         if not self.headers.get('Date'):
-            self.headers['Date'] = datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+            self.headers['Date'] = http_date()
         if not self.headers.get('Connection'):
-             self.headers['Connection'] = 'close'
+             self.headers['Connection'] = self.connection
 
         # Thêm các header từ self.headers
         for key, value in self.headers.items():
@@ -250,9 +622,8 @@ class Response():
         for cookie_key, cookie_string in self.cookies_to_set.items():
             header_lines.append(f"Set-Cookie: {cookie_string}")
         
-        # Thêm Connection: close nếu chưa có (để đảm bảo đóng kết nối)
 
-        return (status_line + "\r\n".join(header_lines) + "\r\n\r\n").encode('utf-8')
+        return status_line(self.status_code, self.reason) + ("\r\n".join(header_lines) + "\r\n\r\n").encode('utf-8')
 
 
     def build_notfound(self):
@@ -267,7 +638,7 @@ class Response():
             "HTTP/1.1 404 Not Found\r\n"
             "Content-Type: text/html\r\n"
             f"Content-Length: {len(content)}\r\n"
-            "Connection: close\r\n"
+            f"Connection: {self.connection}\r\n"
             "\r\n"
             ).encode('utf-8') + content
     
@@ -291,20 +662,100 @@ class Response():
             "\r\n"
         ).encode("utf-8") + content
 
+    def build_error(self, status_code, reason):
+        """
+        Constructs a minimal HTTP error response for requests rejected before
+        routing (e.g. 400 Bad Request, 413 Payload Too Large). The connection
+        is always closed afterwards.
+
+        :params status_code (int): HTTP status code.
+        :params reason (str): HTTP reason phrase.
+
+        :rtype bytes: Encoded error response.
+        """
+        self.status_code = status_code
+        self.reason = reason
+        content = f"<h1>{status_code} {reason}</h1>".encode("utf-8")
+
+        return (
+            f"HTTP/1.1 {status_code} {reason}\r\n"
+            "Content-Type: text/html\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).encode("utf-8") + content
+
+    def build_method_not_allowed(self, allowed):
+        """
+        Constructs a 405 Method Not Allowed HTTP response for a path routed
+        only for other methods.
+
+        :params allowed (list): methods accepted on the path.
+
+        :rtype bytes: Encoded 405 response.
+        """
+        self.status_code = 405
+        self.reason = "Method Not Allowed"
+        content = b"<h1>405 Method Not Allowed</h1>"
+
+        return (
+            "HTTP/1.1 405 Method Not Allowed\r\n"
+            "Content-Type: text/html\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Allow: {', '.join(allowed)}\r\n"
+            f"Connection: {self.connection}\r\n"
+            "\r\n"
+        ).encode("utf-8") + content
+
+    def build_unavailable(self, retry_after=1):
+        """
+        Constructs a standard 503 Service Unavailable HTTP response, used when
+        the backend is overloaded and sheds a connection.
+
+        :params retry_after (int): seconds the client should wait before retrying.
+
+        :rtype bytes: Encoded 503 response.
+        """
+        self.status_code = 503
+        self.reason = "Service Unavailable"
+        content = b"<h1>503 Service Unavailable</h1><p>Server is busy, please retry.</p>"
+
+        return (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            "Content-Type: text/html\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Retry-After: {retry_after}\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).encode("utf-8") + content
+
 
     def build_response(self, request):
         """
-        Builds a full HTTP response including headers and content based on the request.
+        Builds the HTTP response for a static file request.
+
+        The file is looked up in the asset cache first; on a miss the MIME type
+        and location are resolved and the file is loaded into the cache. Small
+        files are answered from memory; for large files only the header is
+        sent (with ``Content-Length`` taken from the file size) and the body is
+        left pending in :attr:`body_file` for :meth:`send_body`. Error
+        responses (404) are returned complete.
 
         :params request (class:`Request <Request>`): incoming request object.
 
-        :rtype bytes: complete HTTP response using prepared headers and content.
+        :rtype Response: this response, encoded by :meth:`serialize`, or
+                         ``bytes``, a complete error response.
         """
 
         path = request.path
 
+        # 0. Cache hit: bỏ qua việc xác định MIME và đường dẫn
+        entry = ASSET_CACHE.get(path) if path else None
+        if entry is not None:
+            return self.build_asset_response(request, entry)
+
         mime_type = self.get_mime_type(path)
-        print(("[Response] {} path {} mime_type {}".format(request.method, request.path, mime_type)))
+        logger.debug("[Response] %s path %s mime_type %s", request.method, request.path, mime_type)
 
         # Nếu path bị None hoặc rỗng → trả về 404 (logic cũ)
         if not path:
@@ -317,14 +768,85 @@ class Response():
         except ValueError:
             return self.build_notfound() 
 
-        # 2. Load Content từ file
-        c_len, self._content = self.build_content(path, base_dir)
+        # 2. Tìm file (không đọc nội dung vào bộ nhớ)
+        full_path, size = self.locate_content(path, base_dir)
         
-        # 3. Nếu build_content trả về nội dung lỗi (do FileNotFoundError)
-        if self._content == b"404 Not Found":
+        # 3. Không tìm thấy file
+        if full_path is None:
             return self.build_notfound()
             
-        # 4. Xây dựng Header và ghép nối
-        self._header = self.build_response_header(request)
+        # 4. Nạp vào cache và xây dựng phản hồi từ entry
+        entry = ASSET_CACHE.load(path, full_path, self.headers['Content-Type'])
+        if entry is None:
+            return self.build_notfound()
 
-        return self._header + self._content
\ No newline at end of file
+        return self.build_asset_response(request, entry)
+
+    def build_asset_response(self, request, entry):
+        """
+        Builds the response of a cached static file. The headers come
+        pre-encoded from the :class:`AssetEntry <AssetEntry>`, or from its
+        compressed variant when the client accepts one; the per-request ones
+        (``Date``, ``Connection``, ``Set-Cookie``) are added by
+        :meth:`serialize`, which sends the cached body as a separate buffer.
+
+        :params request (class:`Request <Request>`): incoming request object.
+        :params entry (AssetEntry): the cached file.
+
+        :rtype Response: this response: ``304``, header and cached body, or
+                         the header alone when the body is left pending for
+                         :meth:`send_body`.
+        """
+        headers = request.headers or {}
+        variant = None
+        if self.compress_min_size is not None:
+            coding = negotiate(headers.get('accept-encoding'))
+            variant = ASSET_CACHE.variant(entry, coding, self.compress_min_size)
+        etag = variant.etag if variant is not None else entry.etag
+
+        if entry.not_modified(headers, etag):
+            self.status_code = 304
+            self.reason = "Not Modified"
+            self._header = status_line(304, self.reason) + (
+                f"ETag: {etag}\r\n"
+                f"Last-Modified: {entry.last_modified}\r\n"
+                "Cache-Control: no-cache\r\n"
+                + ("Vary: Accept-Encoding\r\n" if entry.compressible else "")
+            ).encode('utf-8')
+            self._content = b""
+            return self
+
+        if variant is not None:
+            self._header = status_line(self.status_code, self.reason) + variant.header
+            self._content = variant.body
+            return self
+
+        self._header = status_line(self.status_code, self.reason) + entry.header
+        if entry.body is not None:
+            self._content = entry.body
+            return self
+
+        self._content = b""
+        self.body_file = entry.path
+        self.body_length = entry.size
+        return self
+
+    def build_dynamic_headers(self, keepalive_timeout=None):
+        """
+        Encodes the headers that differ between two responses for the same
+        static file.
+
+        :params keepalive_timeout (float): advertised in ``Keep-Alive`` when
+                                           the connection stays open.
+
+        :rtype str: header lines, each ending with CRLF.
+        """
+        lines = [
+            "Date: {}\r\n".format(http_date()),
+            "Connection: {}\r\n".format(self.connection),
+        ]
+        if self.keep_alive and keepalive_timeout:
+            lines.append("Keep-Alive: timeout={}\r\n".format(int(keepalive_timeout)))
+        for cookie_key, cookie_string in self.cookies_to_set.items():
+            lines.append(f"Set-Cookie: {cookie_string}\r\n")
+        return "".join(lines)
\ No newline at end of file
@@ -0,0 +1,283 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.router
+~~~~~~~~~~~~~~~~~
+
+This module provides the :class:`Router <Router>` object used by
+:class:`WeApRous <WeApRous>` to store its routes. It is still the familiar
+``{(METHOD, path): func}`` dictionary, but every insertion also compiles the
+path into a segment trie, so a lookup costs one step per path segment
+whatever the number of routes.
+
+Route paths may contain parameters:
+
+- ``<name>`` or ``<str:name>`` matches one non-empty segment,
+- ``<int:name>`` matches one segment made of digits and converts it to ``int``,
+- ``<path:name>`` matches the rest of the path, slashes included,
+- ``*`` matches one segment without capturing it.
+
+Matched parameters are URL-decoded and passed to the handler as keyword
+arguments. A path that matches a route registered for other methods only
+resolves to ``405 Method Not Allowed`` instead of ``404 Not Found``.
+
+Usage Example:
+--------------
+>>> router = Router()
+>>> router[("GET", "/channels/<name>/members")] = get_members
+>>> router.resolve("GET", "/channels/group1/members")
+(<function get_members>, {'name': 'group1'}, None)
+"""
+
+import re
+from urllib.parse import unquote
+
+#: Syntax of a parameter segment, e.g. ``<int:id>``.
+PARAM_PATTERN = re.compile(r'^<(?:(\w+):)?(\w+)>$')
+
+
+def _to_int(segment):
+    if not segment.isdigit():
+        raise ValueError(segment)
+    return int(segment)
+
+
+#: Converters of typed parameters; each raises ValueError on mismatch.
+CONVERTERS = {
+    "str": str,
+    "int": _to_int,
+}
+
+
+class RouteNode:
+    """The :class:`RouteNode <RouteNode>` object, one segment of the trie.
+
+    Parameter children are keyed by converter only: the parameter names
+    belong to each route, so ``/channels/<name>`` and
+    ``/channels/<id>/members`` share the node of their second segment.
+
+    :attrs static (dict): literal segment to child node.
+    :attrs params (list): ``(converter_name, node)`` children, tried in
+                          registration order.
+    :attrs wildcard (RouteNode): child matching any single segment (``*``).
+    :attrs tail (RouteNode): child matching the rest of the path (``<path:>``).
+    :attrs handlers (dict): HTTP method to handler for a path ending here.
+    :attrs names (dict): HTTP method to the parameter names of its route, in
+                         path order.
+    :attrs patterns (dict): HTTP method to the route path registered on this
+                            node, e.g. ``/users/<int:id>``.
+    """
+
+    __attrs__ = [
+        "static",
+        "params",
+        "wildcard",
+        "tail",
+        "handlers",
+        "names",
+        "patterns",
+    ]
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.wildcard = None
+        self.tail = None
+        self.handlers = {}
+        self.names = {}
+        self.patterns = {}
+
+    def child(self, segment):
+        """
+        Returns the child node for a route segment, creating it if needed.
+
+        :rtype tuple: ``(node, name)``, ``name`` being the parameter captured
+                      by the segment, ``None`` for literal segments and ``*``.
+        """
+        if segment == '*':
+            if self.wildcard is None:
+                self.wildcard = RouteNode()
+            return self.wildcard, None
+
+        match = PARAM_PATTERN.match(segment)
+        if match is None:
+            return self.static.setdefault(segment, RouteNode()), None
+
+        kind, name = match.group(1) or "str", match.group(2)
+        if kind == "path":
+            if self.tail is None:
+                self.tail = RouteNode()
+            return self.tail, name
+        if kind not in CONVERTERS:
+            raise ValueError("Unknown parameter type '{}' in '{}'".format(kind, segment))
+
+        for existing_kind, node in self.params:
+            if existing_kind == kind:
+                return node, name
+        node = RouteNode()
+        self.params.append((kind, node))
+        return node, name
+
+
+def split_path(path):
+    """Splits a URL path into segments, ignoring the query string."""
+    path = path.split('?', 1)[0]
+    return [segment for segment in path.split('/') if segment]
+
+
+class Router(dict):
+    """The :class:`Router <Router>` object, a route dictionary with a compiled
+    segment trie.
+
+    Keys are ``(METHOD, path)`` tuples and values handler functions, exactly
+    like the plain dictionary it replaces; every mutating ``dict`` method
+    keeps the trie in step. Use :meth:`resolve` to match an incoming
+    request path.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._root = RouteNode()
+        for key, func in dict(*args, **kwargs).items():
+            self[key] = func
+
+    def __setitem__(self, key, func):
+        method, path = key
+        method = method.upper()
+        node = self._root
+        names = []
+        segments = split_path(path)
+        for index, segment in enumerate(segments):
+            if PARAM_PATTERN.match(segment) and segment.startswith('<path:') \
+                    and index != len(segments) - 1:
+                raise ValueError("<path:...> must be the last segment of '{}'".format(path))
+            node, name = node.child(segment)
+            if name is not None:
+                names.append(name)
+        old = node.patterns.get(method)
+        if old is not None and old != path:
+            # Same method on the same node, e.g. /a/<x> then /a/<y>: the
+            # route replaced in the trie goes from the dict as well.
+            super().__delitem__((method, old))
+        node.handlers[method] = func
+        node.names[method] = tuple(names)
+        node.patterns[method] = path
+        super().__setitem__((method, path), func)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._rebuild()
+
+    def update(self, *args, **kwargs):
+        for key, func in dict(*args, **kwargs).items():
+            self[key] = func
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._rebuild()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._rebuild()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._root = RouteNode()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def _rebuild(self):
+        entries = list(self.items())
+        super().clear()
+        self._root = RouteNode()
+        for key, func in entries:
+            self[key] = func
+
+    def resolve(self, method, path):
+        """
+        Matches a request against the compiled routes.
+
+        :param method (str): HTTP method of the request.
+        :param path (str): request path, the query string is ignored.
+
+        :rtype tuple: ``(handler, params, allowed)``. On a match ``handler`` is
+                      the function and ``params`` its keyword arguments. When
+                      the path matches only for other methods, ``handler`` is
+                      ``None`` and ``allowed`` lists those methods; when
+                      nothing matches, ``allowed`` is ``None`` as well.
+        """
+        handler, params, allowed, _ = self.lookup(method, path)
+        return handler, params, allowed
+
+    def lookup(self, method, path):
+        """
+        Like :meth:`resolve`, but also returns the route pattern that matched.
+
+        :rtype tuple: ``(handler, params, allowed, pattern)``; ``pattern`` is
+                      the registered path (e.g. ``/channels/<name>/members``),
+                      a bounded label for metrics, or ``None`` without a match.
+        """
+        method = method.upper() if method else ""
+        allowed = None
+        pattern = None
+        for node, values in self._match(split_path(path)):
+            if method in node.handlers:
+                params = dict(zip(node.names[method], values))
+                return node.handlers[method], params, None, node.patterns[method]
+            if allowed is None:
+                allowed = sorted(node.handlers)
+                pattern = node.patterns[allowed[0]]
+        return None, {}, allowed, pattern
+
+    def _match(self, segments):
+        """
+        Yields ``(node, values)`` for every route matching the segments,
+        literal segments first, then typed parameters, ``*`` and ``<path:>``.
+        ``values`` holds the converted parameters in path order; the names
+        are those of the route picked on ``node``.
+        """
+        stack = [(self._root, 0, ())]
+        while stack:
+            node, index, values = stack.pop()
+            if index == len(segments):
+                if node.handlers:
+                    yield node, values
+                continue
+
+            segment = segments[index]
+            candidates = []
+            if node.tail is not None and node.tail.handlers:
+                rest = "/".join(unquote(s) for s in segments[index:])
+                candidates.append((node.tail, len(segments), values + (rest,)))
+            if node.wildcard is not None:
+                candidates.append((node.wildcard, index + 1, values))
+            for kind, child in reversed(node.params):
+                try:
+                    value = CONVERTERS[kind](unquote(segment))
+                except ValueError:
+                    continue
+                candidates.append((child, index + 1, values + (value,)))
+            child = node.static.get(segment)
+            if child is not None:
+                candidates.append((child, index + 1, values))
+            # Last pushed is explored first: literal, then params, *, <path:>.
+            stack.extend(candidates)
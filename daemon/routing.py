@@ -0,0 +1,332 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.routing
+~~~~~~~~~~~~~~~~~
+
+This module provides the virtual host routing of the proxy: the parser of
+``proxy.conf`` (:func:`parse_virtual_hosts`), the :class:`RoutingTable
+<RoutingTable>` compiled from its routes dict, and :class:`LiveRoutes
+<LiveRoutes>`, which reloads the file on ``SIGHUP`` or when it changes.
+
+A ``Host`` header is matched against the host blocks in this order:
+
+1. exact name with port, e.g. ``"127.0.0.1:8080"``;
+2. exact name, e.g. ``"app1.local"`` (any port);
+3. wildcard, the longest suffix first, e.g. ``"*.chat.local"`` before
+   ``"*.local"``; ``"*.local:8080"`` only matches that port;
+4. the block marked ``default_server;``;
+5. none: the historical ``127.0.0.1:9000`` fallback of the proxy.
+
+Names are matched case-insensitively through dict lookups, one per label of
+the requested name, whatever the number of host blocks.
+
+A reload parses the file, compiles and checks the new table, then swaps it
+in one assignment: requests already routed finish on the table they started
+with, the listening socket and the open connections are untouched, and a
+file with errors is rejected while the running table stays in place.
+Routes whose entry did not change keep the same tuple, so their balancer
+state (weights, in-flight counts) survives the reload.
+
+Configuration Example (``config/proxy.conf``):
+----------------------------------------------
+host "*.local" {
+    proxy_pass http://127.0.0.1:9001;
+}
+host "fallback" {
+    proxy_pass http://127.0.0.1:9000;
+    default_server;
+}
+
+Usage Example:
+--------------
+>>> routes = LiveRoutes(parse_virtual_hosts("config/proxy.conf"), "config/proxy.conf")
+>>> routes.watch(interval=2)
+>>> routes.table.match("chat.local:8080")
+'*.local'
+"""
+
+import os
+import re
+import signal
+import threading
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+#: Route option marking the host block that answers unmatched hosts.
+DEFAULT_SERVER = "default_server"
+
+
+def parse_virtual_hosts(config_file):
+    """
+    Parses virtual host blocks from a config file.
+
+    :config_file (str): Path to the NGINX config file.
+    :rtype dict: hostname to ``(proxy_map, dist_policy[, options])``, the
+                 options holding the ``proxy_cache*`` and ``default_server``
+                 directives of the block when it has some.
+    """
+
+    # ✅ FIX: Chỉ định mã hóa UTF-8 để tránh UnicodeDecodeError
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config_text = f.read()
+
+    # Drop the comments, so that commented directives are not applied
+    config_text = re.sub(r'#[^\n]*', '', config_text)
+
+    # Match each host block
+    host_blocks = re.findall(r'host\s+"([^"]+)"\s*\{(.*?)\}', config_text, re.DOTALL)
+
+    dist_policy_map = ""
+
+    routes = {}
+    for host, block in host_blocks:
+        proxy_map = {}
+
+        # Find all proxy_pass entries, with their parameters (e.g. weight=3)
+        proxy_passes = [" ".join(target.split())
+                        for target in re.findall(r'proxy_pass\s+http://([^;]+);', block)]
+        map_list = proxy_map.get(host, [])
+        map_list = map_list + proxy_passes
+        proxy_map[host] = map_list
+
+        # Find dist_policy if present
+        # (round-robin, weighted-round-robin, least-conn, consistent-hash [key])
+        policy_match = re.search(r'dist_policy\s+([^;]+);', block)
+        if policy_match:
+            dist_policy_map = " ".join(policy_match.group(1).split())
+        else:  # default policy is round_robin
+            dist_policy_map = 'round-robin'
+
+        #
+        # @bksysnet: Build the mapping and policy
+        #       the default policy is provided with one proxy_pass
+        #       In the multi alternatives of proxy_pass then
+        #       the policy is applied by the proxy balancer
+        #       (daemon.balancer) to pick a proxy_pass per request
+        #
+        proxy_pass_list = proxy_map.get(host, [])
+
+        if len(proxy_pass_list) == 1:
+            routes[host] = (proxy_pass_list[0], dist_policy_map)
+        else:
+            routes[host] = (proxy_pass_list, dist_policy_map)
+
+        # Response cache directives (proxy_cache on; proxy_cache_valid 60; ...)
+        # and default_server; are appended as a dict, only for the hosts that
+        # have some.
+        options = {name: " ".join(value.split()) for name, value in
+                   re.findall(r'(proxy_cache\w*)\s+([^;]+);', block)}
+        if re.search(r'\bdefault_server\s*;', block):
+            options[DEFAULT_SERVER] = "on"
+        if options:
+            routes[host] = routes[host] + (options,)
+
+    return routes
+
+
+def split_host(host):
+    """
+    Splits a ``Host`` header into name and port.
+
+    :rtype tuple: ``(name, port)``, ``port`` is ``None`` without one.
+    """
+    name, sep, port = host.rpartition(":")
+    # A bare IPv6 address has colons but no port: "[::1]:8080" is bracketed.
+    if not sep or not port.isdigit() or (":" in name and not name.endswith("]")):
+        return host, None
+    return name, port
+
+
+class RoutingTable:
+    """The :class:`RoutingTable <RoutingTable>` object, the host blocks of a
+    routes dict indexed for matching.
+
+    :attrs routes (dict): hostname to route entry, as parsed.
+    :attrs default (str): name of the ``default_server`` block, or ``None``.
+    """
+
+    __attrs__ = [
+        "routes",
+        "default",
+    ]
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.default = None
+        #: lower-cased "name" or "name:port" -> hostname
+        self._exact = {}
+        #: lower-cased ".suffix" or ".suffix:port" -> hostname
+        self._wildcards = {}
+        for hostname, entry in routes.items():
+            key = hostname.strip().lower()
+            if key.startswith("*."):
+                self._wildcards[key[1:]] = hostname
+            else:
+                self._exact[key] = hostname
+            if len(entry) > 2 and DEFAULT_SERVER in entry[2]:
+                if self.default is not None:
+                    raise ValueError("both {} and {} are default_server".format(
+                        self.default, hostname))
+                self.default = hostname
+
+    def match(self, host):
+        """
+        Returns the host block serving a ``Host`` header.
+
+        :param host (str): the ``Host`` header of the request.
+
+        :rtype str: the hostname of the block, ``None`` if none matches and
+                    there is no ``default_server``.
+        """
+        host = host.strip().lower()
+        hostname = self._exact.get(host)
+        if hostname is not None:
+            return hostname
+        name, port = split_host(host)
+        if port is not None:
+            hostname = self._exact.get(name)
+            if hostname is not None:
+                return hostname
+        if self._wildcards:
+            # Longest suffix first: ".chat.local", then ".local".
+            index = name.find(".")
+            while index != -1:
+                suffix = name[index:]
+                if port is not None:
+                    hostname = self._wildcards.get(suffix + ":" + port)
+                    if hostname is not None:
+                        return hostname
+                hostname = self._wildcards.get(suffix)
+                if hostname is not None:
+                    return hostname
+                index = name.find(".", index + 1)
+        return self.default
+
+    def __len__(self):
+        return len(self.routes)
+
+
+class LiveRoutes:
+    """The :class:`LiveRoutes <LiveRoutes>` object, the current
+    :class:`RoutingTable <RoutingTable>` of the proxy and its reloading.
+
+    :attrs table (RoutingTable): the table new requests are routed with.
+    :attrs path (str): ``proxy.conf`` reloaded by :meth:`reload`, or ``None``.
+    :attrs check (callable): called with a new table before it is swapped
+                             in; raising ``ValueError`` rejects it.
+    """
+
+    __attrs__ = [
+        "table",
+        "path",
+        "check",
+    ]
+
+    def __init__(self, routes, path=None, check=None):
+        self.table = RoutingTable(routes)
+        self.path = path
+        self.check = check
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def routes(self):
+        """The routes dict of the current table."""
+        return self.table.routes
+
+    def reload(self):
+        """
+        Parses :attr:`path` again and swaps the new table in.
+
+        :rtype bool: ``True`` if the new table is in place, ``False`` if the
+                     file could not be read or was rejected.
+        """
+        if self.path is None:
+            return False
+        with self._lock:
+            self._stamp = self._file_stamp()
+            try:
+                routes = parse_virtual_hosts(self.path)
+                old = self.table.routes
+                for hostname, entry in routes.items():
+                    if old.get(hostname) == entry:
+                        # Same tuple: the balancer of the host is kept.
+                        routes[hostname] = old[hostname]
+                table = RoutingTable(routes)
+                if self.check is not None:
+                    self.check(table)
+            except (OSError, ValueError) as e:
+                logger.error("[Proxy] Reload of %s rejected, keeping the current routes: %s",
+                             self.path, e)
+                return False
+            self.table = table
+        added = sorted(set(routes) - set(old))
+        removed = sorted(set(old) - set(routes))
+        changed = sorted(h for h in routes if h in old and routes[h] is not old[h])
+        logger.info("[Proxy] Reloaded %s: %s hosts (added %s, removed %s, changed %s)",
+                    self.path, len(routes), added, removed, changed)
+        return True
+
+    def watch(self, interval):
+        """
+        Reloads :attr:`path` whenever its modification time or size changes,
+        checked every ``interval`` seconds in a daemon thread. Does nothing
+        without a path or with ``interval`` ``0``.
+        """
+        if self.path is None or not interval or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._run, args=(interval,),
+                                         name="routes-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """Stops watching the file."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def install_signal_handler(self):
+        """
+        Reloads :attr:`path` on ``SIGHUP``. Only the main thread can install
+        signal handlers; elsewhere, and on platforms without ``SIGHUP``,
+        nothing is done.
+        """
+        if (self.path is None or not hasattr(signal, "SIGHUP")
+                or threading.current_thread() is not threading.main_thread()):
+            return
+        # The reload runs in a thread: the handler itself must not take the
+        # locks of logging or of an interrupted reload.
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+            target=self.reload, name="routes-reload", daemon=True).start())
+
+    def _file_stamp(self):
+        if self.path is None:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            stamp = self._file_stamp()
+            if stamp is not None and stamp != self._stamp:
+                self.reload()
@@ -0,0 +1,295 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.settings
+~~~~~~~~~~~~~~~~~
+
+This module provides a :class:`Settings <Settings>` object which groups the
+tunables of the backend (and proxy) daemons, so they can be passed as keyword arguments to
+``create_backend(...)`` or ``WeApRous.run(...)`` and threaded down to the
+accept loop and the :class:`HttpAdapter <HttpAdapter>` as a single object.
+
+Usage Example:
+--------------
+>>> settings = Settings(pool_size=8, queue_size=64)
+>>> settings.pool_size
+8
+"""
+
+#: Number of worker threads serving accepted connections.
+DEFAULT_POOL_SIZE = 32
+#: Number of accepted connections allowed to wait for a free worker.
+DEFAULT_QUEUE_SIZE = 128
+#: Seconds announced in the ``Retry-After`` header of an overload response.
+DEFAULT_RETRY_AFTER = 1
+#: Seconds a persistent connection may stay idle between two requests.
+DEFAULT_KEEPALIVE_TIMEOUT = 5
+#: Seconds allowed to receive a complete header block once its first byte arrived.
+DEFAULT_HEADER_TIMEOUT = 10
+#: Seconds allowed to receive a complete request body.
+DEFAULT_BODY_TIMEOUT = 30
+#: Seconds allowed to write a complete response to the client.
+DEFAULT_WRITE_TIMEOUT = 30
+#: Seconds the proxy waits on a backend (connect, then the complete response).
+DEFAULT_UPSTREAM_TIMEOUT = 30
+#: Idle keep-alive connections the proxy keeps per backend.
+DEFAULT_UPSTREAM_MAX_IDLE = 16
+#: Connections (busy and idle) the proxy opens per backend.
+DEFAULT_UPSTREAM_MAX_PER_HOST = 64
+#: Seconds an idle backend connection is kept; below the backend keep-alive timeout.
+DEFAULT_UPSTREAM_IDLE_TIMEOUT = 4
+#: Seconds the proxy waits for a backend to accept a connection.
+DEFAULT_UPSTREAM_CONNECT_TIMEOUT = 3
+#: Seconds between two active health probes of each backend; 0 disables them.
+DEFAULT_HEALTH_INTERVAL = 5
+#: Seconds allowed for one active health probe.
+DEFAULT_HEALTH_TIMEOUT = 1
+#: Consecutive failures (requests or probes) that eject a backend.
+DEFAULT_MAX_FAILS = 3
+#: Seconds a backend stays ejected the first time; doubled on each new ejection.
+DEFAULT_FAIL_TIMEOUT = 10
+#: Byte budget of the proxy response cache.
+DEFAULT_PROXY_CACHE_BYTES = 64 * 1024 * 1024
+#: Largest backend response body stored by the proxy cache.
+DEFAULT_PROXY_CACHE_ENTRY_SIZE = 1024 * 1024
+#: Seconds between two checks of the proxy configuration file for changes.
+DEFAULT_RELOAD_INTERVAL = 2
+#: Requests served on one persistent connection before it is closed.
+DEFAULT_MAX_KEEPALIVE_REQUESTS = 100
+#: Largest accepted request header block, in bytes.
+DEFAULT_MAX_HEADER_SIZE = 64 * 1024
+#: Largest accepted request body, in bytes.
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+#: Byte budget of the process-wide static asset cache.
+DEFAULT_ASSET_CACHE_BYTES = 32 * 1024 * 1024
+#: Largest static file whose content is cached in memory.
+DEFAULT_ASSET_CACHE_ENTRY_SIZE = 1024 * 1024
+#: Smallest response body compressed when the client accepts gzip/deflate.
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+#: Size of the kernel accept backlog of the listening socket.
+DEFAULT_BACKLOG = 50
+#: Number of backend processes; more than one pre-forks workers sharing the port.
+DEFAULT_WORKERS = 1
+#: Lowest level written by the daemon loggers.
+DEFAULT_LOG_LEVEL = "INFO"
+
+#: Available backend and proxy engines: one thread per active connection, or
+#: a single asyncio event loop multiplexing every connection.
+ENGINES = ("thread", "asyncio")
+
+
+class Settings:
+    """The :class:`Settings <Settings>` object, a plain bag of backend tunables.
+
+    Every attribute listed in ``__attrs__`` has a default value and can be
+    overridden through the keyword arguments of the constructor. Unknown
+    keywords are rejected, so typos in ``create_backend(...)`` arguments fail
+    early instead of being silently ignored.
+
+    :attrs pool_size (int): number of worker threads behind the accept loop.
+    :attrs queue_size (int): maximum number of connections waiting for a worker.
+    :attrs retry_after (int): seconds sent in ``Retry-After`` when overloaded.
+    :attrs backlog (int): accept backlog of the listening socket.
+    :attrs engine (str): ``"thread"`` (worker pool, a thread per proxy connection)
+                         or ``"asyncio"`` (event loop).
+    :attrs keepalive_timeout (float): idle deadline: seconds allowed before the first
+                                      byte of a request, on new and kept-alive connections.
+    :attrs header_timeout (float): deadline for the rest of the header block.
+    :attrs body_timeout (float): deadline for the whole request body.
+    :attrs write_timeout (float): deadline for writing the whole response.
+    :attrs upstream_timeout (float): proxy only, deadline for a backend answer.
+    :attrs upstream_max_idle (int): proxy only, idle backend connections kept per backend.
+    :attrs upstream_max_per_host (int): proxy only, open connections allowed per backend.
+    :attrs upstream_idle_timeout (float): proxy only, seconds an idle backend connection is kept.
+    :attrs upstream_connect_timeout (float): proxy only, deadline for a backend to accept a connection.
+    :attrs health_interval (float): proxy only, seconds between active probes, ``0`` to disable.
+    :attrs health_timeout (float): proxy only, deadline of one active probe.
+    :attrs health_path (str): proxy only, path probed with ``GET`` (a status below
+                              500 is healthy), ``None`` for a TCP connect probe.
+    :attrs max_fails (int): proxy only, consecutive failures that eject a backend.
+    :attrs fail_timeout (float): proxy only, seconds of the first ejection of a backend.
+    :attrs proxy_cache_bytes (int): proxy only, byte budget of the response cache.
+    :attrs proxy_cache_entry_size (int): proxy only, largest response body cached.
+    :attrs config_path (str): proxy only, ``proxy.conf`` reloaded on ``SIGHUP`` and
+                              when it changes, ``None`` to disable reloading.
+    :attrs reload_interval (float): proxy only, seconds between two checks of
+                                    ``config_path``, ``0`` to reload on ``SIGHUP`` only.
+    :attrs max_keepalive_requests (int): requests served per connection before closing.
+    :attrs max_header_size (int): largest request header block (431 beyond).
+    :attrs max_body_size (int): largest request body (413 beyond).
+    :attrs asset_cache_bytes (int): byte budget of the static asset cache.
+    :attrs asset_cache_entry_size (int): largest file body kept in the asset cache.
+    :attrs compression (bool): negotiate gzip/deflate with ``Accept-Encoding``.
+    :attrs compress_min_size (int): smallest body worth compressing.
+    :attrs workers (int): number of pre-forked processes sharing the port (1 = no fork).
+    :attrs log_level (str): lowest level logged, e.g. ``"INFO"`` or ``"DEBUG"``.
+    :attrs log_debug_sample (int): keep 1 ``DEBUG`` record in ``log_debug_sample``.
+    :attrs metrics_path (str): path serving Prometheus metrics, ``None`` to disable.
+    :attrs admin_path (str): prefix of the profiling admin endpoint (loopback
+                             clients only), ``None`` to disable.
+    :attrs admin_token (str): shared secret admin requests must send in the
+                              ``X-Admin-Token`` header; required with ``admin_path``.
+    :attrs profile_dir (str): where profiles are written, ``None`` for the
+                              system temporary directory.
+    :attrs middleware (Pipeline): application middleware run before the
+                                  built-in stages, ``None`` for none.
+    """
+
+    __attrs__ = [
+        "pool_size",
+        "queue_size",
+        "retry_after",
+        "backlog",
+        "engine",
+        "keepalive_timeout",
+        "header_timeout",
+        "body_timeout",
+        "write_timeout",
+        "upstream_timeout",
+        "upstream_max_idle",
+        "upstream_max_per_host",
+        "upstream_idle_timeout",
+        "upstream_connect_timeout",
+        "health_interval",
+        "health_timeout",
+        "health_path",
+        "max_fails",
+        "fail_timeout",
+        "proxy_cache_bytes",
+        "proxy_cache_entry_size",
+        "config_path",
+        "reload_interval",
+        "max_keepalive_requests",
+        "max_header_size",
+        "max_body_size",
+        "asset_cache_bytes",
+        "asset_cache_entry_size",
+        "compression",
+        "compress_min_size",
+        "workers",
+        "log_level",
+        "log_debug_sample",
+        "metrics_path",
+        "admin_path",
+        "admin_token",
+        "profile_dir",
+        "middleware",
+    ]
+
+    def __init__(self, **options):
+        #: Worker threads.
+        self.pool_size = DEFAULT_POOL_SIZE
+        #: Pending connection queue depth.
+        self.queue_size = DEFAULT_QUEUE_SIZE
+        #: Retry-After value for 503 responses.
+        self.retry_after = DEFAULT_RETRY_AFTER
+        #: Listen backlog.
+        self.backlog = DEFAULT_BACKLOG
+        #: Serving engine.
+        self.engine = "thread"
+        #: Keep-alive idle timeout.
+        self.keepalive_timeout = DEFAULT_KEEPALIVE_TIMEOUT
+        #: Header block deadline.
+        self.header_timeout = DEFAULT_HEADER_TIMEOUT
+        #: Body deadline.
+        self.body_timeout = DEFAULT_BODY_TIMEOUT
+        #: Response write deadline.
+        self.write_timeout = DEFAULT_WRITE_TIMEOUT
+        #: Proxy upstream deadline.
+        self.upstream_timeout = DEFAULT_UPSTREAM_TIMEOUT
+        #: Upstream connection pool limits.
+        self.upstream_max_idle = DEFAULT_UPSTREAM_MAX_IDLE
+        self.upstream_max_per_host = DEFAULT_UPSTREAM_MAX_PER_HOST
+        self.upstream_idle_timeout = DEFAULT_UPSTREAM_IDLE_TIMEOUT
+        self.upstream_connect_timeout = DEFAULT_UPSTREAM_CONNECT_TIMEOUT
+        #: Upstream health checking.
+        self.health_interval = DEFAULT_HEALTH_INTERVAL
+        self.health_timeout = DEFAULT_HEALTH_TIMEOUT
+        self.health_path = None
+        self.max_fails = DEFAULT_MAX_FAILS
+        self.fail_timeout = DEFAULT_FAIL_TIMEOUT
+        #: Proxy response cache budgets.
+        self.proxy_cache_bytes = DEFAULT_PROXY_CACHE_BYTES
+        self.proxy_cache_entry_size = DEFAULT_PROXY_CACHE_ENTRY_SIZE
+        #: Proxy configuration reloading.
+        self.config_path = None
+        self.reload_interval = DEFAULT_RELOAD_INTERVAL
+        #: Keep-alive request cap.
+        self.max_keepalive_requests = DEFAULT_MAX_KEEPALIVE_REQUESTS
+        #: Header block limit.
+        self.max_header_size = DEFAULT_MAX_HEADER_SIZE
+        #: Body limit.
+        self.max_body_size = DEFAULT_MAX_BODY_SIZE
+        #: Asset cache budget.
+        self.asset_cache_bytes = DEFAULT_ASSET_CACHE_BYTES
+        #: Asset cache per-file limit.
+        self.asset_cache_entry_size = DEFAULT_ASSET_CACHE_ENTRY_SIZE
+        #: Response compression.
+        self.compression = True
+        #: Compression threshold.
+        self.compress_min_size = DEFAULT_COMPRESS_MIN_SIZE
+        #: Pre-forked worker processes.
+        self.workers = DEFAULT_WORKERS
+        #: Log level.
+        self.log_level = DEFAULT_LOG_LEVEL
+        #: Debug sampling rate.
+        self.log_debug_sample = 1
+        #: Metrics endpoint (opt-in).
+        self.metrics_path = None
+        #: Profiling admin endpoint (opt-in).
+        self.admin_path = None
+        self.admin_token = None
+        #: Profile output directory.
+        self.profile_dir = None
+        #: Application middleware.
+        self.middleware = None
+
+        for key, value in options.items():
+            if key not in self.__attrs__:
+                raise TypeError("Unknown setting '{}'".format(key))
+            if value is not None:
+                setattr(self, key, value)
+
+        if self.pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if self.queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        if self.upstream_max_idle < 0:
+            raise ValueError("upstream_max_idle must not be negative")
+        if self.upstream_max_per_host < 1:
+            raise ValueError("upstream_max_per_host must be at least 1")
+        if self.max_fails < 1:
+            raise ValueError("max_fails must be at least 1")
+        if self.health_interval < 0:
+            raise ValueError("health_interval must not be negative")
+        if self.reload_interval < 0:
+            raise ValueError("reload_interval must not be negative")
+        if self.max_keepalive_requests < 1:
+            raise ValueError("max_keepalive_requests must be at least 1")
+        if self.log_debug_sample < 1:
+            raise ValueError("log_debug_sample must be at least 1")
+        for key in ("keepalive_timeout", "header_timeout", "body_timeout",
+                    "write_timeout", "upstream_timeout", "upstream_idle_timeout",
+                    "upstream_connect_timeout", "health_timeout", "fail_timeout"):
+            if getattr(self, key) <= 0:
+                raise ValueError("{} must be positive".format(key))
+        if self.admin_path and not self.admin_token:
+            raise ValueError("admin_path requires an admin_token")
+        if self.engine not in ENGINES:
+            raise ValueError("engine must be one of {}".format(", ".join(ENGINES)))
+
+    def __repr__(self):
+        values = ", ".join("{}={!r}".format(k, getattr(self, k)) for k in self.__attrs__)
+        return "<Settings {}>".format(values)
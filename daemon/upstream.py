@@ -0,0 +1,458 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.upstream
+~~~~~~~~~~~~~~~~~
+
+This module provides the keep-alive connections of the proxy to its
+backends: an :class:`UpstreamPool <UpstreamPool>` of idle sockets per
+upstream ``(host, port)``, and :func:`read_response`, which reads the
+header block of a backend response and frames its body by
+``Content-Length`` or chunked transfer coding, so the body can be relayed
+to the client as it arrives (:func:`relay_body`) and the connection can
+serve the next request instead of being closed.
+
+Pool rules:
+
+- At most ``max_per_host`` connections (busy and idle) per upstream; a
+  request waits for a free one within its upstream deadline.
+- At most ``max_idle`` idle connections per upstream; extra ones are closed.
+- Idle connections expire after ``idle_timeout`` seconds, which should stay
+  below the backend ``keepalive_timeout`` so the proxy closes them first.
+- An idle connection is checked before reuse: a backend that closed it (or
+  sent unsolicited bytes) makes it readable, and it is discarded.
+
+Usage Example:
+--------------
+>>> pool = UpstreamPool(max_idle=8)
+>>> sock, reused = pool.acquire("127.0.0.1", 9000, deadline)
+>>> ...
+>>> pool.release("127.0.0.1", 9000, sock, reusable=True)
+"""
+
+import sys
+import time
+import socket
+import threading
+from collections import deque
+
+from .reader import RequestReader, BodyStream
+from .response import send_buffers
+from .metrics import UPSTREAM_CONNECTIONS
+
+#: Idle connections kept per upstream.
+DEFAULT_MAX_IDLE = 16
+#: Open connections (busy and idle) allowed per upstream.
+DEFAULT_MAX_PER_HOST = 64
+#: Seconds an idle connection is kept; below the backend keep-alive timeout.
+DEFAULT_IDLE_TIMEOUT = 4.0
+#: Response headers that only describe the proxy-backend connection.
+HOP_BY_HOP = (b"connection", b"keep-alive")
+#: Request headers that only describe the client-proxy connection: the
+#: proxy answers ``Expect: 100-continue`` itself (see :data:`CONTINUE`).
+REQUEST_HOP_BY_HOP = HOP_BY_HOP + (b"expect", b"proxy-connection", b"te", b"upgrade")
+#: Interim response sent to a client that expects ``100-continue``.
+CONTINUE = b"HTTP/1.1 100 Continue\r\n\r\n"
+#: Largest backend header block, in bytes.
+MAX_RESPONSE_HEAD = 64 * 1024
+
+
+class UpstreamError(Exception):
+    """Raised when a backend fails a forwarded request.
+
+    :attrs status_code (int): HTTP status to answer (502 or 504).
+    :attrs reason (str): HTTP reason phrase matching ``status_code``.
+    :attrs sent (bytes): header block already sent to the client, in which
+                         case the connection can only be closed; ``None``
+                         if the error can still be answered.
+    :attrs fault (bool): whether the backend is to blame (for health
+                         checking), ``None`` when the client may be.
+    """
+
+    def __init__(self, status_code, reason, message=None, sent=None, fault=True):
+        super().__init__(message or reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.sent = sent
+        self.fault = fault
+
+
+def is_alive(sock):
+    """
+    Returns ``True`` if an idle connection can be reused: it must not be
+    readable, since a backend that closed it or sent bytes out of turn makes
+    it readable.
+    """
+    try:
+        sock.setblocking(False)
+        sock.recv(1, socket.MSG_PEEK)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class UpstreamPool:
+    """The :class:`UpstreamPool <UpstreamPool>` object, a thread-safe pool of
+    keep-alive connections to the backends of the proxy.
+
+    :attrs max_idle (int): idle connections kept per upstream.
+    :attrs max_per_host (int): open connections allowed per upstream.
+    :attrs idle_timeout (float): seconds an idle connection stays reusable.
+    :attrs connect_timeout (float): seconds allowed to open a connection,
+                                    within the upstream deadline.
+    """
+
+    __attrs__ = [
+        "max_idle",
+        "max_per_host",
+        "idle_timeout",
+        "connect_timeout",
+    ]
+
+    def __init__(self, max_idle=DEFAULT_MAX_IDLE, max_per_host=DEFAULT_MAX_PER_HOST,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, connect_timeout=None):
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1")
+        self.max_idle = max_idle
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        #: (host, port) -> deque of (socket, released_at), oldest first
+        self._idle = {}
+        #: (host, port) -> open connections, busy or idle
+        self._open = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, host, port, deadline):
+        """
+        Returns a connection to ``host:port``: the most recently released
+        idle one that passes the health check, or a new one.
+
+        :param deadline (Deadline): upstream deadline bounding the wait for a
+                                    free slot and the connect.
+
+        :rtype tuple: ``(socket, reused)``.
+
+        :raises socket.timeout: if the deadline or the connect timeout passed.
+        :raises OSError: if the connection failed.
+        """
+        key = (host, port)
+        upstream = "{}:{}".format(host, port)
+        with self._cond:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    self._prune(key, idle, time.monotonic())
+                while idle:
+                    sock = idle.pop()[0]
+                    if is_alive(sock):
+                        UPSTREAM_CONNECTIONS.inc(upstream, "reused")
+                        return sock, True
+                    self._discard(key, sock)
+                if self._open.get(key, 0) < self.max_per_host:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    break
+                left = deadline.remaining()
+                if left is not None and left <= 0:
+                    raise socket.timeout("no free connection to {}".format(upstream))
+                self._cond.wait(left)
+
+        try:
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                raise socket.timeout("upstream deadline exceeded")
+            if self.connect_timeout and (left is None or left > self.connect_timeout):
+                left = self.connect_timeout
+            sock = socket.create_connection(key, timeout=left)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except BaseException:
+            with self._cond:
+                self._open[key] -= 1
+                self._cond.notify()
+            raise
+        UPSTREAM_CONNECTIONS.inc(upstream, "opened")
+        return sock, False
+
+    def release(self, host, port, sock, reusable):
+        """
+        Returns a connection obtained from :meth:`acquire`: it is kept idle
+        when ``reusable`` and the pool has room, closed otherwise.
+        """
+        key = (host, port)
+        with self._cond:
+            idle = self._idle.setdefault(key, deque())
+            now = time.monotonic()
+            self._prune(key, idle, now)
+            if reusable and len(idle) < self.max_idle:
+                idle.append((sock, now))
+            else:
+                self._discard(key, sock)
+            self._cond.notify()
+
+    def close(self):
+        """Closes every idle connection."""
+        with self._cond:
+            for key, idle in self._idle.items():
+                while idle:
+                    self._discard(key, idle.popleft()[0])
+            self._cond.notify_all()
+
+    def _prune(self, key, idle, now):
+        # Oldest first: stop at the first connection still fresh.
+        while idle and now - idle[0][1] > self.idle_timeout:
+            self._discard(key, idle.popleft()[0])
+
+    def _discard(self, key, sock):
+        self._open[key] -= 1
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+
+def request_head(head, client_ip=None):
+    """
+    Rewrites the header block of a client request for a pooled backend
+    connection: the hop-by-hop headers of the client (:data:`REQUEST_HOP_BY_HOP`
+    and those named by its ``Connection`` header) are replaced by
+    ``Connection: keep-alive``. The body framing headers are kept, the body
+    being relayed as it was framed.
+
+    :param head (bytes): the header block without the terminating blank line.
+    :param client_ip (str, optional): address of the client, appended to
+                                      ``X-Forwarded-For``.
+
+    :rtype bytes: the header block to send, blank line included.
+    """
+    lines = head.split(b"\r\n")
+    dropped = set(REQUEST_HOP_BY_HOP)
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"connection":
+            dropped.update(token.strip().lower() for token in value.split(b","))
+    lines = [lines[0]] + [line for line in lines[1:]
+                          if line.partition(b":")[0].strip().lower() not in dropped]
+    if client_ip:
+        for index, line in enumerate(lines):
+            name, _, value = line.partition(b":")
+            if index and name.strip().lower() == b"x-forwarded-for":
+                lines[index] = b"%s: %s, %s" % (name, value.strip(), client_ip.encode())
+                break
+        else:
+            lines.append(b"X-Forwarded-For: " + client_ip.encode())
+    lines.append(b"Connection: keep-alive")
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+def expects_continue(version, headers):
+    """Returns ``True`` if the client waits for ``100 Continue`` before its body."""
+    return version == "HTTP/1.1" and headers.get("expect", "").lower() == "100-continue"
+
+
+def is_interim(status_code):
+    """
+    Returns ``True`` for a 1xx interim response (``100 Continue``, ``103
+    Early Hints``), which the final response of the request follows.
+    ``101 Switching Protocols`` is final.
+    """
+    return 100 <= status_code < 200 and status_code != 101
+
+
+def send_chunk(sock, data, deadline):
+    """Writes ``data`` as one chunk of a chunked body; ``b""`` ends the body."""
+    if data:
+        send_buffers(sock, [b"%x\r\n" % len(data), data, b"\r\n"], deadline)
+    else:
+        send_buffers(sock, [b"0\r\n\r\n"], deadline)
+
+
+def relay_body(body, sock, chunked, deadline, idle=(), capture=None):
+    """
+    Copies a message body to a socket piece by piece, as it is received. At
+    most one piece (``RECV_SIZE`` bytes) is held in memory: while ``sock``
+    does not drain, ``body`` is not read, and TCP flow control slows the
+    sender down.
+
+    :param body (BodyStream): the body to copy.
+    :param sock (socket.socket): destination socket.
+    :param chunked (bool): re-encode the pieces with chunked coding.
+    :param deadline (Deadline): deadline of ``sock``.
+    :param idle (tuple): ``(deadline, timeout)`` pairs whose current phase is
+                         restarted before each piece, so that they bound
+                         inactivity rather than the whole transfer.
+    :param capture (callable): called with each piece once it was written,
+                               e.g. to fill a cache entry.
+    """
+    while True:
+        for guard, timeout in idle:
+            guard.start(guard.phase, timeout)
+        data = body.read_chunk()
+        if capture is not None and data:
+            capture(data)
+        if chunked:
+            send_chunk(sock, data, deadline)
+        elif data:
+            send_buffers(sock, [data], deadline)
+        if not data:
+            return
+
+
+class UpstreamResponse:
+    """The :class:`UpstreamResponse <UpstreamResponse>` object, a backend
+    response whose header block was read and whose body is still on the
+    upstream connection.
+
+    :attrs status_code (int): status of the backend response.
+    :attrs head (bytes): header block for the client, blank line included,
+                         with ``Connection: close``.
+    :attrs body (BodyStream): the body to relay, ``None`` when there is none.
+    :attrs chunked (bool): whether the body is relayed with chunked coding.
+    :attrs reusable (bool): whether the upstream connection can serve
+                            another request once the body was read.
+    :attrs status_line (bytes): status line of the backend response.
+    :attrs fields (list): end-to-end header lines, without the hop-by-hop
+                          and framing headers.
+    :attrs framing (tuple): ``(mode, length)`` of the body as sent by the
+                            backend (see :class:`BodyStream <BodyStream>`),
+                            ``None`` without body.
+    """
+
+    __attrs__ = [
+        "status_code",
+        "head",
+        "body",
+        "chunked",
+        "reusable",
+        "status_line",
+        "fields",
+        "framing",
+    ]
+
+    def __init__(self, status_code, head, body=None, chunked=False, reusable=False,
+                 status_line=b"", fields=(), framing=None):
+        self.status_code = status_code
+        self.head = head
+        self.body = body
+        self.chunked = chunked
+        self.reusable = reusable
+        self.status_line = status_line
+        self.fields = fields
+        self.framing = framing
+
+
+def read_response(reader, method, chunked=True):
+    """
+    Reads the header block of a backend response. Interim 1xx responses are
+    skipped up to the final one, whose body is left in ``reader``, framed
+    by a :class:`BodyStream <BodyStream>` to be relayed (see
+    :func:`parse_response`).
+
+    :param reader (RequestReader): buffered reader of the upstream socket.
+    :param method (str): method of the forwarded request (``HEAD`` responses
+                         have no body).
+    :param chunked (bool): whether the client accepts chunked coding.
+
+    :rtype UpstreamResponse: the response, or ``None`` if the backend closed
+                             the connection without answering.
+
+    :raises RequestError: if the header block is too large or malformed.
+    :raises ValueError: if the status line is malformed.
+    :raises socket.timeout: if the upstream deadline passed.
+    """
+    while True:
+        head = reader.read_head()
+        if head is None:
+            return None
+        response = parse_response(head, method, chunked)
+        if not is_interim(response.status_code):
+            break
+    if response.framing is not None:
+        response.body = BodyStream(reader, *response.framing)
+    return response
+
+
+def parse_response(head, method, chunked=True):
+    """
+    Parses the header block of a backend response into the header block
+    sent to the client (hop-by-hop headers removed, ``Connection: close``
+    added) and the framing of its body. A chunked body is relayed chunked to
+    clients that accept it, and delimited by the end of the connection
+    otherwise.
+
+    :param head (bytes): the header block without the terminating blank line.
+    :param method (str): method of the forwarded request.
+    :param chunked (bool): whether the client accepts chunked coding.
+
+    :rtype UpstreamResponse: the response, without :attr:`body`.
+
+    :raises ValueError: if the status line or ``Content-Length`` is malformed.
+    """
+    lines = head.split(b"\r\n")
+    status_line = lines[0]
+    parts = status_line.split(b" ", 2)
+    version = parts[0]
+    try:
+        code = int(parts[1])
+    except (IndexError, ValueError):
+        raise ValueError("Malformed upstream status line {!r}".format(status_line))
+
+    kept = [status_line]
+    fields = []
+    connection = b""
+    mode = "close"
+    length = None
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name in HOP_BY_HOP:
+            if name == b"connection":
+                connection = value.strip().lower()
+            continue
+        if name == b"transfer-encoding" and b"chunked" in value.lower():
+            mode = "chunked"
+            if not chunked:
+                continue
+        elif name == b"content-length":
+            length = int(value.strip())
+        else:
+            fields.append(line)
+        kept.append(line)
+
+    reusable = b"close" not in connection and (
+        version == b"HTTP/1.1" or b"keep-alive" in connection)
+
+    if method == "HEAD" or 100 <= code < 200 or code in (204, 304):
+        framing = None
+    elif mode == "chunked":
+        if not chunked:
+            # Framing of the client response: the end of the connection.
+            kept = [line for line in kept
+                    if line.partition(b":")[0].strip().lower() != b"content-length"]
+        framing = ("chunked", None)
+    elif length is not None:
+        framing = ("length", length) if length else None
+    else:
+        framing = ("close", None)
+        reusable = False
+
+    kept.append(b"Connection: close")
+    head = b"\r\n".join(kept) + b"\r\n\r\n"
+    return UpstreamResponse(code, head, None, chunked and mode == "chunked", reusable,
+                            status_line, fields, framing)
+
+
+def upstream_reader(sock, deadline):
+    """Returns a :class:`RequestReader <RequestReader>` over a backend socket."""
+    return RequestReader(sock, MAX_RESPONSE_HEAD, sys.maxsize, deadline=deadline)
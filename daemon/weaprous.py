@@ -18,6 +18,8 @@ This module provides a WeApRous object to deploy RESTful url web app with routin
 """
 
 from .backend import create_backend
+from .router import Router
+from .middleware import Pipeline
 
 class WeApRous:
     """The fully mutable :class:`WeApRous <WeApRous>` object, which is a lightweight,
@@ -40,6 +42,31 @@ class WeApRous:
       >>> def hello(headers, body):
       >>>     return {'message': 'Hello, world!'}
 
+      >>> @app.route('/channels/<name>/members', methods=['GET'])
+      >>> def members(headers, body, name):
+      >>>     return {'channel': name}
+
+      >>> @app.route('/channels', methods=['POST'])
+      >>> def create(headers, body):
+      >>>     return {'status': 'created'}, 201
+
+    Handlers return a dict or list (sent as JSON), bytes, str, a
+    :class:`Response <Response>`, or a ``(body, status_code[, headers])``
+    tuple of these.
+
+    Middleware wraps every request, in registration order, before the
+    built-in stages (access control, routes, login, static files):
+
+      >>> @app.before
+      >>> def require_json(req):
+      >>>     if req.method == 'POST' and 'json' not in req.headers.get('content-type', ''):
+      >>>         return {'status': 'error'}, 415
+
+      >>> @app.after
+      >>> def no_store(req, response):
+      >>>     if isinstance(response, Response):   # handler responses
+      >>>         response.headers['Cache-Control'] = 'no-store'
+
       >>> app.run()
     """
 
@@ -48,8 +75,11 @@ class WeApRous:
         Initialize a new WeApRous instance.
 
         Sets up an empty route registry and prepares placeholders for IP and port.
+        The registry is a :class:`Router <Router>`: a ``{(METHOD, path): func}``
+        dictionary compiled into a segment trie on insertion.
         """
-        self.routes = {}
+        self.routes = Router()
+        self.middleware = Pipeline()
         self.ip = None
         self.port = None
         return
@@ -64,12 +94,18 @@ class WeApRous:
         self.ip = ip
         self.port = port
 
-    def route(self, path, methods=['GET']):
+    def route(self, path, methods=['GET'], stream=False):
         """
         Decorator to register a route handler for a specific path and HTTP methods.
 
-        :param path (str): The URL path to route.
+        :param path (str): The URL path to route. It may contain parameters
+                           (``<name>``, ``<int:id>``, ``<path:rest>``) or ``*``
+                           segments; captured values are passed to the handler
+                           as keyword arguments.
         :param methods (list): A list of HTTP methods (e.g., ['GET', 'POST']) to bind.
+        :param stream (bool): pass the request body as a file-like
+                              :class:`BodyStream <BodyStream>` instead of a
+                              decoded string, for large uploads.
 
         :rtype: function - A decorator that registers the handler function.
         """
@@ -80,22 +116,57 @@ class WeApRous:
             # Optional attach route metadata to the function
             func._route_path = path
             func._route_methods = methods
+            func._stream_body = stream
 
             return func
         return decorator
 
-    def run(self):
+    def use(self, func, kind="around", name=None):
+        """
+        Registers a middleware, run after those registered before it.
+
+        :param func (callable): ``func(req)`` for ``"before"`` (return a
+                                handler-style result to answer at once),
+                                ``func(req, response)`` for ``"after"``
+                                (return a replacement or ``None``),
+                                ``func(req, call_next)`` for ``"around"``.
+        :param kind (str): ``"before"``, ``"after"`` or ``"around"``.
+        :param name (str): stage name in ``req.timings`` and metrics,
+                           defaults to the function name.
+
+        :rtype: function - ``func`` itself.
+        """
+        return self.middleware.add(func, kind, name)
+
+    def before(self, func):
+        """Decorator registering a ``before`` middleware (see :meth:`use`)."""
+        return self.use(func, "before")
+
+    def after(self, func):
+        """Decorator registering an ``after`` middleware (see :meth:`use`)."""
+        return self.use(func, "after")
+
+    def around(self, func):
+        """Decorator registering an ``around`` middleware (see :meth:`use`)."""
+        return self.use(func, "around")
+
+    def run(self, **options):
         """
         Start the backend server and begin handling requests.
 
         This method launches the TCP server using the configured IP and port,
         and dispatches incoming requests to the registered route handlers.
 
+        :param options: backend tunables forwarded to ``create_backend``,
+                        e.g. ``app.run(pool_size=16, queue_size=64)``, or
+                        ``app.run(workers=4)`` to serve from 4 processes.
+
         :raise: Error if IP or port has not been configured.
         """
         if not self.ip or not self.port:
             print("Rous app need to preapre address"
                   "by calling app.prepare_address(ip,port)")
 
-        create_backend(self.ip, self.port, self.routes)
+        options.setdefault("middleware", self.middleware)
+        create_backend(self.ip, self.port, self.routes, **options)
         
@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.workerpool
+~~~~~~~~~~~~~~~~~
+
+This module provides a fixed-size :class:`WorkerPool <WorkerPool>` used by the
+backend accept loop. Accepted connections are queued to a bounded queue and
+served by a constant number of worker threads, so a burst of clients can no
+longer force the process to create one thread per socket.
+
+When the queue is full, :meth:`WorkerPool.submit` returns ``False`` immediately
+and the caller is expected to shed the connection (the backend answers
+``503 Service Unavailable`` with a ``Retry-After`` header).
+
+Usage Example:
+--------------
+>>> pool = WorkerPool(handle, size=4, queue_size=16)
+>>> pool.start()
+>>> pool.submit(conn, addr)
+True
+"""
+
+import queue
+import threading
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+#: Sentinel put on the queue to ask a worker to exit.
+_STOP = object()
+
+
+class WorkerPool:
+    """The :class:`WorkerPool <WorkerPool>` object, a bounded pool of daemon
+    threads consuming jobs from a bounded queue.
+
+    :attrs target (callable): function called as ``target(*job)`` for each job.
+    :attrs size (int): number of worker threads.
+    :attrs queue_size (int): maximum number of jobs waiting for a worker.
+    """
+
+    __attrs__ = [
+        "target",
+        "size",
+        "queue_size",
+        "name",
+    ]
+
+    def __init__(self, target, size, queue_size, name="worker"):
+        self.target = target
+        self.size = size
+        self.queue_size = queue_size
+        self.name = name
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Spawns the worker threads. Calling it twice is a no-op."""
+        if self._threads:
+            return
+        for index in range(self.size):
+            thread = threading.Thread(
+                target=self._work,
+                name="{}-{}".format(self.name, index),
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, *job):
+        """
+        Queues a job without blocking.
+
+        :rtype bool: ``True`` if the job was queued, ``False`` if the queue is full.
+        """
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            return False
+        return True
+
+    def shutdown(self, wait=True):
+        """Asks every worker to exit once the already queued jobs are served."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    @property
+    def pending(self):
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    @property
+    def busy(self):
+        """Number of workers currently running a job."""
+        return self._busy
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            with self._lock:
+                self._busy += 1
+            try:
+                self.target(*job)
+            except Exception as e:
+                logger.error("[WorkerPool] Unhandled error in %s: %s", self.name, e)
+            finally:
+                with self._lock:
+                    self._busy -= 1
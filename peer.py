@@ -5,6 +5,8 @@ import time
 import os
 import sys
 
+from daemon.deadline import Deadline
+
 # --- CẤU HÌNH VÀ GLOBAL STATE ---
 # SỬA: Dùng IP LAN thực tế cho Tracker
 TRACKER_IP = '127.0.0.1'
@@ -23,6 +25,14 @@ MY_IP_BIND = '127.0.0.1'
 MY_IP = MY_IP_BIND # Mặc định dùng IP lắng nghe cho các hàm bind
 MY_PORT = 8000 # [Lưu ý] Port HTTP/WebApp. Port P2P là MY_PORT + 1.
 
+# DEADLINE (giây): kết nối P2P không gửi gì / gửi nhỏ giọt không giữ luồng mãi mãi
+P2P_IDLE_TIMEOUT = 5     # chờ byte đầu tiên của tin nhắn
+P2P_READ_TIMEOUT = 10    # nhận trọn tin nhắn
+P2P_WRITE_TIMEOUT = 5    # kết nối + gửi tin nhắn đến peer khác
+P2P_MAX_MESSAGE = 64 * 1024
+TRACKER_TIMEOUT = 5      # kết nối + gửi yêu cầu đến Tracker
+P2P_READY_TIMEOUT = 5    # chờ P2P Server bind + listen khi khởi động
+
 # --- HÀM TRỢ GIÚP CHUNG ---
 
 def _get_p2p_port(http_port):
@@ -77,6 +87,7 @@ def call_tracker_api(path, method='GET', data=None):
 
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(TRACKER_TIMEOUT)
             s.connect((TRACKER_IP, TRACKER_PORT))
             s.sendall(request.encode('utf-8'))
             
@@ -144,6 +155,8 @@ def _make_p2p_request(ip, port, message):
 
     p2p_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
+        # sendall: timeout tính cho toàn bộ lần gửi
+        p2p_socket.settimeout(P2P_WRITE_TIMEOUT)
         p2p_socket.connect((ip, port))
         p2p_socket.sendall(full_message.encode('utf-8'))
         p2p_socket.close()
@@ -230,10 +243,21 @@ def send_message_to_channel_members(member_list, message, sender_username):
 def handle_peer_connection(conn, addr):
     """Xử lý tin nhắn P2P đến và LƯU vào buffer."""
     global PEER_MESSAGES_BUFFER
+    deadline = Deadline(conn)
     try:
-        message_bytes = conn.recv(1024) 
+        # Đọc đến khi peer gửi đóng kết nối, trong giới hạn thời gian và kích thước
+        deadline.start("idle", P2P_IDLE_TIMEOUT)
+        message_bytes = b""
+        while len(message_bytes) < P2P_MAX_MESSAGE:
+            deadline.apply()
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            if not message_bytes:
+                deadline.start("body", P2P_READ_TIMEOUT)
+            message_bytes += chunk
         if message_bytes:
-            message = message_bytes.decode('utf-8', errors='ignore')
+            message = message_bytes[:P2P_MAX_MESSAGE].decode('utf-8', errors='ignore')
             
             # Lấy ra IP:Port P2P của người gửi
             sender_p2p_addr = f"{addr[0]}:{addr[1]}" 
@@ -243,22 +267,36 @@ def handle_peer_connection(conn, addr):
                 "message": message,
                 "timestamp": time.time()
             })
-            
+
+    except socket.timeout:
+        deadline.expired("peer")
+        print(f"[P2P Server] Hết thời gian ({deadline.phase}) với {addr}, đóng kết nối.")
     except Exception:
         pass
     finally:
         conn.close()
 
-def peer_server_thread(ip, port):
-    """Luồng chạy server để lắng nghe kết nối P2P từ các peer khác."""
+def peer_server_thread(ip, port, ready=None):
+    """
+    Luồng chạy server để lắng nghe kết nối P2P từ các peer khác.
+
+    :param ready (threading.Event): set once the socket listens, or once
+                                    binding failed (check ``ready.error``).
+    """
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         # LƯU Ý: ip ở đây phải là 0.0.0.0 hoặc IP LAN để nghe từ mạng ngoài
         server.bind((ip, port)) 
+        server.listen(5)
     except OSError as e:
         print(f"[P2P Server ERROR] KHÔNG THỂ BIND VÀO PORT {port}: {e}")
+        if ready is not None:
+            ready.error = e
+            ready.set()
         return 
-    server.listen(5)
+    if ready is not None:
+        # Báo cho init_peer_server: đã sẵn sàng nhận kết nối
+        ready.set()
 
     while True:
         try:
@@ -270,7 +308,12 @@ def peer_server_thread(ip, port):
             break
 
 def init_peer_server(ip, http_port):
-    """Khởi động P2P Server trong luồng nền."""
+    """
+    Khởi động P2P Server trong luồng nền và chờ đến khi socket lắng nghe
+    (tối đa ``P2P_READY_TIMEOUT`` giây).
+
+    :rtype bool: ``True`` nếu P2P Server đã sẵn sàng.
+    """
     global MY_IP, MY_PORT
     
     p2p_listen_port = _get_p2p_port(http_port)
@@ -279,9 +322,14 @@ def init_peer_server(ip, http_port):
     MY_IP = ip
     MY_PORT = http_port
     
-    server_thread = threading.Thread(target=peer_server_thread, args=(ip, p2p_listen_port))
+    # Chờ socket lắng nghe thay vì ngủ cố định 1 giây
+    ready = threading.Event()
+    ready.error = None
+    server_thread = threading.Thread(target=peer_server_thread, args=(ip, p2p_listen_port, ready))
     server_thread.daemon = True
     server_thread.start()
-    time.sleep(1)
+    if not ready.wait(P2P_READY_TIMEOUT) or ready.error is not None:
+        return False
 
-    print(f"[P2P Server] Lắng nghe P2P trên port riêng: {p2p_listen_port}")
\ No newline at end of file
+    print(f"[P2P Server] Lắng nghe P2P trên port riêng: {p2p_listen_port}")
+    return True
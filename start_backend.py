@@ -22,6 +22,7 @@ using the socket framework. It parses command-line arguments to configure the
 server's IP address and port, and then launches the backend server.
 """
 
+import os
 import socket
 import argparse
 
@@ -40,6 +41,19 @@ if __name__ == "__main__":
 
     :arg --server-ip (str): IP address to bind the server (default: 127.0.0.1).
     :arg --server-port (int): Port number to bind the server (default: 9000).
+    :arg --pool-size (int): Number of worker threads (default: 32).
+    :arg --queue-size (int): Pending connection queue depth (default: 128).
+    :arg --engine (str): Serving engine, ``thread`` or ``asyncio`` (default: thread).
+    :arg --workers (int): Number of pre-forked processes sharing the port (default: 1).
+    :arg --log-level (str): Lowest logged level, e.g. ``DEBUG`` (default: INFO).
+    :arg --metrics-path (str): Path serving Prometheus metrics, e.g. ``/metrics`` (default: off).
+    :arg --admin-path (str): Prefix of the profiling admin endpoint, e.g. ``/_admin`` (default: off).
+    :arg --admin-token (str): Secret expected in ``X-Admin-Token`` by the admin endpoint
+                              (default: ``$WEAPROUS_ADMIN_TOKEN``).
+    :arg --profile-dir (str): Directory receiving profile files (default: system temp dir).
+    :arg --header-timeout (float): Seconds to receive a header block (default: 10).
+    :arg --body-timeout (float): Seconds to receive a request body (default: 30).
+    :arg --write-timeout (float): Seconds to write a response (default: 30).
     """
 
     parser = argparse.ArgumentParser(
@@ -59,8 +73,89 @@ if __name__ == "__main__":
         help='Port number to bind the server. Default is {}.'.format(PORT)
     )
  
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        default=None,
+        help='Number of worker threads serving connections.'
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=None,
+        help='Maximum number of connections waiting for a worker.'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['thread', 'asyncio'],
+        default=None,
+        help='Serving engine: worker thread pool or asyncio event loop.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of pre-forked processes sharing the port.'
+    )
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default=None,
+        help='Lowest level written to the log.'
+    )
+    parser.add_argument(
+        '--metrics-path',
+        default=None,
+        help='Serve Prometheus metrics on this path, e.g. /metrics.'
+    )
+    parser.add_argument(
+        '--admin-path',
+        default=None,
+        help='Serve the profiling admin endpoint (loopback only) under this prefix, e.g. /_admin.'
+    )
+    parser.add_argument(
+        '--admin-token',
+        default=os.environ.get('WEAPROUS_ADMIN_TOKEN'),
+        help='Secret admin requests must send in X-Admin-Token (required with --admin-path).'
+    )
+    parser.add_argument(
+        '--profile-dir',
+        default=None,
+        help='Directory receiving profile files.'
+    )
+    parser.add_argument(
+        '--header-timeout',
+        type=float,
+        default=None,
+        help='Seconds allowed to receive a complete header block.'
+    )
+    parser.add_argument(
+        '--body-timeout',
+        type=float,
+        default=None,
+        help='Seconds allowed to receive a complete request body.'
+    )
+    parser.add_argument(
+        '--write-timeout',
+        type=float,
+        default=None,
+        help='Seconds allowed to write a complete response.'
+    )
+ 
     args = parser.parse_args()
     ip = args.server_ip
     port = args.server_port
 
-    create_backend(ip, port)
+    create_backend(ip, port,
+                   pool_size=args.pool_size,
+                   queue_size=args.queue_size,
+                   engine=args.engine,
+                   workers=args.workers,
+                   log_level=args.log_level,
+                   metrics_path=args.metrics_path,
+                   admin_path=args.admin_path,
+                   admin_token=args.admin_token,
+                   profile_dir=args.profile_dir,
+                   header_timeout=args.header_timeout,
+                   body_timeout=args.body_timeout,
+                   write_timeout=args.write_timeout)
@@ -27,7 +27,7 @@ Requirements:
 - socket: provide socket networking interface.
 - threading: enables concurrent client handling via threads.
 - argparse: parses command-line arguments for server configuration.
-- re: used for regular expression matching in configuration parsing
+- daemon.routing: parses the virtual host configuration file.
 - response: response utilities.
 - httpadapter: the class for handling HTTP requests.
 - urlparse: parses URLs to extract host and port information.
@@ -38,72 +38,15 @@ Requirements:
 import socket
 import threading
 import argparse
-import re
 from urllib.parse import urlparse
 from collections import defaultdict
 
 from daemon import create_proxy
+from daemon.routing import parse_virtual_hosts
 
 PROXY_PORT = 8080
 
 
-def parse_virtual_hosts(config_file):
-    """
-    Parses virtual host blocks from a config file.
-
-    :config_file (str): Path to the NGINX config file.
-    :rtype list of dict: Each dict contains 'listen'and 'server_name'.
-    """
-
-    # ✅ FIX: Chỉ định mã hóa UTF-8 để tránh UnicodeDecodeError
-    with open(config_file, 'r', encoding='utf-8') as f:
-        config_text = f.read()
-
-    # Match each host block
-    host_blocks = re.findall(r'host\s+"([^"]+)"\s*\{(.*?)\}', config_text, re.DOTALL)
-
-    dist_policy_map = ""
-
-    routes = {}
-    for host, block in host_blocks:
-        proxy_map = {}
-
-        # Find all proxy_pass entries
-        proxy_passes = re.findall(r'proxy_pass\s+http://([^\s;]+);', block)
-        map_list = proxy_map.get(host, [])
-        map_list = map_list + proxy_passes
-        proxy_map[host] = map_list
-
-        # Find dist_policy if present
-        policy_match = re.search(r'dist_policy\s+(\w+)', block)
-        if policy_match:
-            dist_policy_map = policy_match.group(1)
-        else:  # default policy is round_robin
-            dist_policy_map = 'round-robin'
-            
-        #
-        # @bksysnet: Build the mapping and policy
-        # TODO: this policy varies among scenarios 
-        #       the default policy is provided with one proxy_pass
-        #       In the multi alternatives of proxy_pass then
-        #       the policy is applied to identify the highes matching
-        #       proxy_pass
-        #
-        proxy_pass_list = proxy_map.get(host, [])
-        
-        if len(proxy_pass_list) == 1:
-            routes[host] = (proxy_pass_list[0], dist_policy_map)
-        # esle if:
-        #           TODO:   apply further policy matching here
-        #
-        else:
-            routes[host] = (proxy_pass_list, dist_policy_map)
-
-    for key, value in list(routes.items()):
-        print(key, value)
-    return routes
-
-
 if __name__ == "__main__":
     """
     Entry point for launching the proxy server.
@@ -114,16 +57,80 @@ if __name__ == "__main__":
 
     :arg --server-ip (str): IP address to bind the server (default: 127.0.0.1).
     :arg --server-port (int): Port number to bind the server (default: 9000).
+    :arg --metrics-path (str): Path serving Prometheus metrics, e.g. ``/metrics`` (default: off).
+    :arg --config (str): Virtual host configuration file (default: config/proxy.conf).
+    :arg --engine (str): Serving engine, ``thread`` or ``asyncio`` (default: thread).
+    :arg --workers (int): Number of pre-forked processes sharing the port (default: 1).
+    :arg --backlog (int): Accept backlog of the listening socket (default: 50).
+    :arg --header-timeout (float): Seconds to receive a client header block (default: 10).
+    :arg --body-timeout (float): Seconds to receive a client request body (default: 30).
+    :arg --write-timeout (float): Seconds to write a response to the client (default: 30).
+    :arg --upstream-timeout (float): Seconds to wait for a backend answer (default: 30).
+    :arg --upstream-max-idle (int): Idle keep-alive connections kept per backend (default: 16).
+    :arg --upstream-max-per-host (int): Open connections allowed per backend (default: 64).
+    :arg --upstream-idle-timeout (float): Seconds an idle backend connection is kept (default: 4).
+    :arg --upstream-connect-timeout (float): Seconds for a backend to accept a connection (default: 3).
+    :arg --health-interval (float): Seconds between active backend probes, 0 to disable (default: 5).
+    :arg --health-timeout (float): Seconds allowed for one probe (default: 1).
+    :arg --health-path (str): Path probed with GET, e.g. ``/login.html`` (default: TCP connect).
+    :arg --max-fails (int): Consecutive failures that eject a backend (default: 3).
+    :arg --fail-timeout (float): Seconds of the first ejection, doubled on repeats (default: 10).
+    :arg --proxy-cache-bytes (int): Byte budget of the response cache (default: 64 MiB).
+    :arg --proxy-cache-entry-size (int): Largest response body cached (default: 1 MiB).
+    :arg --reload-interval (float): Seconds between checks of ``--config`` for changes,
+                                    0 to reload on ``SIGHUP`` only (default: 2).
     """
 
     parser = argparse.ArgumentParser(prog='Proxy', description='', epilog='Proxy daemon')
     parser.add_argument('--server-ip', default='0.0.0.0')
     parser.add_argument('--server-port', type=int, default=PROXY_PORT)
+    parser.add_argument('--metrics-path', default=None)
+    parser.add_argument('--config', default='config/proxy.conf')
+    parser.add_argument('--engine', choices=['thread', 'asyncio'], default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backlog', type=int, default=None)
+    parser.add_argument('--header-timeout', type=float, default=None)
+    parser.add_argument('--body-timeout', type=float, default=None)
+    parser.add_argument('--write-timeout', type=float, default=None)
+    parser.add_argument('--upstream-timeout', type=float, default=None)
+    parser.add_argument('--upstream-max-idle', type=int, default=None)
+    parser.add_argument('--upstream-max-per-host', type=int, default=None)
+    parser.add_argument('--upstream-idle-timeout', type=float, default=None)
+    parser.add_argument('--upstream-connect-timeout', type=float, default=None)
+    parser.add_argument('--health-interval', type=float, default=None)
+    parser.add_argument('--health-timeout', type=float, default=None)
+    parser.add_argument('--health-path', default=None)
+    parser.add_argument('--max-fails', type=int, default=None)
+    parser.add_argument('--fail-timeout', type=float, default=None)
+    parser.add_argument('--proxy-cache-bytes', type=int, default=None)
+    parser.add_argument('--proxy-cache-entry-size', type=int, default=None)
+    parser.add_argument('--reload-interval', type=float, default=None)
  
     args = parser.parse_args()
     ip = args.server_ip
     port = args.server_port
 
-    routes = parse_virtual_hosts("config/proxy.conf")
-
-    create_proxy(ip, port, routes)
\ No newline at end of file
+    routes = parse_virtual_hosts(args.config)
+
+    create_proxy(ip, port, routes,
+                 metrics_path=args.metrics_path,
+                 engine=args.engine,
+                 workers=args.workers,
+                 backlog=args.backlog,
+                 header_timeout=args.header_timeout,
+                 body_timeout=args.body_timeout,
+                 write_timeout=args.write_timeout,
+                 upstream_timeout=args.upstream_timeout,
+                 upstream_max_idle=args.upstream_max_idle,
+                 upstream_max_per_host=args.upstream_max_per_host,
+                 upstream_idle_timeout=args.upstream_idle_timeout,
+                 upstream_connect_timeout=args.upstream_connect_timeout,
+                 health_interval=args.health_interval,
+                 health_timeout=args.health_timeout,
+                 health_path=args.health_path,
+                 max_fails=args.max_fails,
+                 fail_timeout=args.fail_timeout,
+                 proxy_cache_bytes=args.proxy_cache_bytes,
+                 proxy_cache_entry_size=args.proxy_cache_entry_size,
+                 config_path=args.config,
+                 reload_interval=args.reload_interval)
\ No newline at end of file
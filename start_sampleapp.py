@@ -6,11 +6,10 @@ import argparse
 import threading
 import os
 import sys
-# Thêm requests hoặc tương đương để gọi API từ Tracker
-import requests # Sử dụng thư viện requests tiêu chuẩn (giả định có thể dùng)
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, quote
 
 from daemon.weaprous import WeApRous
+from daemon.response import Response
 import peer
 
 PORT = 8000
@@ -21,59 +20,29 @@ app = WeApRous()
 # ... (Giữ nguyên các hàm build_json_response, build_401_response, build_file_response, v.v.)
 # (Phần này được giữ nguyên như trong input của bạn)
 def build_json_response(status_code, data_dict):
-    """Xây dựng phản hồi JSON thô cho các API Chat."""
-    
-    body = json.dumps(data_dict)
-    encoded_body = body.encode('utf-8')
-    status_line = {
-        200: "200 OK",
-        400: "400 Bad Request",
-        500: "500 Internal Server Error",
-        503: "503 Service Unavailable"
-    }.get(status_code, "200 OK")
-
-    response_lines = [
-        f"HTTP/1.1 {status_line}",
-        "Content-Type: application/json; charset=utf-8",
-        f"Content-Length: {len(encoded_body)}",
-        "Connection: close",
-        "",
-        body
-    ]
-    return "\r\n".join(response_lines), status_code
+    """Trả về phản hồi JSON cho các API Chat (framework tự mã hoá và tính Content-Length)."""
+    return data_dict, status_code
 
 # ... (Các hàm khác như build_401_response, build_file_response, build_welcome_response được giữ nguyên)
 def build_401_response():
     """Tạo phản hồi 401 Unauthorized đơn giản."""
     body = "<h1>401 Unauthorized</h1><p>Access denied. Please log in.</p>"
-    response_lines = [
-        "HTTP/1.1 401 Unauthorized",
-        "Content-Type: text/html",
-        f"Content-Length: {len(body)}",
-        "Connection: close",
-        "",
-        body
-    ]
-    return "\r\n".join(response_lines), 401
+    return Response(body=body, status_code=401, headers={"Content-Type": "text/html"})
+
+def build_page_response(body, set_cookie=None):
+    """Tạo phản hồi 200 OK cho một trang HTML, kèm Set-Cookie nếu có."""
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    if set_cookie:
+        headers["Set-Cookie"] = set_cookie
+    return Response(body=body, headers=headers)
 
 def build_file_response(filename, set_cookie=None):
     """Tạo phản hồi 200 OK với file HTML từ www/."""
     try:
         filepath = os.path.join("www", filename)
-        with open(filepath, "r", encoding="utf-8") as f:
+        with open(filepath, "rb") as f:
             body = f.read()
-            response_lines = [
-                "HTTP/1.1 200 OK",
-                "Content-Type: text/html; charset=utf-8",
-                f"Content-Length: {len(body)}",
-                "Connection: close",
-            ]
-            if set_cookie:
-                response_lines.append(f"Set-Cookie: {set_cookie}")
-            response_lines.append("")
-            response_lines.append(body)
-
-            return "\r\n".join(response_lines), 200
+        return build_page_response(body, set_cookie)
     except FileNotFoundError:
         # Giả định 404 cho tiện, bạn có thể thay đổi bằng hàm 404 chuẩn hơn
         return build_401_response() 
@@ -137,31 +106,12 @@ def build_welcome_response(set_cookie=None):
 </html>
     """
 
-    response_lines = [
-        "HTTP/1.1 200 OK",
-        "Content-Type: text/html; charset=utf-8",
-        f"Content-Length: {len(body)}",
-        "Connection: close",
-    ]
-    if set_cookie:
-        response_lines.append(f"Set-Cookie: {set_cookie}")
-    response_lines.append("")
-    response_lines.append(body)
-
-    return "\r\n".join(response_lines), 200
+    return build_page_response(body, set_cookie)
 # --- TASK 1: COOKIE SESSION VÀ PHỤC VỤ TRANG ---
 # ... (Các route / , /login.html, /login, /welcome, /register.html, /index.html được giữ nguyên)
 @app.route('/', methods=['GET'])
 def index_access(headers="guest", body="anonymous"):
-    redirect_lines = [
-        "HTTP/1.1 302 Found",
-        "Location: /login.html",
-        "Content-Length: 0",
-        "Connection: close",
-        "",
-        ""
-    ]
-    return "\r\n".join(redirect_lines), 302
+    return b"", 302, {"Location": "/login.html"}
 
 
 @app.route('/login.html', methods=['GET'])
@@ -174,9 +124,9 @@ def login(headers="guest", body="anonymous"):
     print(f"[LOGIN] Received POST /login with body: {body}")
     if "username=admin" in body and "password=password" in body:
         print(f"[LOGIN] Credentials valid. Returning response with Set-Cookie: auth=true")
-        response, status = build_welcome_response(set_cookie="auth=true; Path=/")
-        print(f"[LOGIN] First 500 chars of response: {response[:500]}")
-        return response, status
+        response = build_welcome_response(set_cookie="auth=true; Path=/")
+        print(f"[LOGIN] First 500 bytes of body: {response.content[:500]}")
+        return response
     else:
         print(f"[LOGIN] Invalid credentials. Returning 401.")
         return build_401_response()
@@ -321,9 +271,8 @@ def send_peer_route(headers="guest", body="anonymous"):
             
             # Gọi Tracker để lấy IP/Port của TẤT CẢ thành viên trong kênh
             tracker_response = peer.call_tracker_api(
-                '/get-members', 
-                method='GET', 
-                data={'channel_name': channel_name}
+                '/channels/{}/members'.format(quote(channel_name, safe='')),
+                method='GET'
             )
             
             if tracker_response['status_code'] != 200:
@@ -385,20 +334,29 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='Backend', description='', epilog='Beckend daemon')
     parser.add_argument('--server-ip', default='0.0.0.0')
     parser.add_argument('--server-port', type=int, default=PORT)
+    parser.add_argument('--admin-path', default=None,
+                        help='Serve the profiling admin endpoint (loopback only) under this prefix, e.g. /_admin')
+    parser.add_argument('--admin-token', default=os.environ.get('WEAPROUS_ADMIN_TOKEN'),
+                        help='Secret admin requests must send in X-Admin-Token (required with --admin-path)')
+    parser.add_argument('--profile-dir', default=None,
+                        help='Directory receiving profile files')
     
     args = parser.parse_args()
     ip = args.server_ip
     http_port = args.server_port
     
     # 1. Khởi động P2P Server (trên Port HTTP + 1)
-    peer.init_peer_server(ip, http_port)
+    if not peer.init_peer_server(ip, http_port):
+        print(f"[FATAL ERROR] P2P Server không khởi động được trên port {peer._get_p2p_port(http_port)}.")
+        sys.exit(1)
 
     # 2. Khởi động WebApp Server (WeApRous)
     print(f"[WeApRous] Preparing to launch HTTP Server on {ip}:{http_port}")
     app.prepare_address(ip, http_port)
     
     try:
-        app.run()
+        app.run(admin_path=args.admin_path, admin_token=args.admin_token,
+                profile_dir=args.profile_dir)
     except OSError as e:
         p2p_port = peer._get_p2p_port(http_port)
         if e.winerror == 10048:
@@ -1,5 +1,6 @@
 # start_tracker.py (Phiên bản Bổ sung Channel Management)
 
+import os
 import json
 import argparse
 from daemon.weaprous import WeApRous
@@ -17,33 +18,17 @@ active_channels = {}
 
 app = WeApRous()
 
-# --- HÀM TRỢ GIÚP: XÂY DỰNG PHẢN HỒI JSON HOÀN CHỈNH ---
+# --- HÀM TRỢ GIÚP: XÂY DỰNG PHẢN HỒI JSON ---
 def build_tracker_response(status_code, data_dict):
     """
-    Hàm trợ giúp xây dựng phản hồi HTTP thô (raw HTTP response) 
-    với Content-Length chính xác cho phản hồi JSON.
+    Hàm trợ giúp trả về phản hồi JSON cho WeApRous.
+
+    Framework mã hoá dict thành JSON (UTF-8) một lần và tự tính
+    Content-Length theo số byte, nên tiếng Việt trong message không còn làm
+    sai độ dài phản hồi.
     """
-    response_body = json.dumps(data_dict)
-    
-    status_line = {
-        200: "200 OK", 
-        400: "400 Bad Request", 
-        404: "404 Not Found",
-        409: "409 Conflict", # Mã này hữu ích khi tạo kênh đã tồn tại
-        500: "500 Internal Server Error", 
-        503: "503 Service Unavailable"
-    }.get(status_code, "200 OK")
-    
-    response_lines = [
-        f"HTTP/1.1 {status_line}",
-        "Content-Type: application/json; charset=utf-8",
-        f"Content-Length: {len(response_body)}", 
-        "Connection: close",
-        "",
-        response_body
-    ]
-    # NOTE: WeApRous cần tuple (string, int). String này là Raw HTTP Response.
-    return "\r\n".join(response_lines), status_code
+    # NOTE: WeApRous nhận tuple (dict, int) và tự dựng phản hồi HTTP.
+    return data_dict, status_code
 
 
 # 3. API ĐỂ CÁC PEER TỰ ĐĂNG KÝ (POST)
@@ -184,36 +169,50 @@ def get_members(headers, body):
     Trả về danh sách các peer object (ip/port) của các thành viên trong kênh.
     """
     try:
-        # NOTE: Trong RESTful GET, body thường rỗng. Ta sẽ giả định body chứa JSON data 
-        # hoặc bạn sẽ cần parse query parameters từ headers/url. 
-        # Tạm thời ta giả định body chứa JSON data cho tiện việc test POST client.
-        
-        # Nếu dùng query params, bạn cần parse thủ công:
-        # Ví dụ: channel_name = self.request.url_params.get('channel_name') 
-        
-        # Tạm thời dùng body cho dễ test:
+        # Giữ lại để tương thích: channel_name nằm trong body JSON.
+        # Route mới /channels/<name>/members nhận tên kênh từ đường dẫn.
         data = json.loads(body)
         channel_name = data.get('channel_name')
         
         if not channel_name:
             return build_tracker_response(400, {"status": "lỗi", "message": "Missing channel_name in request body."})
 
-        # Kiểm tra kênh có tồn tại không
-        if channel_name not in active_channels:
-            return build_tracker_response(404, {"status": "lỗi", "message": f"Kênh '{channel_name}' không tồn tại."})
-        
-        member_usernames = active_channels[channel_name]['members']
-        
-        # Lấy thông tin IP/Port từ active_peers cho mỗi thành viên
-        member_peer_data = [active_peers[user] for user in member_usernames if user in active_peers]
-        
-        print(f"[Tracker] Trả về danh sách {len(member_peer_data)} thành viên cho kênh: {channel_name}")
-        return build_tracker_response(200, {"channel_name": channel_name, "members": member_peer_data})
+        return build_members_response(channel_name)
 
     except Exception as e:
         print(f"[Tracker] Lỗi khi lấy danh sách thành viên: {e}")
         return build_tracker_response(500, {"status": "lỗi", "message": f"Lỗi nội bộ Tracker: {e}"})
 
+# 9. API LẤY DANH SÁCH THÀNH VIÊN THEO ĐƯỜNG DẪN (GET)
+@app.route('/channels/<name>/members', methods=['GET'])
+def get_channel_members(headers, body, name):
+    """
+    Trả về danh sách các peer object (ip/port) của các thành viên trong kênh,
+    tên kênh lấy từ tham số đường dẫn.
+    """
+    try:
+        return build_members_response(name)
+    except Exception as e:
+        print(f"[Tracker] Lỗi khi lấy danh sách thành viên: {e}")
+        return build_tracker_response(500, {"status": "lỗi", "message": f"Lỗi nội bộ Tracker: {e}"})
+
+
+def build_members_response(channel_name):
+    """
+    Xây dựng phản hồi danh sách thành viên (ip/port) của một kênh.
+    """
+    # Kiểm tra kênh có tồn tại không
+    if channel_name not in active_channels:
+        return build_tracker_response(404, {"status": "lỗi", "message": f"Kênh '{channel_name}' không tồn tại."})
+    
+    member_usernames = active_channels[channel_name]['members']
+    
+    # Lấy thông tin IP/Port từ active_peers cho mỗi thành viên
+    member_peer_data = [active_peers[user] for user in member_usernames if user in active_peers]
+    
+    print(f"[Tracker] Trả về danh sách {len(member_peer_data)} thành viên cho kênh: {channel_name}")
+    return build_tracker_response(200, {"channel_name": channel_name, "members": member_peer_data})
+
 # --------------------------------------------------------------------------
 
 if __name__ == "__main__":
@@ -226,6 +225,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='Tracker', description='Tracker server cho ứng dụng chat P2P')
     parser.add_argument('--server-ip', default='0.0.0.0')
     parser.add_argument('--server-port', type=int, default=TRACKER_PORT)
+    parser.add_argument('--metrics-path', default=None,
+                        help='Serve Prometheus metrics on this path, e.g. /metrics')
+    parser.add_argument('--admin-path', default=None,
+                        help='Serve the profiling admin endpoint (loopback only) under this prefix, e.g. /_admin')
+    parser.add_argument('--admin-token', default=os.environ.get('WEAPROUS_ADMIN_TOKEN'),
+                        help='Secret admin requests must send in X-Admin-Token (required with --admin-path)')
+    parser.add_argument('--profile-dir', default=None,
+                        help='Directory receiving profile files')
 
     args = parser.parse_args()
     ip = args.server_ip
@@ -233,4 +240,7 @@ if __name__ == "__main__":
 
     print(f"Bắt đầu Tracker Server tại http://{ip}:{port}")
     app.prepare_address(ip, port)
-    app.run()
\ No newline at end of file
+    app.run(metrics_path=args.metrics_path,
+            admin_path=args.admin_path,
+            admin_token=args.admin_token,
+            profile_dir=args.profile_dir)
\ No newline at end of file
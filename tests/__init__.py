@@ -0,0 +1,20 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests
+~~~~~~~~~~~~~~~~~
+
+Unit tests of the pure-logic modules of the daemon (routing, framing,
+balancing, health, caching). Run them from the repository root with
+``python -m pytest -q tests``.
+"""
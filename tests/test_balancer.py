@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_balancer
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.balancer`: the ``dist_policy`` policies, skipping of
+ejected upstreams and the remapping of a consistent hash.
+"""
+
+import itertools
+from collections import Counter
+
+import pytest
+
+from daemon.balancer import build_balancer, ConsistentHash, parse_upstream
+
+# Health is shared per ``host:port`` through ``HEALTH``: every test uses
+# addresses of its own so that ejections do not leak between tests.
+_ports = itertools.count(20000)
+
+
+def targets(*weights):
+    return ["127.0.0.1:{} weight={}".format(next(_ports), weight) for weight in weights]
+
+
+def picks(balancer, count, **kwargs):
+    chosen = []
+    for _ in range(count):
+        upstream, trial = balancer.acquire(**kwargs)
+        chosen.append(upstream)
+        balancer.release(upstream, True, trial)
+    return chosen
+
+
+def test_round_robin_ignores_weights():
+    balancer = build_balancer(targets(3, 1, 1))
+    a, b, c = balancer.upstreams
+    assert picks(balancer, 6) == [a, b, c, a, b, c]
+
+
+def test_weighted_round_robin_is_smooth():
+    balancer = build_balancer(targets(5, 1, 1), "weighted-round-robin")
+    a, b, c = balancer.upstreams
+    assert picks(balancer, 7) == [a, a, b, a, c, a, a]
+
+
+def test_least_conn_prefers_idle_upstream():
+    balancer = build_balancer(targets(1, 1), "least-conn")
+    first, _ = balancer.acquire()
+    second, _ = balancer.acquire()
+    assert first is not second
+    balancer.release(first, True)
+    assert balancer.acquire()[0] is first
+
+
+def test_acquire_counts_in_flight_and_excludes():
+    balancer = build_balancer(targets(1, 1))
+    a, b = balancer.upstreams
+    upstream, trial = balancer.acquire(exclude=(a,))
+    assert (upstream, trial) == (b, False)
+    assert b.in_flight == 1
+    balancer.release(b, None, trial)
+    assert b.in_flight == 0
+    assert balancer.acquire(exclude=(a, b)) == (None, None)
+
+
+def test_ejected_upstream_is_skipped():
+    balancer = build_balancer(targets(1, 1))
+    a, b = balancer.upstreams
+    for _ in range(a.health._table.max_fails):
+        a.health.report(False)
+    assert set(picks(balancer, 4)) == {b}
+
+
+def test_consistent_hash_is_stable():
+    balancer = build_balancer(targets(1, 1, 1), "consistent-hash $http_x_user_id")
+    for user in ("alice", "bob", "carol"):
+        headers = {"x-user-id": user}
+        assert len(set(picks(balancer, 5, headers=headers))) == 1
+
+
+def test_consistent_hash_remaps_only_removed_share():
+    specs = targets(1, 1, 1, 1)
+    full = build_balancer(specs, "consistent-hash")
+    smaller = build_balancer(specs[:3], "consistent-hash")
+    keys = ["10.0.{}.{}".format(i // 256, i % 256) for i in range(2000)]
+    before = {key: full.pick(client_ip=key).address for key in keys}
+    after = {key: smaller.pick(client_ip=key).address for key in keys}
+    removed = full.upstreams[3].address
+    moved = [key for key in keys if before[key] != after[key]]
+    assert moved and all(before[key] == removed for key in moved)
+    # Every upstream gets a fair share of the ring.
+    shares = Counter(before.values())
+    assert min(shares.values()) > len(keys) / 4 * 0.6
+
+
+def test_consistent_hash_keys():
+    balancer = ConsistentHash([parse_upstream(targets(1)[0])], "$uri")
+    assert balancer.request_key("1.2.3.4", {}, "/a?b=1") == "/a"
+    balancer.key = "$http_x_user_id"
+    assert balancer.request_key(None, {"x-user-id": "7"}, "/") == "7"
+    with pytest.raises(ValueError):
+        ConsistentHash(balancer.upstreams, "$cookie")
+
+
+def test_invalid_policies():
+    with pytest.raises(ValueError):
+        build_balancer(targets(1), "fastest")
+    with pytest.raises(ValueError):
+        build_balancer(targets(1), "least-conn extra")
+    with pytest.raises(ValueError):
+        build_balancer(["127.0.0.1"])
+    with pytest.raises(ValueError):
+        build_balancer(["127.0.0.1:1 weight=0"])
@@ -0,0 +1,117 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_health
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.health`: the circuit breaker of an upstream through
+its ``up``, ``down`` and ``half-open`` states.
+"""
+
+import pytest
+
+from daemon.health import HealthTable, UP, DOWN, HALF_OPEN, RISE
+
+
+@pytest.fixture
+def health():
+    return HealthTable(max_fails=2, fail_timeout=10).get("127.0.0.1:9001")
+
+
+def eject(health):
+    for _ in range(health._table.max_fails):
+        health.report(False)
+    assert health.state == DOWN
+
+
+def test_ejected_after_max_fails(health):
+    health.report(False)
+    assert health.state == UP
+    health.report(True)
+    health.report(False)
+    assert health.state == UP
+    health.report(False)
+    assert health.state == DOWN
+    assert not health.available(health.retry_at - 1)
+    assert health.claim(health.retry_at - 1) is None
+
+
+def test_single_half_open_trial(health):
+    eject(health)
+    now = health.retry_at
+    assert health.available(now)
+    trial = health.claim(now)
+    assert trial and health.state == HALF_OPEN
+    assert not health.available(now)
+    assert health.claim(now) is None
+
+
+def test_rise_successes_close_circuit(health):
+    eject(health)
+    now = health.retry_at
+    for _ in range(RISE):
+        trial = health.claim(now)
+        health.report(True, trial)
+    assert health.state == UP
+    assert health.ejections == 0
+    assert health.claim(now) is False
+
+
+def test_half_open_failure_backs_off(health):
+    eject(health)
+    first = health.retry_at - health._table.fail_timeout
+    trial = health.claim(health.retry_at)
+    health.report(False, trial)
+    assert health.state == DOWN
+    assert health.ejections == 2
+    # The second ejection lasts twice as long as the first one.
+    assert health.retry_at - first >= 2 * health._table.fail_timeout - 1
+
+
+def test_stale_request_does_not_release_trial(health):
+    stale = health.claim(0)
+    assert stale is False
+    eject(health)
+    now = health.retry_at
+    trial = health.claim(now)
+    health.report(True, stale)
+    assert health.trials == 1 and health.successes == 0
+    health.report(None, trial)
+    assert health.trials == 0 and health.state == HALF_OPEN
+
+
+def test_earlier_trial_does_not_release_later_one(health):
+    eject(health)
+    old = health.claim(health.retry_at)
+    health.report(False, old)
+    eject_time = health.retry_at
+    current = health.claim(eject_time)
+    assert current != old
+    health.report(None, old)
+    assert health.trials == 1
+    assert health.claim(eject_time) is None
+
+
+def test_probe_readmits_down_upstream(health):
+    eject(health)
+    health.report(True, trial=False)
+    assert health.state == HALF_OPEN
+    # A probe is not a trial: it does not count towards RISE.
+    health.report(True, trial=False)
+    assert health.successes == 0
+
+
+def test_unblamed_outcome_is_ignored(health):
+    health.report(None)
+    health.report(None)
+    assert health.state == UP and health.fails == 0
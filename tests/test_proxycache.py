@@ -0,0 +1,136 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_proxycache
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.proxycache`: storage rules, freshness, ``Vary``,
+revalidation with ``304`` and the byte budget.
+"""
+
+import time
+
+import pytest
+
+from daemon.proxycache import ProxyCache, CachePolicy, freshness
+from daemon.upstream import UpstreamResponse
+
+POLICY = CachePolicy.from_options({"proxy_cache": "on", "proxy_cache_valid": "60"})
+
+
+def response(status_code=200, fields=(), length=5):
+    status_line = b"HTTP/1.1 %d OK" % status_code
+    return UpstreamResponse(status_code, b"", status_line=status_line,
+                            fields=list(fields), framing=("length", length))
+
+
+def fetch(cache, target="/a", headers=None, fields=(), body=b"hello", policy=POLICY):
+    """Looks a GET up and, on a miss, relays and stores a backend response."""
+    headers = headers or {}
+    served, exchange = cache.lookup(policy, "app", "GET", target, headers)
+    if served is None and exchange is not None:
+        if exchange.on_response(response(fields=fields, length=len(body))) is None:
+            exchange.feed(body)
+            exchange.finish()
+    return served
+
+
+@pytest.fixture
+def cache():
+    return ProxyCache(max_bytes=10000, max_entry_size=100)
+
+
+def test_policy_from_options():
+    assert POLICY.enabled and POLICY.valid == 60
+    policy = CachePolicy.from_options({"proxy_cache": "off"})
+    assert not policy.enabled
+    assert ProxyCache().lookup(policy, "app", "GET", "/", {}) == (None, None)
+
+
+def test_freshness():
+    assert freshness({"cache-control": "max-age=30"}, POLICY) == (30, 0)
+    assert freshness({"cache-control": "s-maxage=5, max-age=30"}, POLICY) == (5, 0)
+    assert freshness({"cache-control": "no-cache"}, POLICY) == (0, 0)
+    assert freshness({"cache-control": "max-age=1, stale-while-revalidate=9"}, POLICY) == (1, 9)
+    assert freshness({}, POLICY) == (60, 0)
+
+
+def test_hit_after_miss(cache):
+    assert fetch(cache) is None
+    served = fetch(cache)
+    assert served.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"X-Cache: HIT" in served and served.endswith(b"\r\n\r\nhello")
+    head, _ = cache.lookup(POLICY, "app", "HEAD", "/a", {})
+    assert head.endswith(b"\r\n\r\n")
+
+
+def test_storable(cache):
+    assert cache.storable(response(), {}, POLICY)
+    assert not cache.storable(response(500), {}, POLICY)
+    for line in (b"Cache-Control: no-store", b"Cache-Control: private",
+                 b"Set-Cookie: a=1", b"Vary: *"):
+        assert not cache.storable(response(fields=[line]), {}, POLICY)
+    assert not cache.storable(response(length=101), {}, POLICY)
+    # Without freshness, only a response with a validator is worth storing.
+    assert not cache.storable(response(), {}, CachePolicy(enabled=True))
+    assert cache.storable(response(fields=[b'ETag: "v1"']), {}, CachePolicy(enabled=True))
+
+
+def test_bypass(cache):
+    fetch(cache)
+    assert cache.lookup(POLICY, "app", "GET", "/a", {"authorization": "x"}) == (None, None)
+    assert cache.lookup(POLICY, "app", "GET", "/a", {"cache-control": "no-store"}) == (None, None)
+
+
+def test_vary_keeps_variants(cache):
+    fields = [b"Vary: Accept-Language"]
+    fetch(cache, headers={"accept-language": "vi"}, fields=fields, body=b"xin chao")
+    fetch(cache, headers={"accept-language": "en"}, fields=fields, body=b"hello")
+    assert fetch(cache, headers={"accept-language": "vi"}).endswith(b"xin chao")
+    assert fetch(cache, headers={"accept-language": "en"}).endswith(b"hello")
+
+
+def test_lru_eviction(cache):
+    fetch(cache, "/a")
+    cost = cache.size
+    cache.configure(max_bytes=cost * 2)
+    fetch(cache, "/b")
+    fetch(cache, "/a")
+    fetch(cache, "/c")
+    assert cache.size <= cost * 2
+    assert fetch(cache, "/a") is not None
+    assert cache.lookup(POLICY, "app", "GET", "/b", {})[0] is None
+
+
+def test_stale_entry_revalidated_with_304(cache):
+    fields = [b"Cache-Control: max-age=0, must-revalidate", b'ETag: "v1"']
+    fetch(cache, fields=fields)
+    size = cache.size
+    served, exchange = cache.lookup(POLICY, "app", "GET", "/a", {})
+    assert served is None and exchange.entry is not None
+    payload = exchange.prepare(b"GET /a HTTP/1.1\r\nIf-None-Match: \"x\"\r\n\r\n")
+    assert payload.count(b"If-None-Match") == 1 and b'If-None-Match: "v1"' in payload
+
+    update = [b"Cache-Control: max-age=60", b"X-Extra: " + b"e" * 20]
+    served = exchange.on_response(UpstreamResponse(304, b"", fields=update))
+    assert b"X-Cache: REVALIDATED" in served and served.endswith(b"hello")
+    # The budget follows the size of the refreshed header lines.
+    assert cache.size == size + len(update[1]) + len(update[0]) - len(fields[0])
+    assert exchange.entry.is_fresh(time.time())
+
+
+def test_if_none_match_answered_from_cache(cache):
+    fetch(cache, fields=[b'ETag: "v1"'])
+    served, _ = cache.lookup(POLICY, "app", "GET", "/a", {"if-none-match": 'W/"v1"'})
+    assert served.startswith(b"HTTP/1.1 304 Not Modified\r\n")
+    assert not served.endswith(b"hello")
@@ -0,0 +1,131 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_reader
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.reader`: header blocks, pipelining and body framing
+by ``Content-Length`` and chunked coding.
+"""
+
+import pytest
+
+from daemon.reader import (RequestReader, RequestError, BodyStream,
+                           body_framing, parse_chunk_size)
+
+
+class FakeConn:
+    """A socket whose ``recv`` returns the given pieces, then EOF."""
+
+    def __init__(self, *pieces):
+        self.pieces = list(pieces)
+
+    def recv(self, size):
+        if not self.pieces:
+            return b""
+        piece = self.pieces.pop(0)
+        if len(piece) > size:
+            self.pieces.insert(0, piece[size:])
+            piece = piece[:size]
+        return piece
+
+
+def reader(*pieces, max_header_size=1024, max_body_size=1024):
+    return RequestReader(FakeConn(*pieces), max_header_size, max_body_size)
+
+
+def test_head_split_across_recvs():
+    r = reader(b"GET / HTTP/1.1\r\nHo", b"st: a\r", b"\n\r\n")
+    assert r.read_head() == b"GET / HTTP/1.1\r\nHost: a"
+
+
+def test_pipelined_requests_and_stray_crlf():
+    r = reader(b"GET /a HTTP/1.1\r\n\r\n\r\nGET /b HTTP/1.1\r\n\r\n")
+    assert r.read_head() == b"GET /a HTTP/1.1"
+    assert r.read_head() == b"GET /b HTTP/1.1"
+    assert r.read_head() is None
+
+
+def test_oversized_head():
+    r = reader(b"GET / HTTP/1.1\r\nX: " + b"a" * 100, max_header_size=64)
+    with pytest.raises(RequestError) as e:
+        r.read_head()
+    assert e.value.status_code == 431
+
+
+def test_body_framing():
+    assert body_framing({}) == ("length", 0)
+    assert body_framing({"content-length": "12"}) == ("length", 12)
+    assert body_framing({"transfer-encoding": "gzip, chunked",
+                         "content-length": "3"}) == ("chunked", None)
+    with pytest.raises(RequestError):
+        body_framing({"content-length": "-1"})
+
+
+def test_chunk_size_ignores_extensions():
+    assert parse_chunk_size(b"1a;name=value") == 26
+    with pytest.raises(RequestError):
+        parse_chunk_size(b"zz")
+
+
+def test_content_length_body_then_next_request():
+    r = reader(b"hello", b"GET /next HTTP/1.1\r\n\r\n")
+    body = r.body_stream({"content-length": "5"})
+    assert body.read() == b"hello"
+    assert body.done
+    assert r.read_head() == b"GET /next HTTP/1.1"
+
+
+def test_chunked_body_with_trailers():
+    r = reader(b"4\r\nWiki\r\n5;ext=1\r\npedia\r\n0\r\nX-Trailer: 1\r\n\r\nNEXT")
+    body = r.body_stream({"transfer-encoding": "chunked"})
+    assert list(body) == [b"Wiki", b"pedia"]
+    assert body.done
+    assert bytes(r.buffer) == b"NEXT"
+
+
+def test_chunked_body_missing_terminator():
+    r = reader(b"3\r\nabcX\r\n0\r\n\r\n")
+    with pytest.raises(RequestError):
+        r.body_stream({"transfer-encoding": "chunked"}).read()
+
+
+def test_truncated_body():
+    r = reader(b"abc")
+    with pytest.raises(RequestError):
+        r.body_stream({"content-length": "10"}).read()
+
+
+def test_body_size_limits():
+    with pytest.raises(RequestError) as e:
+        reader(b"", max_body_size=4).body_stream({"content-length": "5"})
+    assert e.value.status_code == 413
+    r = reader(b"8\r\n12345678\r\n0\r\n\r\n", max_body_size=4)
+    with pytest.raises(RequestError) as e:
+        r.body_stream({"transfer-encoding": "chunked"}).read()
+    assert e.value.status_code == 413
+
+
+def test_read_chunk_bounds_pieces():
+    r = reader(b"abcdef")
+    body = r.body_stream({"content-length": "6"})
+    assert body.read_chunk(4) == b"abcd"
+    assert body.read_chunk(4) == b"ef"
+    assert body.read_chunk(4) == b""
+
+
+def test_close_delimited_body():
+    r = reader(b"part1", b"part2")
+    body = BodyStream(r, "close", None)
+    assert body.read() == b"part1part2"
+    assert body.done
@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_router
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.router`: the segment trie, typed parameters and the
+404/405 distinction.
+"""
+
+import pytest
+
+from daemon.router import Router
+
+
+def handler(name):
+    def func(**params):
+        return name, params
+    func.__name__ = name
+    return func
+
+
+@pytest.fixture
+def router():
+    router = Router()
+    router[("GET", "/channels")] = handler("list")
+    router[("GET", "/channels/<name>")] = handler("channel")
+    router[("GET", "/channels/<id>/members")] = handler("members")
+    router[("GET", "/users/<int:uid>")] = handler("user")
+    router[("GET", "/files/<path:rest>")] = handler("file")
+    router[("GET", "/any/*/info")] = handler("info")
+    router[("POST", "/login")] = handler("login")
+    return router
+
+
+def test_literal_route(router):
+    func, params, allowed = router.resolve("GET", "/channels?page=2")
+    assert func.__name__ == "list"
+    assert params == {} and allowed is None
+
+
+def test_parameter_names_belong_to_each_route(router):
+    func, params, _ = router.resolve("GET", "/channels/group1")
+    assert (func.__name__, params) == ("channel", {"name": "group1"})
+    func, params, _ = router.resolve("GET", "/channels/group1/members")
+    assert (func.__name__, params) == ("members", {"id": "group1"})
+
+
+def test_int_converter(router):
+    func, params, _ = router.resolve("GET", "/users/42")
+    assert func.__name__ == "user"
+    assert params == {"uid": 42}
+    assert router.resolve("GET", "/users/abc") == (None, {}, None)
+
+
+def test_path_and_wildcard(router):
+    func, params, _ = router.resolve("GET", "/files/a/b%20c.txt")
+    assert (func.__name__, params) == ("file", {"rest": "a/b c.txt"})
+    func, params, _ = router.resolve("GET", "/any/thing/info")
+    assert (func.__name__, params) == ("info", {})
+
+
+def test_literal_wins_over_parameter(router):
+    router[("GET", "/channels/new")] = handler("new")
+    assert router.resolve("GET", "/channels/new")[0].__name__ == "new"
+    assert router.resolve("GET", "/channels/old")[0].__name__ == "channel"
+
+
+def test_method_not_allowed_vs_not_found(router):
+    assert router.resolve("GET", "/login") == (None, {}, ["POST"])
+    assert router.resolve("GET", "/nowhere") == (None, {}, None)
+
+
+def test_lookup_returns_pattern(router):
+    assert router.lookup("GET", "/channels/x/members")[3] == "/channels/<id>/members"
+
+
+def test_path_parameter_must_be_last():
+    with pytest.raises(ValueError):
+        Router()[("GET", "/files/<path:rest>/x")] = handler("bad")
+
+
+def test_unknown_converter():
+    with pytest.raises(ValueError):
+        Router()[("GET", "/x/<float:v>")] = handler("bad")
+
+
+def test_dict_mutators_keep_the_trie_in_step(router):
+    router.update({("GET", "/extra"): handler("extra")})
+    assert router.resolve("GET", "/extra")[0].__name__ == "extra"
+    router.setdefault(("GET", "/other"), handler("other"))
+    assert router.resolve("GET", "/other")[0].__name__ == "other"
+    router.pop(("GET", "/extra"))
+    assert router.resolve("GET", "/extra") == (None, {}, None)
+    del router[("GET", "/other")]
+    assert router.resolve("GET", "/other") == (None, {}, None)
+    router.clear()
+    assert router.resolve("GET", "/channels") == (None, {}, None)
+
+
+def test_same_node_route_replaces_previous_one():
+    router = Router()
+    router[("GET", "/a/<x>")] = handler("x")
+    router[("GET", "/a/<y>")] = handler("y")
+    assert list(router) == [("GET", "/a/<y>")]
+    assert router.resolve("GET", "/a/1")[1] == {"y": "1"}
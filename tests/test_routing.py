@@ -0,0 +1,149 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+tests.test_routing
+~~~~~~~~~~~~~~~~~
+
+Tests of :mod:`daemon.routing`: the ``proxy.conf`` parser, the precedence
+of :meth:`RoutingTable.match` and the reload of :class:`LiveRoutes`.
+"""
+
+import pytest
+
+from daemon.routing import (RoutingTable, LiveRoutes, parse_virtual_hosts,
+                            split_host, DEFAULT_SERVER)
+
+CONFIG = """
+# Virtual hosts of the tests
+host "app1.local" {
+    proxy_pass http://127.0.0.1:9001;
+    proxy_cache on;   # cached
+    proxy_cache_valid 60;
+}
+host "app2.local" {
+    proxy_pass http://127.0.0.1:9002 weight=3;
+    proxy_pass http://127.0.0.1:9003;
+    dist_policy least-conn;
+    # proxy_pass http://127.0.0.1:9004;
+}
+host "fallback" {
+    proxy_pass http://127.0.0.1:9000;
+    default_server;
+}
+"""
+
+
+def entry(port, default=False):
+    target = "127.0.0.1:{}".format(port)
+    if default:
+        return (target, "round-robin", {DEFAULT_SERVER: "on"})
+    return (target, "round-robin")
+
+
+@pytest.fixture
+def table():
+    return RoutingTable({
+        "127.0.0.1:8080": entry(1),
+        "App.Local": entry(2),
+        "*.local": entry(3),
+        "*.chat.local": entry(4),
+        "*.local:8081": entry(5),
+        "fallback": entry(6, default=True),
+    })
+
+
+def test_exact_host_and_port_first(table):
+    assert table.match("127.0.0.1:8080") == "127.0.0.1:8080"
+    assert table.match("127.0.0.1:8081") == "fallback"
+
+
+def test_exact_name_on_any_port(table):
+    assert table.match("app.local") == "App.Local"
+    assert table.match("APP.LOCAL:8081") == "App.Local"
+
+
+def test_longest_wildcard_suffix(table):
+    assert table.match("room.chat.local") == "*.chat.local"
+    assert table.match("a.room.chat.local:80") == "*.chat.local"
+    assert table.match("other.local") == "*.local"
+    # A bare "local" has no label before the suffix.
+    assert table.match("local") == "fallback"
+
+
+def test_wildcard_with_port_before_any_port(table):
+    assert table.match("other.local:8081") == "*.local:8081"
+    assert table.match("other.local:8082") == "*.local"
+
+
+def test_default_server_or_none(table):
+    assert table.match("unknown.example") == "fallback"
+    assert RoutingTable({"a.local": entry(1)}).match("b.local") is None
+
+
+def test_two_default_servers():
+    with pytest.raises(ValueError):
+        RoutingTable({"a": entry(1, default=True), "b": entry(2, default=True)})
+
+
+def test_split_host():
+    assert split_host("example.com:8080") == ("example.com", "8080")
+    assert split_host("example.com") == ("example.com", None)
+    assert split_host("[::1]:8080") == ("[::1]", "8080")
+    assert split_host("::1") == ("::1", None)
+
+
+def test_parse_virtual_hosts(tmp_path):
+    path = tmp_path / "proxy.conf"
+    path.write_text(CONFIG, encoding="utf-8")
+    routes = parse_virtual_hosts(str(path))
+    assert routes["app1.local"] == ("127.0.0.1:9001", "round-robin",
+                                    {"proxy_cache": "on", "proxy_cache_valid": "60"})
+    # The commented proxy_pass is not applied.
+    assert routes["app2.local"] == (["127.0.0.1:9002 weight=3", "127.0.0.1:9003"],
+                                    "least-conn")
+    assert RoutingTable(routes).default == "fallback"
+
+
+def test_reload_keeps_unchanged_entries(tmp_path):
+    path = tmp_path / "proxy.conf"
+    path.write_text(CONFIG, encoding="utf-8")
+    routes = LiveRoutes(parse_virtual_hosts(str(path)), str(path))
+    before = routes.routes
+    path.write_text(CONFIG.replace("least-conn", "consistent-hash"), encoding="utf-8")
+    assert routes.reload()
+    assert routes.routes["app1.local"] is before["app1.local"]
+    assert routes.routes["app2.local"] is not before["app2.local"]
+    assert routes.routes["app2.local"][1] == "consistent-hash"
+
+
+def test_rejected_reload_keeps_current_table(tmp_path):
+    path = tmp_path / "proxy.conf"
+    path.write_text(CONFIG, encoding="utf-8")
+    routes = LiveRoutes(parse_virtual_hosts(str(path)), str(path))
+    table = routes.table
+    path.write_text(CONFIG.replace('"app1.local" {', '"app1.local" {\n    default_server;'),
+                    encoding="utf-8")
+    assert not routes.reload()
+    assert routes.table is table
+
+    def refuse(new_table):
+        raise ValueError("refused")
+
+    path.write_text(CONFIG, encoding="utf-8")
+    routes.check = refuse
+    assert not routes.reload()
+    assert routes.table is table
+    path.unlink()
+    routes.check = None
+    assert not routes.reload()
+    assert routes.table is table